@@ -0,0 +1,133 @@
+"""
+Перевірка генерації синонімів кількома запусками поспіль: кожен запуск asyncio.run має власний цикл подій,
+тому клієнт LLM попереднього запуску не повинен використовуватися наступним ("Event loop is closed").
+
+Відповіді LLM віддає локальний сервер-заглушка (LLM_BASE_URL), тож перевіряється справжній клієнт openai.
+На копії db/ukr-analysis.db послідовно виконуються: дві синхронні генерації generate_synonyms, дві фонові
+задачі generate і асинхронна генерація в циклі застосунку (маршрут /generate_synonyms) між двома задачами.
+Кеш відповідей вимкнено (fresh=True), тому кожен запуск справді звертається до заглушки.
+Код виходу 1, якщо хоч один запуск завершився помилкою.
+
+Запуск з кореня репозиторію:
+    python benchmarks/generation_runs.py
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DB = os.path.join(ROOT, "db", "ukr-analysis.db")
+
+STANDARD_NAME = "Аналіз для перевірки генерації"
+REQUEST_COUNT = 3
+# Скільки чекати на завершення фонової задачі, с
+JOB_TIMEOUT = 30
+
+
+class _StubLLM(BaseHTTPRequestHandler):
+    """
+    Відповідає на POST /chat/completions у форматі OpenAI: щоразу новий синонім, щоб запуски додавали рядки.
+    З'єднання лишаються відкритими (HTTP/1.1), як у справжнього API, тож клієнт повторно використовує їх зі свого пулу.
+    """
+    protocol_version = "HTTP/1.1"
+    counter = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.lock:
+            _StubLLM.counter += 1
+            number = _StubLLM.counter
+        content = json.dumps({"list_of_synonyms": [{"standard_name": STANDARD_NAME,
+                                                    "synonym": f"Синонім заглушки {number}"}]}, ensure_ascii=False)
+        body = json.dumps({
+            "id": f"stub-{number}", "object": "chat.completion", "created": int(time.time()), "model": "stub",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _wait_for_job(job_id: int) -> dict:
+    from medicalgrouplibrary.jobs import get_job, JOB_QUEUED, JOB_RUNNING
+
+    deadline = time.monotonic() + JOB_TIMEOUT
+    job = get_job(job_id)
+    while job["status"] in (JOB_QUEUED, JOB_RUNNING) and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = get_job(job_id)
+    return job
+
+
+def main() -> int:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubLLM)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "generation.db")
+        shutil.copy(SOURCE_DB, path)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        os.environ["LLM_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+        os.environ["LLM_CACHE_DIR"] = os.path.join(directory, "llm_cache")
+        os.environ["JOB_UPLOAD_DIR"] = os.path.join(directory, "uploads")
+        os.environ["API_KEY_MLAI"] = "benchmark"
+        sys.path.insert(0, ROOT)
+        os.chdir(ROOT)
+        from fastapi.testclient import TestClient
+        from main import app
+        from medicalgrouplibrary.data_creator import generate_synonyms
+        from medicalgrouplibrary.database import engine, read_engine
+        from medicalgrouplibrary.jobs import submit_job, JOB_SUCCEEDED
+
+        def run_sync(name):
+            try:
+                result = generate_synonyms(STANDARD_NAME, REQUEST_COUNT, fresh=True, max_retries=0)
+                results.append((name, not result["failed"], ", ".join(result["errors"]) or f"додано {len(result['added'])}"))
+            except Exception as e:
+                results.append((name, False, repr(e)))
+
+        def run_job(name):
+            job = _wait_for_job(submit_job("generate", {"standard_name": STANDARD_NAME, "request_count": REQUEST_COUNT,
+                                                        "fresh": True}))
+            result = job["result"] or {}
+            ok = job["status"] == JOB_SUCCEEDED and not result.get("failed")
+            results.append((name, ok, job["error"] or ", ".join(result.get("errors", []))
+                            or f"додано {len(result.get('added', []))}"))
+
+        with TestClient(app) as client:
+            run_sync("generate_synonyms #1")
+            run_sync("generate_synonyms #2")
+            run_job("задача generate #1")
+            response = client.post("/generate_synonyms", data={"standard_name": STANDARD_NAME,
+                                                               "request_count": REQUEST_COUNT, "fresh": "true"})
+            results.append(("маршрут /generate_synonyms", response.status_code == 200 and "Помилка" not in response.text,
+                            f"HTTP {response.status_code}"))
+            run_job("задача generate #2")
+        engine.dispose()
+        read_engine.dispose()
+    server.shutdown()
+
+    failures = 0
+    for name, ok, detail in results:
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':<5} {name}: {detail}")
+    print(f"Запитів до заглушки: {_StubLLM.counter}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Перевірка кількості SQL-запитів на маршрут: кількість не повинна залежати від кількості рядків на сторінці.
+
+На копії db/ukr-analysis.db створюється аналіз із ROWS синонімами, юнітами та конверсіями, після чого
+маршрути викликаються через TestClient у режимі DEBUG, а кількість запитів береться із заголовка
+X-Query-Count. Бібліотечні функції перевіряються через count_queries(). Код виходу 1, якщо хоч один
+шлях перевищує свій ліміт з MAX_QUERIES.
+
+Запуск з кореня репозиторію:
+    python benchmarks/query_counts.py --rows 500
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DB = os.path.join(ROOT, "db", "ukr-analysis.db")
+
+STANDARD_NAME = "Аналіз для перевірки кількості запитів"
+
+# Найбільша допустима кількість SQL-запитів для кожного шляху
+MAX_QUERIES = {
+    "/unification_names/": 1,
+    "/synonyms/{id}": 2,
+    "/units/{id}": 3,
+    "/conversions/{id}": 2,
+    "/calculator_result/{id}": 2,
+    "/api/standard_names": 1,
+    "/api/synonyms": 1,
+    "/api/conversions": 1,
+    "get_conversions_for_unit": 2,
+    "stream_synonyms_export": 1,
+}
+
+
+def _seed(rows: int) -> int:
+    """
+    Додає аналіз з rows синонімами, rows юнітами і rows конверсіями між ними, повертає його id.
+    """
+    from medicalgrouplibrary.database import SessionLocal, StandardName, AnalysisSynonym, Unit, UnitConversion
+
+    session = SessionLocal()
+    try:
+        standard_name = StandardName(name=STANDARD_NAME)
+        session.add(standard_name)
+        session.flush()
+        session.add_all(AnalysisSynonym(synonym=f"Синонім {i}", standard_name_id=standard_name.id)
+                        for i in range(rows))
+        units = [Unit(unit=f"од{i}/л", standard_name_id=standard_name.id, is_standard=i == 0) for i in range(rows)]
+        session.add_all(units)
+        session.flush()
+        session.add_all(UnitConversion(from_unit_id=units[0].id if i else units[1].id, to_unit_id=units[i].id,
+                                       formula=f"x * {i + 1}", standard_name_id=standard_name.id)
+                        for i in range(rows))
+        session.commit()
+        return standard_name.id
+    finally:
+        session.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500, help="Кількість синонімів, юнітів і конверсій аналізу")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "queries.db")
+        shutil.copy(SOURCE_DB, path)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        os.environ["DEBUG"] = "true"
+        os.environ.setdefault("API_KEY_MLAI", "benchmark")
+        sys.path.insert(0, ROOT)
+        os.chdir(ROOT)
+        from fastapi.testclient import TestClient
+        from main import app
+        from routes.metrics import QUERY_COUNT_HEADER
+        from medicalgrouplibrary.data_transfer import stream_synonyms_export
+        from medicalgrouplibrary.database import engine, read_engine
+        from medicalgrouplibrary.query_stats import count_queries
+        from medicalgrouplibrary.units import get_conversions_for_unit
+
+        standard_name_id = _seed(args.rows)
+        counts = {}
+        with TestClient(app) as client:
+            for route in MAX_QUERIES:
+                if not route.startswith("/"):
+                    continue
+                url = route.replace("{id}", str(standard_name_id))
+                response = client.get(url, params={"standard_name_id": standard_name_id}
+                                      if route in ("/api/synonyms", "/api/conversions") else None)
+                response.raise_for_status()
+                counts[route] = int(response.headers[QUERY_COUNT_HEADER])
+
+        with count_queries() as counter:
+            get_conversions_for_unit("од0/л")
+        counts["get_conversions_for_unit"] = counter.count
+        with count_queries() as counter:
+            for _chunk in stream_synonyms_export("jsonl", STANDARD_NAME):
+                pass
+        counts["stream_synonyms_export"] = counter.count
+        engine.dispose()
+        read_engine.dispose()
+
+    failures = 0
+    for route, limit in MAX_QUERIES.items():
+        failed = counts[route] > limit
+        failures += failed
+        print(f"{'FAIL' if failed else 'ok':<5} {route}: {counts[route]} запитів (ліміт {limit})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
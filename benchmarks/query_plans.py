@@ -0,0 +1,62 @@
+"""
+Перевірка планів гарячих запитів: після міграцій жоден із них не повинен сканувати таблицю повністю.
+
+Міграції застосовуються до тимчасової копії db/ukr-analysis.db, після чого для кожного запиту
+виводиться EXPLAIN QUERY PLAN. Код виходу 1, якщо хоч один запит виконує SCAN таблиці.
+
+Запуск з кореня репозиторію:
+    python benchmarks/query_plans.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DB = os.path.join(ROOT, "db", "ukr-analysis.db")
+
+# Запити, які фільтрують за неключовими колонками на гарячих шляхах
+HOT_QUERIES = {
+    "синонім без стандартного імені": (
+        "SELECT standard_name_id FROM analysis_synonyms WHERE synonym = :synonym", {"synonym": "HGB"}),
+    "стандартний юніт аналізу": (
+        "SELECT * FROM units WHERE standard_name_id = :id AND is_standard = 1", {"id": 1}),
+    "юніт за назвою": (
+        "SELECT * FROM units WHERE unit = :unit", {"unit": "г/л"}),
+    "конверсії аналізу": (
+        "SELECT * FROM unit_conversions WHERE standard_name_id = :id", {"id": 1}),
+    "сторінка стандартних імен за префіксом": (
+        "SELECT id, name FROM standard_names WHERE sort_key >= :key AND sort_key < :key || char(1114111) "
+        "AND (sort_key > :last_key OR (sort_key = :last_key AND id > :last_id)) ORDER BY sort_key, id LIMIT 101",
+        {"key": "г", "last_key": "г", "last_id": 0}),
+}
+
+
+def _is_table_scan(detail: str) -> bool:
+    # "SCAN units" - повний прохід таблиці; "SCAN ... USING COVERING INDEX" - прохід індексу
+    return detail.startswith("SCAN") and "INDEX" not in detail
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "plans.db")
+        shutil.copy(SOURCE_DB, path)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        sys.path.insert(0, ROOT)
+        from sqlalchemy import text
+        from medicalgrouplibrary.database import engine, init_db
+
+        init_db()
+        failures = 0
+        with engine.connect() as connection:
+            for title, (query, params) in HOT_QUERIES.items():
+                plan = [row[3] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {query}"), params)]
+                scans = [detail for detail in plan if _is_table_scan(detail)]
+                failures += bool(scans)
+                print(f"{'SCAN' if scans else 'ok':<5} {title}: {'; '.join(plan)}")
+        engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Навантажувальний тест маршрутів: затримки швидких запитів окремо і поки виконується один повільний запит.
+
+Сервер (uvicorn з main:app) запускається в окремому процесі на копії бази. Клієнти в потоках
+безперервно запитують сторінку з базою (/units) і API кандидатів; у другій фазі паралельно
+з ними виконуються повільні пакетні уніфікації. Якщо обробники не блокують цикл подій, p99
+швидких запитів у другій фазі лишається близьким до першої.
+
+Запуск з кореня репозиторію:
+    python benchmarks/route_latency.py --clients 8 --duration 5
+"""
+import argparse
+import os
+import random
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DB = os.path.join(ROOT, "db", "ukr-analysis.db")
+
+FAST_PATHS = ("/units", "/api/unify/candidates?text=%D0%93%D0%B5%D0%BC%D0%BE%D0%B3%D0%BB%D0%BE%D0%B1%D1%96%D0%BD&k=5")
+
+
+def _percentile(values: list, percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _request(url: str, data: bytes = None):
+    headers = {"Content-Type": "application/json"} if data else {}
+    with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers), timeout=300) as response:
+        response.read()
+
+
+def _wait_for_server(base_url: str, process, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Сервер завершився під час запуску.")
+        try:
+            _request(f"{base_url}/api/unify/stats")
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Сервер не запустився вчасно.")
+
+
+def _fast_client(base_url: str, deadline: float, latencies: list):
+    number = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        _request(base_url + FAST_PATHS[number % len(FAST_PATHS)])
+        latencies.append(time.perf_counter() - started)
+        number += 1
+
+
+def _slow_client(base_url: str, deadline: float, batch_size: int, durations: list):
+    rng = random.Random(0)
+    while time.perf_counter() < deadline:
+        names = ["".join(rng.choices(string.ascii_lowercase + "абвгдеєжзикл ", k=12)) for _ in range(batch_size)]
+        body = ('{"threshold": 0, "names": [%s]}' % ", ".join(f'"{name}"' for name in names)).encode("utf-8")
+        started = time.perf_counter()
+        _request(f"{base_url}/api/unify/batch", body)
+        durations.append(time.perf_counter() - started)
+
+
+def _phase(base_url: str, clients: int, duration: float, slow_batch_size: int = 0) -> dict:
+    latencies, slow_durations = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=_fast_client, args=(base_url, deadline, latencies)) for _ in range(clients)]
+    if slow_batch_size:
+        threads.append(threading.Thread(target=_slow_client, args=(base_url, deadline, slow_batch_size, slow_durations)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+        "slow_requests": len(slow_durations),
+        "slow_avg_ms": round(sum(slow_durations) / len(slow_durations) * 1000, 1) if slow_durations else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8, help="Кількість клієнтів зі швидкими запитами.")
+    parser.add_argument("--duration", type=float, default=5.0, help="Тривалість кожної фази, с.")
+    parser.add_argument("--slow-batch-size", type=int, default=10000, help="Назв у повільному пакетному запиті.")
+    parser.add_argument("--port", type=int, default=9123)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.db")
+        shutil.copy(SOURCE_DB, path)
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+        env.setdefault("API_KEY_MLAI", "benchmark")  # Клієнт LLM створюється при імпорті, запити до нього не йдуть
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=ROOT, env=env,
+        )
+        try:
+            _wait_for_server(base_url, server)
+            _phase(base_url, args.clients, 1.0)  # Прогрів індексів і пулів з'єднань
+            results = {
+                "fast_only": _phase(base_url, args.clients, args.duration),
+                "with_slow": _phase(base_url, args.clients, args.duration, args.slow_batch_size),
+            }
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'фаза':<10} {'запитів':>8} {'p50, мс':>9} {'p99, мс':>9} {'max, мс':>9} {'повільних':>10} {'повільний, мс':>14}")
+    for phase, row in results.items():
+        print(f"{phase:<10} {row['requests']:>8} {row['p50_ms']:>9} {row['p99_ms']:>9} {row['max_ms']:>9} "
+              f"{row['slow_requests']:>10} {row['slow_avg_ms']:>14}")
+    fast, slow = results["fast_only"]["p99_ms"], results["with_slow"]["p99_ms"]
+    print(f"p99 швидких запитів: {fast} мс без повільних, {slow} мс з повільними "
+          f"(у {slow / fast if fast else 0:.1f} раза більше)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Бенчмарк конкурентного доступу до SQLite: пропускна здатність читачів окремо і під час масового імпорту.
+
+Читач - процес, що в циклі шукає наявний синонім за індексом (вартість запиту не залежить від розміру таблиці),
+імпорт - окремий процес, що безперервно додає синоніми пакетами.
+
+Для кожного режиму журналу (WAL і DELETE) копія бази запускається в окремому процесі
+з відповідними DATABASE_URL і SQLITE_JOURNAL_MODE, бо налаштування рушія читаються при імпорті.
+
+Запуск з кореня репозиторію:
+    python benchmarks/sqlite_concurrency.py --readers 4 --duration 5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DB = os.path.join(ROOT, "db", "ukr-analysis.db")
+
+
+def _percentile(values: list, percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _reader(number: int, duration: float, results):
+    sys.path.insert(0, ROOT)
+    from medicalgrouplibrary.database import ReadSessionLocal, AnalysisSynonym
+
+    latencies = []
+    errors = 0
+    session = ReadSessionLocal()
+    # Читання з фіксованою вартістю: пошук наявного синоніму за індексом. Вартість не залежить від кількості
+    # рядків, доданих імпортом, тож різниця між фазами показує саме очікування на блокування
+    synonyms = [synonym for synonym, in
+                session.query(AnalysisSynonym.synonym).order_by(AnalysisSynonym.id).limit(100)]
+    session.rollback()
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            synonym = synonyms[(number + len(latencies)) % len(synonyms)]
+            started = time.perf_counter()
+            try:
+                session.query(AnalysisSynonym.standard_name_id).filter_by(synonym=synonym).first()
+                session.rollback()  # Завершуємо транзакцію читання, щоб бачити нові записи
+            except Exception:
+                session.rollback()
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+    finally:
+        session.close()
+    results.put((latencies, errors))
+
+
+def _bulk_import(stop, batch_size: int, results):
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import insert
+    from medicalgrouplibrary.database import SessionLocal, AnalysisSynonym
+
+    rows = 0
+    errors = 0
+    session = SessionLocal()
+    try:
+        while not stop.is_set():
+            batch = [{"standard_name_id": 1, "synonym": f"benchmark synonym {rows + i}"} for i in range(batch_size)]
+            try:
+                session.execute(insert(AnalysisSynonym), batch)
+                session.commit()
+                rows += batch_size
+            except Exception:
+                session.rollback()
+                errors += 1
+    finally:
+        session.close()
+    results.put({"rows": rows, "errors": errors})
+
+
+def _run_readers(context, readers: int, duration: float) -> dict:
+    results = context.Queue()
+    processes = [context.Process(target=_reader, args=(number, duration, results)) for number in range(readers)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for own_latencies, _ in collected for latency in own_latencies]
+    return {
+        "reads": len(latencies),
+        "reads_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+        "errors": sum(errors for _, errors in collected),
+    }
+
+
+def child(args) -> dict:
+    sys.path.insert(0, ROOT)
+    from medicalgrouplibrary.database import engine
+
+    with engine.connect() as connection:  # Застосовує режим журналу до файлу бази
+        journal_mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+    engine.dispose()
+
+    # Читачі й імпорт - окремі процеси, як кілька воркерів uvicorn
+    context = multiprocessing.get_context("spawn")
+    idle = _run_readers(context, args.readers, args.duration)
+
+    stop = context.Event()
+    writer_results = context.Queue()
+    writer = context.Process(target=_bulk_import, args=(stop, args.batch_size, writer_results))
+    writer.start()
+    busy = _run_readers(context, args.readers, args.duration)
+    stop.set()
+    writer_result = writer_results.get()
+    writer.join()
+
+    return {"journal_mode": journal_mode, "readers_only": idle, "during_import": busy, "import": writer_result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4, help="Кількість процесів-читачів.")
+    parser.add_argument("--duration", type=float, default=5.0, help="Тривалість кожної фази, с.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Рядків в одній транзакції імпорту.")
+    parser.add_argument("--modes", default="WAL,DELETE", help="Режими журналу через кому.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args)))
+        return
+
+    results = []
+    for mode in args.modes.split(","):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.db")
+            shutil.copy(SOURCE_DB, path)
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", SQLITE_JOURNAL_MODE=mode)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", "--readers", str(args.readers),
+                 "--duration", str(args.duration), "--batch-size", str(args.batch_size)],
+                env=env, cwd=ROOT, capture_output=True, text=True, check=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'режим':<8} {'фаза':<14} {'читань/с':>10} {'p50, мс':>9} {'p99, мс':>9} {'max, мс':>9} {'помилки':>8}")
+    for result in results:
+        for phase in ("readers_only", "during_import"):
+            row = result[phase]
+            print(f"{result['journal_mode']:<8} {phase:<14} {row['reads_per_second']:>10} {row['p50_ms']:>9} "
+                  f"{row['p99_ms']:>9} {row['max_ms']:>9} {row['errors']:>8}")
+        print(f"{result['journal_mode']:<8} {'import':<14} рядків: {result['import']['rows']}, "
+              f"помилок: {result['import']['errors']}")
+
+
+if __name__ == "__main__":
+    main()
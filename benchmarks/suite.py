@@ -0,0 +1,532 @@
+"""
+Відтворюваний набір бенчмарків: уніфікація, конверсії, імпорт і експорт на синтетичних словниках різного розміру.
+
+Для кожного розміру (кількість синонімів) генерується словник із реалістичними українськими й латинськими
+назвами аналізів, абревіатурами та опечатками, запити до уніфікатора (точні збіги, інший регістр і пробіли,
+опечатки, відсутні назви) і графи конверсій різної глибини. Генерація залежить лише від --seed, тож прогони
+на різних комітах порівнювані. Кожна операція виконується в окремому процесі, щоб пікова пам'ять (RSS)
+відносилася лише до неї, а кеші не переходили між операціями; кеш результатів уніфікації вимкнено.
+
+Результат - JSON з пропускною здатністю, p50/p99 затримки і піковою пам'яттю для кожної пари
+(розмір, операція). Для import і export p50/p99 не вказуються: вони виконуються кількома великими
+пакетами (IMPORT_BATCH_SIZE, EXPORT_FETCH_SIZE рядків), тож на малих словниках перцентилі дорівнювали б
+загальному часу; для них порівнюється лише пропускна здатність. З --compare результати порівнюються
+з попереднім прогоном; код виходу 1, якщо пропускна здатність якоїсь операції впала більше ніж на --tolerance.
+
+Запуск з кореня репозиторію:
+    python benchmarks/suite.py --sizes 1000,10000 --output before.json
+    python benchmarks/suite.py --sizes 1000,10000 --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+# Середня кількість синонімів на одне стандартне ім'я
+SYNONYMS_PER_NAME = 10
+# Кількість стандартних імен з графами конверсій і максимальна глибина графа (довжина ланцюжка конверсій)
+GRAPH_COUNT = 200
+MAX_GRAPH_DEPTH = 8
+
+OPERATIONS = ("unify_single", "unify_batch", "convert_to_standard_unit", "calculate_conversion", "import", "export")
+
+# (українська назва, латинська назва, абревіатура)
+ROOTS = [
+    ("Гемоглобін", "Hemoglobin", "HGB"),
+    ("Глюкоза", "Glucose", "GLU"),
+    ("Креатинін", "Creatinine", "CREA"),
+    ("Білірубін", "Bilirubin", "BIL"),
+    ("Холестерин", "Cholesterol", "CHOL"),
+    ("Тригліцериди", "Triglycerides", "TG"),
+    ("Альбумін", "Albumin", "ALB"),
+    ("Феритин", "Ferritin", "FERR"),
+    ("Тиреотропний гормон", "Thyroid stimulating hormone", "TSH"),
+    ("Тироксин", "Thyroxine", "T4"),
+    ("Кальцій", "Calcium", "CA"),
+    ("Калій", "Potassium", "K"),
+    ("Натрій", "Sodium", "NA"),
+    ("Магній", "Magnesium", "MG"),
+    ("Залізо", "Iron", "FE"),
+    ("Лейкоцити", "Leukocytes", "WBC"),
+    ("Еритроцити", "Erythrocytes", "RBC"),
+    ("Тромбоцити", "Platelets", "PLT"),
+    ("Сечовина", "Urea", "UREA"),
+    ("Сечова кислота", "Uric acid", "UA"),
+    ("Лактатдегідрогеназа", "Lactate dehydrogenase", "LDH"),
+    ("Аланінамінотрансфераза", "Alanine aminotransferase", "ALT"),
+    ("Аспартатамінотрансфераза", "Aspartate aminotransferase", "AST"),
+    ("Лужна фосфатаза", "Alkaline phosphatase", "ALP"),
+    ("Амілаза", "Amylase", "AMY"),
+    ("Ліпаза", "Lipase", "LIP"),
+    ("Загальний білок", "Total protein", "TP"),
+    ("С-реактивний білок", "C-reactive protein", "CRP"),
+    ("Імуноглобулін E", "Immunoglobulin E", "IGE"),
+    ("Вітамін D", "Vitamin D", "VITD"),
+    ("Вітамін B12", "Vitamin B12", "B12"),
+    ("Фолієва кислота", "Folic acid", "FOL"),
+    ("Кортизол", "Cortisol", "CORT"),
+    ("Пролактин", "Prolactin", "PRL"),
+    ("Інсулін", "Insulin", "INS"),
+    ("Глікований гемоглобін", "Glycated hemoglobin", "HBA1C"),
+    ("Фібриноген", "Fibrinogen", "FIB"),
+    ("Протромбіновий час", "Prothrombin time", "PT"),
+    ("Д-димер", "D-dimer", "DDIM"),
+    ("Гамма-глутамілтрансфераза", "Gamma-glutamyl transferase", "GGT"),
+]
+QUALIFIERS = [
+    ("загальний", "total"), ("вільний", "free"), ("прямий", "direct"), ("непрямий", "indirect"),
+    ("базальний", "basal"), ("після навантаження", "post-load"), ("натще", "fasting"), ("добовий", "24h"),
+    ("експрес-тест", "rapid"), ("кількісний", "quantitative"),
+]
+MATERIALS = [
+    ("сироватка", "serum"), ("плазма", "plasma"), ("цільна кров", "whole blood"), ("сеча", "urine"),
+    ("капілярна кров", "capillary blood"), ("ліквор", "CSF"),
+]
+UNIT_NAMES = ["г/л", "г/дл", "мг/дл", "мг/л", "мкг/л", "нг/мл", "ммоль/л", "мкмоль/л", "нмоль/л", "пмоль/л"]
+# Формули ребер графа конверсій (усі афінні, тож мають обернені)
+FORMULAS = ["x * 10", "x / 100", "x * 0.0555", "x * 1000", "x / 18", "x * 1.8 + 32", "x / 1000", "x * 88.4"]
+
+CYRILLIC_LETTERS = "абвгґдеєжзиіїйклмнопрстуфхцчшщьюя"
+LATIN_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+# --- Генерація даних (лише стандартна бібліотека, щоб дані не залежали від коду репозиторію) ---
+
+def standard_name_parts(i: int) -> tuple:
+    roots, qualifiers, materials = len(ROOTS), len(QUALIFIERS), len(MATERIALS)
+    uk, lat, abbr = ROOTS[i % roots]
+    qualifier_uk, qualifier_lat = QUALIFIERS[(i // roots) % qualifiers]
+    material_uk, material_lat = MATERIALS[(i // (roots * qualifiers)) % materials]
+    # Після вичерпання комбінацій назви розрізняються номером панелі, як у реальних каталогах лабораторій
+    panel = i // (roots * qualifiers * materials)
+    suffix = f"-{panel}" if panel else ""
+    name = f"{uk} {qualifier_uk}, {material_uk} ({abbr}{suffix})"
+    return name, uk, lat, abbr, qualifier_uk, qualifier_lat, material_uk, material_lat, suffix
+
+
+def typo(rng: random.Random, text: str, edits: int = 1) -> str:
+    """
+    Вносить edits випадкових опечаток: пропуск, перестановка сусідніх, заміна або подвоєння символу.
+    """
+    for _ in range(edits):
+        if len(text) < 3:
+            break
+        position = rng.randrange(len(text) - 1)
+        kind = rng.randrange(4)
+        if kind == 0:
+            text = text[:position] + text[position + 1:]
+        elif kind == 1:
+            text = text[:position] + text[position + 1] + text[position] + text[position + 2:]
+        elif kind == 2:
+            letters = CYRILLIC_LETTERS if text[position].lower() in CYRILLIC_LETTERS else LATIN_LETTERS
+            text = text[:position] + rng.choice(letters) + text[position + 1:]
+        else:
+            text = text[:position] + text[position] + text[position:]
+    return text
+
+
+def synonym_variants(rng: random.Random, i: int, count: int) -> list:
+    """
+    Повертає count різних синонімів стандартного імені i: латинські назви, абревіатури, назви іншим
+    регістром і варіанти з опечатками.
+    """
+    name, uk, lat, abbr, qualifier_uk, qualifier_lat, material_uk, material_lat, suffix = standard_name_parts(i)
+    templates = [
+        f"{lat} {qualifier_lat} ({material_lat}){suffix}",
+        f"{abbr}{suffix} {qualifier_lat}, {material_lat}",
+        f"{uk} {qualifier_uk} {material_uk}{suffix}".lower(),
+        f"{uk} ({abbr}{suffix}), {material_uk}, {qualifier_uk}",
+        f"{lat}, {material_lat}, {qualifier_lat}{suffix}",
+        f"{abbr}{suffix} {material_uk} {qualifier_uk}",
+        f"{qualifier_lat} {lat.lower()} {material_lat}{suffix}",
+        f"{abbr}{suffix} ({material_lat}, {qualifier_lat})".upper(),
+    ]
+    variants = []
+    seen = {name}
+    attempts = 0
+    while len(variants) < count and attempts < count * 20:
+        attempts += 1
+        base = templates[len(variants) % len(templates)]
+        variant = base if len(variants) < len(templates) else typo(rng, rng.choice(templates), rng.randint(1, 2))
+        if variant not in seen:
+            seen.add(variant)
+            variants.append(variant)
+    return variants
+
+
+def generate_dataset(directory: str, size: int, queries: int, seed: int) -> dict:
+    """
+    Записує в directory синоніми (synonyms.jsonl), запити до уніфікатора (queries.json) і графи конверсій
+    (graphs.json). Уся випадковість - з random.Random(seed), тому дані однакові на всіх комітах.
+    """
+    rng = random.Random(seed)
+    names = max(1, size // SYNONYMS_PER_NAME)
+    # Позиції синонімів, з яких будуються запити (щоб не тримати в пам'яті весь словник)
+    sampled = set(rng.sample(range(size), min(size, queries)))
+    samples = []
+    position = 0
+    with open(os.path.join(directory, "synonyms.jsonl"), "w", encoding="utf-8") as target:
+        for i in range(names):
+            count = size // names + (1 if i < size % names else 0)
+            name = standard_name_parts(i)[0]
+            for synonym in synonym_variants(rng, i, count):
+                target.write(json.dumps({"standard_name": name, "synonym": synonym}, ensure_ascii=False) + "\n")
+                if position in sampled:
+                    samples.append((name, synonym))
+                position += 1
+
+    query_list = []
+    for _ in range(queries):
+        name, synonym = rng.choice(samples)
+        kind = rng.random()
+        if kind < 0.40:
+            query = synonym  # точний збіг синоніма
+        elif kind < 0.55:
+            query = name  # точний збіг стандартного імені
+        elif kind < 0.70:
+            query = "  ".join(synonym.upper().split())  # інший регістр і пробіли
+        elif kind < 0.90:
+            query = typo(rng, synonym, rng.randint(1, 2))  # опечатки
+        else:
+            query = "".join(rng.choice(CYRILLIC_LETTERS + LATIN_LETTERS + " ") for _ in range(rng.randint(4, 24)))
+        query_list.append(query)
+    with open(os.path.join(directory, "queries.json"), "w", encoding="utf-8") as target:
+        json.dump(query_list, target, ensure_ascii=False)
+
+    graphs = []
+    for g in range(min(GRAPH_COUNT, names)):
+        depth = 1 + g % MAX_GRAPH_DEPTH
+        units = [UNIT_NAMES[(g + k) % len(UNIT_NAMES)] for k in range(depth + 1)]
+        # Ланцюжок units[k] -> units[k - 1]; units[0] - стандартна одиниця
+        conversions = [(units[k], units[k - 1], FORMULAS[(g + k) % len(FORMULAS)]) for k in range(1, depth + 1)]
+        graphs.append({"standard_name": standard_name_parts(g)[0], "units": units, "conversions": conversions})
+    with open(os.path.join(directory, "graphs.json"), "w", encoding="utf-8") as target:
+        json.dump(graphs, target, ensure_ascii=False)
+
+    return {"standard_names": names, "synonyms": position, "queries": len(query_list), "graphs": len(graphs)}
+
+
+# --- Вимірювання (виконується в окремому процесі для кожної операції) ---
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux повертає кілобайти, macOS - байти
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentile(values: list, percent: float) -> float:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _summary(items: int, seconds: float, latencies_ns: list) -> dict:
+    return {
+        "items": items,
+        "calls": len(latencies_ns),
+        "seconds": round(seconds, 4),
+        "throughput_per_second": round(items / seconds, 1) if seconds else None,
+        "p50_ms": round(_percentile(latencies_ns, 50) / 1e6, 4) if latencies_ns else None,
+        "p99_ms": round(_percentile(latencies_ns, 99) / 1e6, 4) if latencies_ns else None,
+    }
+
+
+def _timed_calls(calls) -> tuple:
+    """
+    Викликає кожну функцію без аргументів і повертає (загальний час, затримки в нс).
+    """
+    latencies = []
+    started = time.perf_counter()
+    for call in calls:
+        call_started = time.perf_counter_ns()
+        call()
+        latencies.append(time.perf_counter_ns() - call_started)
+    return time.perf_counter() - started, latencies
+
+
+def _load(directory: str, name: str):
+    with open(os.path.join(directory, name), encoding="utf-8") as source:
+        return json.load(source)
+
+
+def _graph_unit_ids(directory: str) -> list:
+    """
+    Повертає для кожного графа (standard_name_id, {назва одиниці: id}).
+    """
+    from medicalgrouplibrary.database import ReadSessionLocal, StandardName, Unit
+
+    session = ReadSessionLocal()
+    try:
+        result = []
+        for graph in _load(directory, "graphs.json"):
+            standard_name_id = session.query(StandardName.id).filter_by(name=graph["standard_name"]).scalar()
+            units = dict(session.query(Unit.unit, Unit.id).filter_by(standard_name_id=standard_name_id))
+            result.append((standard_name_id, units))
+        return result
+    finally:
+        session.close()
+
+
+def build_database(directory: str) -> dict:
+    """
+    Створює базу словника: синоніми через import_synonym_records, юніти й конверсії графів.
+    """
+    from medicalgrouplibrary.database import init_db, SessionLocal, StandardName, Unit, UnitConversion
+    from medicalgrouplibrary.data_transfer import import_synonym_records, read_synonym_records
+
+    init_db()
+    with open(os.path.join(directory, "synonyms.jsonl"), encoding="utf-8") as stream:
+        report = import_synonym_records(read_synonym_records(stream, "jsonl"))
+
+    session = SessionLocal()
+    try:
+        for graph in _load(directory, "graphs.json"):
+            standard_name_id = session.query(StandardName.id).filter_by(name=graph["standard_name"]).scalar()
+            units = {name: Unit(unit=name, standard_name_id=standard_name_id, is_standard=k == 0)
+                     for k, name in enumerate(graph["units"])}
+            session.add_all(units.values())
+            session.flush()
+            session.add_all(UnitConversion(from_unit_id=units[from_unit].id, to_unit_id=units[to_unit].id,
+                                           formula=formula, standard_name_id=standard_name_id)
+                            for from_unit, to_unit, formula in graph["conversions"])
+        session.commit()
+    finally:
+        session.close()
+    return {"rows": report["rows"], "inserted": report["inserted"]}
+
+
+def run_operation(operation: str, directory: str, seed: int, batch_size: int) -> dict:
+    """
+    Виконує одну операцію над готовою базою і повертає її вимірювання.
+    """
+    rng = random.Random(seed)
+    queries = _load(directory, "queries.json")
+    setup_started = time.perf_counter()
+    extra = {}
+
+    if operation == "unify_single":
+        from medicalgrouplibrary.unificator import get_unification_name, get_synonym_index
+
+        get_synonym_index().warm_up()
+        setup_seconds = time.perf_counter() - setup_started
+        setup_rss = _peak_rss_mb()
+        seconds, latencies = _timed_calls(lambda q=query: get_unification_name(q) for query in queries)
+        items = len(queries)
+
+    elif operation == "unify_batch":
+        from medicalgrouplibrary.unificator import get_unification_names, get_synonym_index
+
+        get_synonym_index().warm_up()
+        setup_seconds = time.perf_counter() - setup_started
+        setup_rss = _peak_rss_mb()
+        batches = [queries[start:start + batch_size] for start in range(0, len(queries), batch_size)]
+        seconds, latencies = _timed_calls(lambda b=batch: get_unification_names(b) for batch in batches)
+        items = len(queries)
+        extra["batch_size"] = batch_size
+
+    elif operation in ("convert_to_standard_unit", "calculate_conversion"):
+        from medicalgrouplibrary.units import convert_to_standard_unit, calculate_conversion, get_conversion_tables
+
+        graphs = _graph_unit_ids(directory)
+        # Таблиці конверсій будуються один раз і кешуються; вимірюється робота з уже завантаженими таблицями
+        get_conversion_tables([standard_name_id for standard_name_id, _ in graphs])
+        setup_seconds = time.perf_counter() - setup_started
+        setup_rss = _peak_rss_mb()
+        calls = []
+        for _ in range(len(queries)):
+            standard_name_id, units = rng.choice(graphs)
+            value = rng.uniform(0.1, 1000.0)
+            if operation == "convert_to_standard_unit":
+                from_unit_id = rng.choice(list(units.values()))
+                calls.append(lambda v=value, u=from_unit_id, s=standard_name_id: convert_to_standard_unit(v, u, s))
+            else:
+                from_unit, to_unit = rng.choice(list(units)), rng.choice(list(units))
+                if rng.random() < 0.2:
+                    from_unit = f" {from_unit.upper()} "  # написання, яке знаходить лише нормалізація
+                calls.append(lambda v=value, f=from_unit, t=to_unit, s=standard_name_id:
+                             calculate_conversion(v, f, t, s))
+        seconds, latencies = _timed_calls(calls)
+        items = len(calls)
+        extra["graphs"] = len(graphs)
+
+    elif operation == "import":
+        # Імпорт у порожню базу (DATABASE_URL цього процесу вказує на окремий файл)
+        from medicalgrouplibrary.database import init_db
+        from medicalgrouplibrary.data_transfer import import_synonym_records, read_synonym_records, \
+            IMPORT_BATCH_SIZE
+
+        init_db()
+        setup_seconds = time.perf_counter() - setup_started
+        setup_rss = _peak_rss_mb()
+        latencies = []  # Без p50/p99: див. опис модуля
+        started = time.perf_counter()
+        with open(os.path.join(directory, "synonyms.jsonl"), encoding="utf-8") as stream:
+            report = import_synonym_records(read_synonym_records(stream, "jsonl"))
+        seconds = time.perf_counter() - started
+        items = report["rows"]
+        extra.update(batch_size=IMPORT_BATCH_SIZE, inserted=report["inserted"])
+
+    elif operation == "export":
+        from medicalgrouplibrary.data_transfer import stream_synonyms_export
+
+        setup_seconds = 0.0
+        setup_rss = _peak_rss_mb()
+        latencies = []  # Без p50/p99: див. опис модуля
+        size_bytes = rows = 0
+        started = time.perf_counter()
+        for chunk in stream_synonyms_export("jsonl"):
+            size_bytes += len(chunk)
+            rows += chunk.count(b"\n") if isinstance(chunk, bytes) else chunk.count("\n")
+        seconds = time.perf_counter() - started
+        items = rows
+        extra["bytes"] = size_bytes
+
+    else:
+        raise ValueError(f"Невідома операція: {operation}.")
+
+    result = {"operation": operation, **_summary(items, seconds, latencies)}
+    result.update(setup_seconds=round(setup_seconds, 4), setup_peak_rss_mb=setup_rss, peak_rss_mb=_peak_rss_mb(),
+                  **extra)
+    return result
+
+
+def _run_worker(arguments: list, database: str) -> dict:
+    """
+    Запускає цей скрипт в окремому процесі з базою database і повертає JSON з останнього рядка виводу.
+    """
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}", UNIFICATION_CACHE_SIZE="0")
+    env.setdefault("API_KEY_MLAI", "benchmark")
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), *arguments], cwd=ROOT, env=env,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Процес {' '.join(arguments)} завершився з помилкою:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# --- Порівняння з попереднім прогоном ---
+
+def compare(results: list, baseline: dict, tolerance: float) -> int:
+    """
+    Друкує зміну пропускної здатності і p99 відносно baseline і повертає кількість регресій.
+    """
+    previous = {(item["size"], item["operation"]): item for item in baseline["results"]}
+    regressions = 0
+    print(f"\nПорівняння з {baseline['meta'].get('commit')}:", file=sys.stderr)
+    for item in results:
+        old = previous.get((item["size"], item["operation"]))
+        if not old or not old["throughput_per_second"] or not item["throughput_per_second"]:
+            continue
+        change = item["throughput_per_second"] / old["throughput_per_second"] - 1
+        regressed = change < -tolerance
+        regressions += regressed
+        p99 = (f"p99 {old['p99_ms']:.3f} -> {item['p99_ms']:.3f} мс"
+               if old.get("p99_ms") is not None and item.get("p99_ms") is not None else "")
+        print(f"{'РЕГРЕСІЯ' if regressed else 'ok':<9} {item['operation']:<25} {item['size']:>8}: "
+              f"пропускна здатність {change:+.1%} {p99}", file=sys.stderr)
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Розміри словників (кількість синонімів) через кому")
+    parser.add_argument("--operations", default=",".join(OPERATIONS), help="Операції через кому")
+    parser.add_argument("--queries", type=int, default=2000, help="Кількість запитів для кожної операції")
+    parser.add_argument("--batch-size", type=int, default=100, help="Розмір пакета для unify_batch")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора даних")
+    parser.add_argument("--output", help="Файл для JSON-результатів (за замовчуванням - стандартний вивід)")
+    parser.add_argument("--compare", help="JSON попереднього прогону для порівняння")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Допустиме падіння пропускної здатності")
+    # Внутрішні параметри процесів-обробників
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, ROOT)
+        if args.worker == "build":
+            result = build_database(args.directory)
+        else:
+            result = run_operation(args.worker, args.directory, args.seed, args.batch_size)
+        print(json.dumps(result, ensure_ascii=False))
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    operations = [operation for operation in args.operations.split(",") if operation]
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"Невідомі операції: {', '.join(sorted(unknown))}. Доступні: {', '.join(OPERATIONS)}.")
+
+    results = []
+    datasets = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix=f"suite-{size}-") as directory:
+            started = time.perf_counter()
+            datasets[size] = generate_dataset(directory, size, args.queries, args.seed)
+            database = os.path.join(directory, "dictionary.db")
+            worker = ["--directory", directory, "--seed", str(args.seed), "--batch-size", str(args.batch_size)]
+            _run_worker(["--worker", "build", *worker], database)
+            datasets[size]["prepare_seconds"] = round(time.perf_counter() - started, 2)
+            print(f"Словник {size}: {datasets[size]}", file=sys.stderr)
+
+            for operation in operations:
+                target = os.path.join(directory, "import.db") if operation == "import" else database
+                result = {"size": size, **_run_worker(["--worker", operation, *worker], target)}
+                results.append(result)
+                latency = (f"p50 {result['p50_ms']} мс  p99 {result['p99_ms']} мс  "
+                           if result["p99_ms"] is not None else "")
+                print(f"  {operation:<25} {result['throughput_per_second']:>12} /с  {latency}"
+                      f"пам'ять {result['peak_rss_mb']} МБ", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "queries": args.queries,
+            "batch_size": args.batch_size,
+            "datasets": {str(size): dataset for size, dataset in datasets.items()},
+        },
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as target:
+            target.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as source:
+            return 1 if compare(results, json.load(source), args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Перевірка зіставлення рядків одиниць з одиницями аналізу (ConversionTable.resolve_unit).
+
+Одиниці, що відрізняються лише префіксом SI чи степенем ("моль/л" і "ммоль/л", "IU/mL" і "mIU/mL"),
+відрізняються в 10-1000 разів, тому нечітке зіставлення не повинно підставляти одну замість іншої:
+такий рядок має лишатися невідомою одиницею. Варіанти написання тієї самої одиниці (кирилиця,
+регістр, пробіли, опечатки) мають зіставлятися. Таблиця будується в пам'яті, база не потрібна.
+Код виходу 1, якщо хоч один випадок зіставлено неправильно.
+
+Запуск з кореня репозиторію:
+    python benchmarks/unit_resolution.py
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (одиниці аналізу, вхідний рядок, очікувана одиниця або None - невідома одиниця)
+CASES = [
+    (["ммоль/л", "мг/дл"], "моль/л", None),
+    (["mmol/L", "umol/L"], "mol/L", None),
+    (["mIU/mL"], "IU/mL", None),
+    (["мМО/мл"], "МО/мл", None),
+    (["IU/mL"], "mIU/mL", None),
+    (["mg/dL"], "mg/L", None),
+    (["г/л"], "г/дл", None),
+    (["Од/л"], "мОд/л", None),
+    (["10^9/л"], "10^6/л", None),
+    (["mIU/mL"], "мМО/мл", "mIU/mL"),
+    (["mIU/mL"], "мМЕ/мл", "mIU/mL"),
+    (["uIU/mL"], "мкМО/мл", "uIU/mL"),
+    (["ммоль/л"], "mmol/L", "ммоль/л"),
+    (["мкмоль/л"], "µmol/l", "мкмоль/л"),
+    (["mmol/L"], "mmol/ L", "mmol/L"),
+    (["нмоль/л"], "nmol/ll", "нмоль/л"),
+    (["мг/дл"], "мг/100мл", "мг/дл"),
+]
+
+
+def _table(units: list):
+    from medicalgrouplibrary.normalization import normalize_unit
+    from medicalgrouplibrary.units import ConversionTable
+
+    table = ConversionTable(0)
+    for unit_id, unit in enumerate(units, start=1):
+        table.units[unit_id] = unit
+        table.unit_ids.setdefault(unit, unit_id)
+        table.unit_aliases.setdefault(normalize_unit(unit), unit_id)
+    return table
+
+
+def main() -> int:
+    os.environ.setdefault("API_KEY_MLAI", "benchmark")
+    sys.path.insert(0, ROOT)
+
+    failures = 0
+    for units, text, expected in CASES:
+        table = _table(units)
+        unit_id = table.resolve_unit(text)
+        resolved = table.units.get(unit_id)
+        failed = resolved != expected
+        failures += failed
+        print(f"{'FAIL' if failed else 'ok':<5} {text!r} серед {units}: {resolved!r} (очікувалось {expected!r})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
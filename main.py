@@ -1,18 +1,41 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from routes.synonyms import router as synonyms_router
 from routes.data_transfer import router as data_transfer_router
 from routes.generator import router as generator
 from medicalgrouplibrary.database import init_db
+from medicalgrouplibrary.executor import limit_route_threads
+from medicalgrouplibrary.jobs import fail_interrupted_jobs
 from routes.test_unificator import router as unificator_router
 from routes.units import router as units_router
+from routes.api import router as api_router
+from routes.jobs import router as jobs_router
+from routes.metrics import router as metrics_router, MetricsMiddleware
+
+# Режим налагодження: кожна відповідь містить кількість і час SQL-запитів, виконаних для неї
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Синхронні обробники маршрутів виконуються в пулі потоків, а не в циклі подій
+    limit_route_threads()
+    # Задачі попереднього запуску сервера вже не виконуються
+    fail_interrupted_jobs()
+    yield
+
 
 # Инициализация приложения FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Створення БД локально
 init_db()
 
+# Тривалість і кількість SQL-запитів кожного HTTP-запиту для /metrics
+app.add_middleware(MetricsMiddleware, query_headers=DEBUG)
+
 
 # Подключение маршрутов
 app.include_router(synonyms_router)
@@ -20,6 +43,9 @@ app.include_router(data_transfer_router)
 app.include_router(generator)
 app.include_router(unificator_router)
 app.include_router(units_router)
+app.include_router(api_router)
+app.include_router(jobs_router)
+app.include_router(metrics_router)
 
 # Подключение статических файлов
 app.mount("/static", StaticFiles(directory="static"), name="static")
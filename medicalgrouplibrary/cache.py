@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Обмежений LRU-кеш результатів, прив'язаний до покоління словника.
+    Коли покоління змінюється (словник оновлено), усі збережені результати відкидаються.
+    """
+
+    def __init__(self, maxsize: int):
+        """
+        :param maxsize: Максимальна кількість записів (0 - кеш вимкнено).
+        """
+        self.maxsize = maxsize
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, generation: int):
+        """
+        Повертає збережене значення або None.
+        :param key: Ключ запиту.
+        :param generation: Поточне покоління словника.
+        """
+        with self._lock:
+            if generation > self.generation:
+                self._entries.clear()
+                self.generation = generation
+            value = self._entries.get(key) if generation == self.generation else None
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation: int):
+        """
+        Зберігає значення, обчислене для покоління generation. Якщо словник встиг змінитися,
+        значення не зберігається.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "generation": self.generation,
+            }
+
+
+class ResponseCache:
+    """
+    Дисковий кеш відповідей, адресований вмістом: ключ - SHA-256 від частин запиту (модель, промпт, вхідний текст),
+    кожна відповідь зберігається окремим JSON-файлом. Записи старші за ttl вважаються відсутніми;
+    коли загальний розмір перевищує max_bytes, видаляються найдавніше використані файли.
+    """
+
+    def __init__(self, directory: str, ttl: float, max_bytes: int):
+        """
+        :param directory: Каталог для файлів кешу (створюється при першому записі).
+        :param ttl: Час життя запису, с (0 - кеш вимкнено).
+        :param max_bytes: Максимальний загальний розмір файлів кешу, байт.
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.saved_tokens = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str):
+        """
+        Повертає збережену відповідь або None (запису немає, він застарів або кеш вимкнено).
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            entry = None
+        with self._lock:
+            if entry is None or self.ttl <= 0 or time.time() - entry["created"] > self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_tokens += entry.get("tokens") or 0
+        try:
+            os.utime(path)  # Час використання - для витіснення найдавніше використаних записів
+        except OSError:
+            pass
+        return entry["response"]
+
+    def skip(self):
+        """
+        Враховує запит, який свідомо обійшов кеш (потрібні нові варіанти).
+        """
+        with self._lock:
+            self.bypassed += 1
+
+    def put(self, key: str, response, tokens: int = None):
+        """
+        Зберігає відповідь і, якщо потрібно, витісняє старі записи.
+        :param tokens: Скільки токенів коштувала відповідь (для підрахунку заощадженого).
+        """
+        if self.ttl <= 0:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({"created": time.time(), "tokens": tokens, "response": response}, file, ensure_ascii=False)
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(temporary_path, path)  # Атомарна заміна: читачі не бачать напівзаписаний файл
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+            else:
+                self._size += os.path.getsize(path) - previous_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        status = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, status.st_size, status.st_mtime
+
+    def _evict(self):
+        for path, size, _ in sorted(self._files(), key=lambda file: file[2]):
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "saved_tokens": self.saved_tokens,
+            }
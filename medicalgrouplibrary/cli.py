@@ -0,0 +1,176 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from itertools import islice
+from medicalgrouplibrary.database import init_db
+from medicalgrouplibrary.unificator import get_unification_names, UNIFICATION_WORKERS
+
+# Колонки, які додаються до кожного рядка результату
+RESULT_COLUMNS = ("standard_name", "unification_score", "unification_status")
+
+# Як часто (у рядках) виводити прогрес у stderr
+PROGRESS_EVERY = 100_000
+
+
+def _chunks(iterable, size: int):
+    """
+    Розбиває потік на списки по size елементів, не читаючи весь потік у пам'ять.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _detect_format(path: str) -> str:
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def _read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def unify_records(records, column: str, threshold: float, chunk_size: int, unify):
+    """
+    Додає до кожного запису результат уніфікації назви з колонки column.
+    Записи обробляються частинами по chunk_size, тому в пам'яті тримається лише одна частина.
+    :param records: Потік записів (словників).
+    :param column: Колонка з назвою аналізу.
+    :param threshold: Поріг схожості (від 0 до 100).
+    :param chunk_size: Кількість записів в одній частині.
+    :param unify: Функція (список назв, поріг) -> список результатів, як get_unification_names.
+    """
+    for chunk in _chunks(records, chunk_size):
+        results = unify([str(record.get(column) or "") for record in chunk], threshold)
+        for record, result in zip(chunk, results):
+            score = result["score"]
+            record["standard_name"] = result["standard_name"] or ""
+            record["unification_score"] = round(score, 2) if score is not None else ""
+            record["unification_status"] = result["status"]
+            yield record
+
+
+def _report(rows: int, started: float, final: bool = False):
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    prefix = "Готово" if final else "Оброблено"
+    print(f"{prefix}: {rows} рядків за {elapsed:.1f} с ({rate:.0f} рядків/с)", file=sys.stderr)
+
+
+def unify_command(args):
+    """
+    Уніфікує назви аналізів у CSV/JSONL-файлі потоково і записує результат у вихідний файл.
+    """
+    file_format = args.format or _detect_format(args.input)
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8-sig", newline="")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+
+    unifier = None
+    if args.processes > 1:
+        from medicalgrouplibrary.parallel import ParallelUnifier
+
+        unifier = ParallelUnifier(args.processes, workers=args.workers)
+        unify = unifier.unify
+    else:
+        def unify(names, threshold):
+            return get_unification_names(names, threshold, workers=args.workers)
+
+    started = time.perf_counter()
+    rows = 0
+    try:
+        if file_format == "csv":
+            reader = csv.DictReader(source, delimiter=args.delimiter)
+            if args.column not in (reader.fieldnames or []):
+                print(f"Помилка: колонку '{args.column}' не знайдено у вхідному файлі.", file=sys.stderr)
+                return 1
+            fieldnames = list(reader.fieldnames) + [name for name in RESULT_COLUMNS if name not in reader.fieldnames]
+            writer = csv.DictWriter(target, fieldnames=fieldnames, delimiter=args.delimiter)
+            writer.writeheader()
+            write = writer.writerow
+            records = reader
+        else:
+            def write(record):
+                target.write(json.dumps(record, ensure_ascii=False) + "\n")
+            records = _read_jsonl(source)
+
+        for record in unify_records(records, args.column, args.threshold, args.chunk_size, unify):
+            write(record)
+            rows += 1
+            if rows % PROGRESS_EVERY == 0:
+                _report(rows, started)
+    finally:
+        if unifier is not None:
+            unifier.close()
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    _report(rows, started, final=True)
+    return 0
+
+
+def import_command(args):
+    """
+    Імпортує синоніми з JSON/JSONL/CSV-файлу в базу пакетами і виводить звіт у stderr.
+    """
+    from medicalgrouplibrary.data_transfer import import_synonym_records, read_synonym_records, \
+        detect_synonyms_format, IMPORT_BATCH_SIZE
+
+    file_format = args.format or detect_synonyms_format(args.input)
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8-sig", newline="")
+    try:
+        report = import_synonym_records(read_synonym_records(source, file_format), args.standard_name,
+                                        args.batch_size or IMPORT_BATCH_SIZE)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    print(f"Готово: {report['rows']} рядків за {report['seconds']:.1f} с ({report['rows_per_second']} рядків/с); "
+          f"додано {report['inserted']}, пропущено {report['skipped']}, "
+          f"створено стандартних імен {report['standard_names_created']}", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m medicalgrouplibrary",
+                                     description="Інструменти бібліотеки уніфікації медичних аналізів.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    unify_parser = subparsers.add_parser("unify", help="Уніфікувати назви аналізів у CSV/JSONL-файлі.")
+    unify_parser.add_argument("input", help="Вхідний CSV або JSONL файл ('-' - stdin).")
+    unify_parser.add_argument("-o", "--output", default="-", help="Вихідний файл ('-' - stdout).")
+    unify_parser.add_argument("--format", choices=("csv", "jsonl"),
+                              help="Формат файлів (за замовчуванням - за розширенням вхідного файлу).")
+    unify_parser.add_argument("--column", default="name", help="Колонка з назвою аналізу.")
+    unify_parser.add_argument("--delimiter", default=",", help="Роздільник CSV.")
+    unify_parser.add_argument("--threshold", type=float, default=80.0, help="Поріг схожості (від 0 до 100).")
+    unify_parser.add_argument("--chunk-size", type=int, default=1000, help="Кількість рядків в одній частині.")
+    unify_parser.add_argument("--workers", type=int, default=UNIFICATION_WORKERS,
+                              help="Кількість потоків rapidfuzz (-1 - усі ядра).")
+    unify_parser.add_argument("--processes", type=int, default=1,
+                              help="Кількість процесів для паралельної уніфікації (1 - без пулу процесів).")
+    unify_parser.set_defaults(handler=unify_command)
+
+    import_parser = subparsers.add_parser("import", help="Імпортувати синоніми з JSON/JSONL/CSV-файлу.")
+    import_parser.add_argument("input", help="Файл із записами standard_name, synonym ('-' - stdin).")
+    import_parser.add_argument("--format", choices=("json", "jsonl", "csv"),
+                               help="Формат файлу (за замовчуванням - за розширенням).")
+    import_parser.add_argument("--standard-name", help="Імпортувати лише записи для цього стандартного імені.")
+    import_parser.add_argument("--batch-size", type=int,
+                               help="Кількість рядків в одній транзакції (за замовчуванням - IMPORT_BATCH_SIZE).")
+    import_parser.set_defaults(handler=import_command)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    # Як і сервер, CLI спершу оновлює схему бази (нові таблиці, міграції)
+    init_db()
+    return args.handler(args)
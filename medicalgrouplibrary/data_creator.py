@@ -1,21 +1,53 @@
+import asyncio
+import random
+import threading
+import weakref
 import openai
 from medicalgrouplibrary.database import SessionLocal
 from pydantic import BaseModel
 from typing import List
 from medicalgrouplibrary.unificator import add_synonym
 from medicalgrouplibrary.database import AnalysisSynonym, StandardName
-from tqdm import tqdm
+from medicalgrouplibrary.cache import ResponseCache
+from medicalgrouplibrary.data_transfer import import_synonym_records
+from medicalgrouplibrary.executor import run_blocking
+from medicalgrouplibrary.normalization import normalize_name
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 API_KEY_MLAI = os.getenv("API_KEY_MLAI")
+# Адреса API (для тестів можна вказати локальний сервер-заглушку)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.aimlapi.com/v1")
+# Скільки запитів до LLM виконується одночасно
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+# Скільки разів повторювати запит після тимчасової помилки (ліміт запитів, таймаут, 5xx)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+# Базова затримка перед повтором, с (подвоюється з кожною спробою)
+LLM_RETRY_DELAY = float(os.getenv("LLM_RETRY_DELAY", "1.0"))
+
+# Дисковий кеш відповідей LLM: каталог, час життя запису (с, 0 - вимкнено) і максимальний розмір (байт)
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "db/llm_cache")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# Помилки, після яких має сенс повторити запит
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                    openai.InternalServerError)
 
 client = openai.OpenAI(
-    base_url="https://api.aimlapi.com/v1",
+    base_url=LLM_BASE_URL,
     api_key=API_KEY_MLAI
 )
 
+# Асинхронні клієнти за циклами подій: з'єднання httpx прив'язані до циклу, у якому створені, а кожна задача
+# генерації (asyncio.run) має власний цикл. Клієнт закритого циклу зникає разом із ним. Повтори виконує
+# generate_synonyms_async
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+_llm_cache = ResponseCache(LLM_CACHE_DIR, LLM_CACHE_TTL, LLM_CACHE_MAX_BYTES)
+
 
 class Synonym(BaseModel):
     standard_name: str
@@ -26,14 +58,45 @@ class SynonymsList(BaseModel):
     list_of_synonyms: List[Synonym]
 
 
-def get_llm_response(text: str, prompt: str, model="gpt-4o-mini"):
+def get_llm_cache_stats() -> dict:
+    """
+    Повертає лічильники кешу відповідей LLM: влучання, промахи, частку влучань і заощаджені токени.
+    """
+    return _llm_cache.stats()
+
+
+def _cached_response(model: str, prompt: str, text: str, variant: int, fresh: bool):
+    """
+    Повертає (ключ кешу, збережена відповідь або None). У режимі fresh кеш не читається.
+    """
+    key = ResponseCache.make_key(model, prompt, text, SynonymsList.model_json_schema(), variant)
+    if fresh:
+        _llm_cache.skip()
+        return key, None
+    return key, _llm_cache.get(key)
+
+
+def _store_response(key: str, completion) -> dict:
+    response = completion.choices[0].message.parsed.model_dump()
+    usage = getattr(completion, "usage", None)
+    _llm_cache.put(key, response, getattr(usage, "total_tokens", None))
+    return response
+
+
+def get_llm_response(text: str, prompt: str, model="gpt-4o-mini", fresh: bool = False, variant: int = 0):
     """
     Отримуємо відповідь від LLM (OpenAI) для синонімів до заданого уніфікованого імені.
+    Спочатку перевіряється дисковий кеш відповідей (ключ - модель, промпт, вхідний текст і номер варіанта).
     :param text: Вхідний текст (стандартне ім'я для якого шукаються синоніми).
     :param prompt: Повідомлення, яке передається в систему як частина запиту.
     :param model: Модель, яку використовуємо для запиту.
+    :param fresh: Не брати відповідь з кешу (потрібні нові варіанти); нова відповідь замінює збережену.
+    :param variant: Номер варіанта: різні номери - окремі записи кешу для того самого запиту.
     :return: Список синонімів у вигляді словників.
     """
+    key, cached = _cached_response(model, prompt, text, variant, fresh)
+    if cached is not None:
+        return cached
     completion = client.beta.chat.completions.parse(
         model=model,
         messages=[
@@ -44,22 +107,37 @@ def get_llm_response(text: str, prompt: str, model="gpt-4o-mini"):
         max_tokens=16384
     )
     # Парсимо відповідь у вигляді List of dicts [{standard_name: synonym}]
-    reasoning_dict = completion.choices[0].message.parsed.model_dump()
-    return reasoning_dict
+    return _store_response(key, completion)
 
 
-def create_synonyms_for_standard_name(standard_name: str):
+def get_async_client() -> openai.AsyncOpenAI:
     """
-    Створює список синонімів для заданого уніфікованого імені (стандартного імені) за допомогою OpenAI API.
-    Перевіряє чи синоніми вже є в базі, і додає їх, якщо їх немає.
-    :param standard_name: Стандартне ім'я для якого створюються синоніми.
-    :return: Список синонімів, які були додані в базу даних.
+    Повертає асинхронний клієнт для поточного циклу подій (створює його при першому зверненні з цього циклу).
     """
-    session = SessionLocal()
-    added_synonyms = []  # Список для зберігання доданих синонімів
-    try:
-        # Формулюємо запит до OpenAI
-        prompt = f"""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        async_client = _async_clients.get(loop)
+        if async_client is None:
+            async_client = _async_clients[loop] = openai.AsyncOpenAI(base_url=LLM_BASE_URL, api_key=API_KEY_MLAI,
+                                                                     max_retries=0)
+        return async_client
+
+
+async def close_async_client():
+    """
+    Закриває асинхронний клієнт поточного циклу подій (перед завершенням циклу, створеного asyncio.run).
+    """
+    with _async_clients_lock:
+        async_client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if async_client is not None:
+        await async_client.close()
+
+
+def build_synonyms_prompt(standard_name: str) -> str:
+    """
+    Формує системне повідомлення для генерації варіантів написання стандартного імені.
+    """
+    return f"""
         Перелічіть усі можливі варіанти написання для медичного терміну: {standard_name}. Усі варіанти мають стосуватися виключно цього показника ({standard_name}) і враховувати можливі написання, які можуть зустрічатися в різних медичних документах, лабораторних результатах, аналізах тощо. 
         Включіть варіанти з такими особливостями: 
         - Різні абревіатури або скорочення (наприклад, 'HGB', 'Hb').
@@ -70,6 +148,160 @@ def create_synonyms_for_standard_name(standard_name: str):
         Не включайте значення, що належать іншим показникам навіть із подібними назвами (наприклад, 'Гемоглобін А' або 'Глікогемоглобін' не слід включати). Уніфікована назва для цього показника має залишатися незмінною в полі standard_name: {standard_name}.
         """
 
+
+async def get_llm_response_async(text: str, prompt: str, model="gpt-4o-mini", llm_client=None, fresh: bool = False,
+                                 variant: int = 0, blocking=run_blocking):
+    """
+    Асинхронний варіант get_llm_response (з тим самим кешем відповідей).
+    Читання і запис дискового кешу виконуються через blocking, а не в циклі подій.
+    :param llm_client: Клієнт з інтерфейсом openai.AsyncOpenAI (за замовчуванням - get_async_client()).
+    :param blocking: Корутинна функція (func, *args) для блокуючих операцій (див. generate_synonyms_async).
+    :return: Список синонімів у вигляді словників.
+    """
+    key, cached = await blocking(_cached_response, model, prompt, text, variant, fresh)
+    if cached is not None:
+        return cached
+    llm_client = llm_client or get_async_client()
+    completion = await llm_client.beta.chat.completions.parse(
+        model=model,
+        messages=[
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": text},
+        ],
+        response_format=SynonymsList,
+        max_tokens=16384
+    )
+    return await blocking(_store_response, key, completion)
+
+
+async def _with_retries(call, max_retries: int, retry_delay: float):
+    """
+    Виконує асинхронний виклик call(), повторюючи його після тимчасових помилок з експоненційною затримкою.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return await call()
+        except RETRYABLE_ERRORS:
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(retry_delay * 2 ** attempt * (0.5 + random.random()))
+
+
+def _add_generated_synonyms(standard_name: str, synonyms: list) -> list:
+    """
+    Додає згенеровані синоніми до стандартного імені одним пакетом, пропускаючи ті,
+    що вже є в базі з точністю до нормалізації.
+    :return: Список доданих синонімів.
+    """
+    session = SessionLocal()
+    try:
+        existing = {normalize_name(standard_name)}
+        existing.update(normalize_name(synonym) for synonym, in session.query(AnalysisSynonym.synonym)
+                        .join(StandardName).filter(StandardName.name == standard_name))
+    finally:
+        session.close()
+
+    new_synonyms = [synonym for synonym in synonyms if normalize_name(synonym) not in existing]
+    if new_synonyms:
+        import_synonym_records({"standard_name": standard_name, "synonym": synonym} for synonym in new_synonyms)
+    return new_synonyms
+
+
+async def generate_synonyms_async(standard_name: str, request_count: int, concurrency: int = LLM_CONCURRENCY,
+                                  llm_client=None, max_retries: int = LLM_MAX_RETRIES,
+                                  retry_delay: float = LLM_RETRY_DELAY, fresh: bool = False, progress=None,
+                                  blocking=run_blocking) -> dict:
+    """
+    Генерує синоніми для стандартного імені request_count паралельними запитами до LLM
+    (не більше concurrency одночасно), об'єднує відповіді без повторів і додає нові синоніми в базу одним пакетом.
+    Запит номер i береться з кешу як варіант i, тому повторний запуск не платить за ті самі відповіді ще раз;
+    fresh=True обходить кеш, коли потрібні нові варіанти.
+    :param standard_name: Стандартне ім'я, для якого створюються синоніми.
+    :param request_count: Кількість запитів до LLM.
+    :param concurrency: Максимальна кількість одночасних запитів.
+    :param llm_client: Клієнт з інтерфейсом openai.AsyncOpenAI (для тестів - заглушка).
+    :param max_retries: Кількість повторів запиту після тимчасової помилки.
+    :param retry_delay: Базова затримка перед повтором, с.
+    :param fresh: Не брати відповіді з кешу.
+    :param progress: Функція (виконано запитів, усього запитів), яка викликається після кожної відповіді.
+    :param blocking: Корутинна функція (func, *args) для блокуючих операцій (кеш відповідей, запис у базу):
+                     за замовчуванням run_blocking, фонові задачі передають asyncio.to_thread,
+                     щоб не займати спільний пул.
+    :return: Словник: requests, failed, received, unique, added (список доданих синонімів), errors, cache.
+    """
+    prompt = build_synonyms_prompt(standard_name)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    completed = 0
+
+    async def request(variant: int):
+        nonlocal completed
+        async with semaphore:
+            try:
+                return await _with_retries(lambda: get_llm_response_async(standard_name, prompt, llm_client=llm_client,
+                                                                          fresh=fresh, variant=variant,
+                                                                          blocking=blocking),
+                                           max_retries, retry_delay)
+            finally:
+                completed += 1
+                if progress is not None:
+                    progress(completed, request_count)
+
+    responses = await asyncio.gather(*(request(variant) for variant in range(request_count)), return_exceptions=True)
+
+    # Об'єднуємо відповіді: однакові з точністю до нормалізації варіанти лишаються один раз
+    unique = {}
+    received = 0
+    errors = []
+    for response in responses:
+        if isinstance(response, Exception):
+            errors.append(str(response))
+            continue
+        for synonym_data in response.get("list_of_synonyms", []):
+            synonym = synonym_data["synonym"].strip()
+            received += 1
+            if synonym:
+                unique.setdefault(normalize_name(synonym), synonym)
+
+    added = await blocking(_add_generated_synonyms, standard_name, list(unique.values())) if unique else []
+    return {
+        "requests": request_count,
+        "failed": len(errors),
+        "received": received,
+        "unique": len(unique),
+        "added": added,
+        "errors": errors,
+        "cache": get_llm_cache_stats(),
+    }
+
+
+def generate_synonyms(standard_name: str, request_count: int, **kwargs) -> dict:
+    """
+    Синхронна обгортка над generate_synonyms_async для скриптів, CLI і фонових задач.
+    Виконує генерацію в новому циклі подій і закриває клієнт LLM цього циклу перед його завершенням.
+    """
+    async def run():
+        try:
+            return await generate_synonyms_async(standard_name, request_count, **kwargs)
+        finally:
+            await close_async_client()
+
+    return asyncio.run(run())
+
+
+def create_synonyms_for_standard_name(standard_name: str):
+    """
+    Створює список синонімів для заданого уніфікованого імені (стандартного імені) за допомогою OpenAI API.
+    Перевіряє чи синоніми вже є в базі, і додає їх, якщо їх немає.
+    :param standard_name: Стандартне ім'я для якого створюються синоніми.
+    :return: Список синонімів, які були додані в базу даних.
+    """
+    session = SessionLocal()
+    added_synonyms = []  # Список для зберігання доданих синонімів
+    try:
+        # Формулюємо запит до OpenAI
+        prompt = build_synonyms_prompt(standard_name)
+
         response_dict = get_llm_response(standard_name, prompt)
 
         # Перевірка наявності синонімів у відповіді
@@ -97,5 +329,4 @@ def create_synonyms_for_standard_name(standard_name: str):
 # Приклад використання
 if __name__ == "__main__":
     standard_name = "Гемоглобін"
-    for _ in tqdm(range(10)):
-        created_synonyms = create_synonyms_for_standard_name(standard_name)
+    print(generate_synonyms(standard_name, 10))
@@ -1,56 +1,304 @@
+import csv
+import io
 import json
-from medicalgrouplibrary.database import SessionLocal, AnalysisSynonym
+import os
+import time
+import zlib
+from itertools import islice
+from medicalgrouplibrary.database import SessionLocal, ReadSessionLocal, AnalysisSynonym, StandardName
+from medicalgrouplibrary.unificator import invalidate_synonym_index
+from medicalgrouplibrary.normalization import name_sort_key
 
-def import_synonyms_from_json(file_path: str):
+
+# Кількість рядків в одній транзакції імпорту
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "10000"))
+# Кількість параметрів у одному "IN (...)" (обмеження SQLite на кількість змінних у запиті)
+SQL_IN_BATCH_SIZE = 500
+# Розмір блоку, яким читається JSON-файл
+READ_CHUNK_SIZE = 64 * 1024
+# Кількість рядків, які вибираються з бази і серіалізуються за один раз при експорті
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "5000"))
+
+SYNONYM_FORMATS = ("json", "jsonl", "csv")
+EXPORT_MEDIA_TYPES = {"json": "application/json", "jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _batches(iterable, size: int):
     """
-    Заповнює базу даних синонімами та уніфікованими іменами з JSON-файлу.
-    :param file_path: Шлях до JSON-файлу з синонімами.
+    Розбиває потік на списки по size елементів, не читаючи весь потік у пам'ять.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def detect_synonyms_format(file_name: str) -> str:
+    """
+    Визначає формат файлу синонімів за розширенням (json, jsonl або csv).
+    """
+    name = (file_name or "").lower()
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    return "json"
+
+
+def _read_json_array(stream):
+    """
+    Послідовно повертає елементи JSON-масиву, читаючи файл блоками, а не цілком.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("JSON-файл повинен містити масив записів.")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break  # Запис обірвався на межі блоку - дочитуємо наступний
+            yield record
+        if not chunk:
+            raise ValueError("Неочікуваний кінець JSON-файлу.")
+
+
+def read_synonym_records(stream, file_format: str = "json"):
     """
+    Потоково читає записи {"standard_name": ..., "synonym": ...} з текстового потоку.
+    :param stream: Текстовий потік (відкритий файл).
+    :param file_format: json (масив записів), jsonl (запис у кожному рядку) або csv (колонки standard_name, synonym).
+    """
+    if file_format == "csv":
+        return csv.DictReader(stream)
+    if file_format == "jsonl":
+        return (json.loads(line) for line in stream if line.strip())
+    if file_format == "json":
+        return _read_json_array(stream)
+    raise ValueError(f"Невідомий формат файлу: {file_format}. Підтримуються: {', '.join(SYNONYM_FORMATS)}.")
+
+
+def _insert_ignoring_conflicts(session, model, index_elements: list, rows: list) -> int:
+    """
+    Вставляє рядки пакетом через INSERT ... ON CONFLICT DO NOTHING.
+    :return: Кількість фактично вставлених рядків.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(model.__table__).on_conflict_do_nothing(index_elements=index_elements)
+    return session.execute(statement, rows).rowcount
+
+
+def _resolve_standard_names(session, names: set, standard_name_ids: dict) -> int:
+    """
+    Доповнює словник standard_name_ids (ім'я -> id) для імен із names, створюючи відсутні StandardName.
+    :return: Кількість створених стандартних імен.
+    """
+    def load(missing_names):
+        for batch in _batches(sorted(missing_names), SQL_IN_BATCH_SIZE):
+            standard_name_ids.update(
+                (name, standard_name_id) for standard_name_id, name in
+                session.query(StandardName.id, StandardName.name).filter(StandardName.name.in_(batch))
+            )
+
+    missing = names - standard_name_ids.keys()
+    if not missing:
+        return 0
+    load(missing)
+    missing -= standard_name_ids.keys()
+    if not missing:
+        return 0
+    created = _insert_ignoring_conflicts(session, StandardName, ["name"],
+                                         [{"name": name, "sort_key": name_sort_key(name)} for name in missing])
+    load(missing)
+    return created
+
+
+def import_synonym_records(records, standard_name: str = None, batch_size: int = IMPORT_BATCH_SIZE,
+                           progress=None) -> dict:
+    """
+    Імпортує потік записів синонімів у базу пакетами по batch_size рядків.
+    Відсутні стандартні імена створюються, наявні пари (стандартне ім'я, синонім) пропускаються
+    завдяки ON CONFLICT DO NOTHING за unique_standard_name_synonym_constraint. Кожен пакет
+    фіксується окремою транзакцією, тому повторний імпорт після збою безпечний.
+    :param records: Потік словників з ключами standard_name і synonym (див. read_synonym_records);
+                    запис іншого типу зупиняє імпорт з ValueError із номером запису.
+    :param standard_name: Якщо задано, імпортуються лише записи для цього стандартного імені.
+    :param batch_size: Кількість рядків в одній транзакції.
+    :param progress: Функція (оброблено рядків, додано), яка викликається після кожного пакета.
+    :return: Звіт: rows, inserted, skipped, standard_names_created, seconds, rows_per_second.
+    """
+    started = time.perf_counter()
+    report = {"rows": 0, "inserted": 0, "skipped": 0, "standard_names_created": 0}
+    standard_name_ids = {}
     session = SessionLocal()
     try:
-        with open(file_path, 'r', encoding='utf-8') as jsonfile:
-            synonyms_data = json.load(jsonfile)
-            for entry in synonyms_data:
-                standard_name = entry['standard_name']
-                synonym = entry['synonym']
-                # Перевіряємо, чи не існує вже цього синоніма в базі
-                existing_synonym = session.query(AnalysisSynonym).filter_by(synonym=synonym).first()
-                if not existing_synonym:
-                    synonym_entry = AnalysisSynonym(standard_name=standard_name, synonym=synonym)
-                    session.add(synonym_entry)
-                    print(f"Додано синонім '{synonym}' для уніфікованого імені '{standard_name}'.")
-            session.commit()
-    except Exception as e:
-        print(f"Помилка: {e}")
+        for batch in _batches(records, batch_size):
+            # Пакет перевіряється до запису, тож некоректний запис не лишає його збереженим частково
+            for number, record in enumerate(batch, report["rows"] + 1):
+                if not isinstance(record, dict):
+                    raise ValueError(f"Запис {number} повинен бути об'єктом з полями standard_name і synonym "
+                                     f"(імпортовано {report['inserted']} з попередніх {report['rows']} рядків).")
+            report["rows"] += len(batch)
+            pairs = []
+            for record in batch:
+                name = str(record.get("standard_name") or "").strip()
+                synonym = str(record.get("synonym") or "").strip()
+                if name and synonym and (not standard_name or name == standard_name):
+                    pairs.append((name, synonym))
+            if pairs:
+                report["standard_names_created"] += _resolve_standard_names(
+                    session, {name for name, _ in pairs}, standard_name_ids)
+                report["inserted"] += _insert_ignoring_conflicts(
+                    session, AnalysisSynonym, ["standard_name_id", "synonym"],
+                    [{"standard_name_id": standard_name_ids[name], "synonym": synonym} for name, synonym in pairs])
+                session.commit()
+            if progress is not None:
+                progress(report["rows"], report["inserted"])
+    except Exception:
+        session.rollback()
+        raise
     finally:
         session.close()
+        if report["inserted"] or report["standard_names_created"]:
+            invalidate_synonym_index()
 
+    report["skipped"] = report["rows"] - report["inserted"]
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["rows_per_second"] = round(report["rows"] / report["seconds"]) if report["seconds"] else report["rows"]
+    return report
 
-def export_synonyms_to_json(file_path: str):
+
+def import_synonyms_from_file(file_path: str, file_format: str = None, standard_name: str = None) -> dict:
     """
-    Експортує всі синоніми та уніфіковані імена з бази даних у форматі JSON.
-    :param file_path: Шлях до файлу для збереження даних.
+    Заповнює базу даних синонімами та уніфікованими іменами з JSON, JSONL або CSV-файлу.
+    :param file_path: Шлях до файлу з синонімами.
+    :param file_format: Формат файлу (за замовчуванням - за розширенням).
+    :param standard_name: Якщо задано, імпортуються лише записи для цього стандартного імені.
+    :return: Звіт імпорту (див. import_synonym_records).
     """
-    session = SessionLocal()
-    try:
-        # Отримуємо всі записи з таблиці AnalysisSynonym
-        synonyms_data = session.query(AnalysisSynonym).all()
+    file_format = file_format or detect_synonyms_format(file_path)
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as stream:
+        return import_synonym_records(read_synonym_records(stream, file_format), standard_name)
 
-        # Формуємо список словників для запису в JSON
-        data_to_export = [{"standard_name": entry.standard_name, "synonym": entry.synonym} for entry in synonyms_data]
 
-        # Записуємо отримані дані у файл JSON
-        with open(file_path, 'w', encoding='utf-8') as jsonfile:
-            json.dump(data_to_export, jsonfile, ensure_ascii=False, indent=4)
+def import_synonyms_from_json(file_path: str) -> dict:
+    """
+    Заповнює базу даних синонімами та уніфікованими іменами з JSON-файлу.
+    :param file_path: Шлях до JSON-файлу з синонімами.
+    """
+    return import_synonyms_from_file(file_path, "json")
 
-        print(f"Синоніми успішно експортовані в файл '{file_path}'.")
 
-    except Exception as e:
-        print(f"Помилка: {e}")
-    finally:
-        session.close()
+def iter_synonym_pairs(session, standard_name: str = None):
+    """
+    Повертає пари (стандартне ім'я, синонім) одним запитом з JOIN, вибираючи з бази по EXPORT_FETCH_SIZE рядків.
+    :param standard_name: Якщо задано, лише синоніми цього стандартного імені.
+    """
+    query = session.query(StandardName.name, AnalysisSynonym.synonym).join(AnalysisSynonym.standard_name)
+    if standard_name:
+        query = query.filter(StandardName.name == standard_name)
+    return query.order_by(AnalysisSynonym.id).yield_per(EXPORT_FETCH_SIZE)
+
+
+def _serialize_pairs(pairs, file_format: str):
+    """
+    Серіалізує пари (стандартне ім'я, синонім) у текстові частини по EXPORT_FETCH_SIZE записів.
+    """
+    if file_format == "json":
+        yield "["
+    elif file_format == "csv":
+        yield "standard_name,synonym\r\n"
+
+    first = True
+    for batch in _batches(pairs, EXPORT_FETCH_SIZE):
+        if file_format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            yield buffer.getvalue()
+            continue
+        lines = [json.dumps({"standard_name": name, "synonym": synonym}, ensure_ascii=False) for name, synonym in batch]
+        if file_format == "jsonl":
+            yield "\n".join(lines) + "\n"
+        else:
+            yield ("\n" if first else ",\n") + ",\n".join(lines)
+        first = False
+
+    if file_format == "json":
+        yield "\n]\n"
 
 
-export_synonyms_to_json('../synonyms_export.json')
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)  # wbits=31 - формат gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
 
-# import_synonyms_from_json('synonyms_file.json')
+
+def stream_synonyms_export(file_format: str = "json", standard_name: str = None, compress: bool = False):
+    """
+    Потоково експортує синоніми: повертає генератор частин файлу (bytes), пам'ять не залежить від розміру словника.
+    Генератор сам відкриває і закриває сесію, тому його можна віддавати у StreamingResponse.
+    :param file_format: json (масив записів), jsonl або csv.
+    :param standard_name: Якщо задано, лише синоніми цього стандартного імені.
+    :param compress: Стиснути результат у gzip.
+    """
+    if file_format not in SYNONYM_FORMATS:
+        raise ValueError(f"Невідомий формат файлу: {file_format}. Підтримуються: {', '.join(SYNONYM_FORMATS)}.")
+
+    def generate():
+        session = ReadSessionLocal()
+        try:
+            chunks = (chunk.encode("utf-8") for chunk in
+                      _serialize_pairs(iter_synonym_pairs(session, standard_name), file_format))
+            yield from _gzip_chunks(chunks) if compress else chunks
+        finally:
+            session.close()
+
+    return generate()
+
+
+def export_synonyms_to_file(file_path: str, file_format: str = None, standard_name: str = None):
+    """
+    Експортує синоніми та уніфіковані імена з бази даних у файл JSON, JSONL або CSV (з розширенням .gz - стиснутий).
+    :param file_path: Шлях до файлу для збереження даних.
+    :param file_format: Формат файлу (за замовчуванням - за розширенням).
+    :param standard_name: Якщо задано, лише синоніми цього стандартного імені.
+    """
+    compress = file_path.lower().endswith(".gz")
+    file_format = file_format or detect_synonyms_format(file_path[:-3] if compress else file_path)
+    with open(file_path, "wb") as target:
+        for chunk in stream_synonyms_export(file_format, standard_name, compress):
+            target.write(chunk)
+
+
+def export_synonyms_to_json(file_path: str):
+    """
+    Експортує всі синоніми та уніфіковані імена з бази даних у форматі JSON.
+    :param file_path: Шлях до файлу для збереження даних.
+    """
+    export_synonyms_to_file(file_path, "json")
@@ -1,18 +1,64 @@
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Boolean, UniqueConstraint
+import os
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, Float, ForeignKey, Boolean, \
+    UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, validates
+from medicalgrouplibrary.migrations import run_migrations, begin_exclusive
+from medicalgrouplibrary.normalization import name_sort_key
 
 # Ініціалізація бази даних
-DATABASE_URL = "sqlite:///db/ukr-analysis.db"
-engine = create_engine(DATABASE_URL)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///db/ukr-analysis.db")
+
+# Режим зберігання SQLite. WAL дозволяє читачам працювати паралельно із записом
+# (генератор, імпорт); порожнє значення залишає налаштування файлу бази без змін.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Скільки мілісекунд чекати на блокування замість негайної помилки "database is locked"
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
+# Розмір пулу з'єднань тільки для читання
+READ_POOL_SIZE = int(os.getenv("READ_POOL_SIZE", "10"))
+
+_is_sqlite = DATABASE_URL.startswith("sqlite")
+_connect_args = {"check_same_thread": False} if _is_sqlite else {}
+
+
+def _configure_sqlite(dbapi_connection, read_only: bool):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}")
+        if SQLITE_JOURNAL_MODE and not read_only:
+            cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        if SQLITE_SYNCHRONOUS:
+            cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+    finally:
+        cursor.close()
+
+
+engine = create_engine(DATABASE_URL, connect_args=_connect_args)
+
+# Окремий рушій для запитів тільки на читання: з'єднання не можуть нічого записати
+# і не конкурують із записом за з'єднання основного пулу
+read_engine = create_engine(DATABASE_URL, connect_args=_connect_args,
+                            pool_size=READ_POOL_SIZE, max_overflow=READ_POOL_SIZE)
+
+if _is_sqlite:
+    event.listen(engine, "connect", lambda connection, record: _configure_sqlite(connection, read_only=False))
+    event.listen(read_engine, "connect", lambda connection, record: _configure_sqlite(connection, read_only=True))
+
 Base = declarative_base()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Модель таблиці стандартних імен
 class StandardName(Base):
     __tablename__ = "standard_names"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
+    sort_key = Column(String, nullable=True)  # name_sort_key(name): сортування і пошук за префіксом за індексом
     standard_unit_id = Column(Integer, ForeignKey("units.id"), nullable=True)  # Зв'язок зі стандартною одиницею
 
     # Зв'язок з таблицею Units
@@ -25,6 +71,15 @@ class StandardName(Base):
     # Зв'язок з таблицею синонімів
     synonyms = relationship("AnalysisSynonym", back_populates="standard_name")
 
+    __table_args__ = (
+        Index("ix_standard_names_sort_key", "sort_key", "id"),
+    )
+
+    @validates("name")
+    def _update_sort_key(self, key, name):
+        self.sort_key = name_sort_key(name)
+        return name
+
 # Модель таблиці синонімів
 class AnalysisSynonym(Base):
     __tablename__ = "analysis_synonyms"
@@ -38,6 +93,7 @@ class AnalysisSynonym(Base):
     # Унікальне обмеження для пари (standard_name_id, synonym)
     __table_args__ = (
         UniqueConstraint("standard_name_id", "synonym", name="unique_standard_name_synonym_constraint"),
+        Index("ix_analysis_synonyms_synonym", "synonym", "standard_name_id"),
     )
 
 # Модель таблиці одиниць
@@ -54,6 +110,8 @@ class Unit(Base):
     # Унікальне обмеження для пари (standard_name_id, unit)
     __table_args__ = (
         UniqueConstraint("standard_name_id", "unit", name="unique_standard_name_unit_constraint"),
+        Index("ix_units_standard_name_id_is_standard", "standard_name_id", "is_standard"),
+        Index("ix_units_unit", "unit"),
     )
 
 # Модель таблиці конверсій одиниць
@@ -75,7 +133,41 @@ class UnitConversion(Base):
     # Унікальне обмеження для пари (from_unit_id, to_unit_id)
     __table_args__ = (
         UniqueConstraint("from_unit_id", "to_unit_id", name="unique_conversion_constraint"),
+        Index("ix_unit_conversions_standard_name_id", "standard_name_id"),
+    )
+
+# Лічильники змін словників (синонімів, одиниць), спільні для всіх процесів, що працюють з базою
+class DictionaryVersion(Base):
+    __tablename__ = "dictionary_versions"
+    name = Column(String, primary_key=True)  # Назва словника: synonyms або units
+    version = Column(Integer, nullable=False, default=0)  # Збільшується після кожного запису до словника
+
+# Модель таблиці фонових задач (генерація синонімів, імпорт)
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # Тип задачі: generate або import
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    params = Column(Text, nullable=False, default="{}")  # Параметри задачі (JSON)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)  # Невідомо заздалегідь для потокового імпорту
+    result = Column(Text, nullable=True)  # Результат (JSON)
+    error = Column(Text, nullable=True)
+    created_at = Column(Float, nullable=False)  # Час у секундах Unix
+    started_at = Column(Float, nullable=True)
+    finished_at = Column(Float, nullable=True)
+    owner = Column(String, nullable=True)  # Процес, що виконує задачу: "хост:pid"
+    heartbeat_at = Column(Float, nullable=True)  # Останній сигнал від процесу-власника
+
+    __table_args__ = (
+        Index("ix_jobs_status", "status"),
     )
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    # Таблиці створюються під блокуванням запису: воркери, що стартують одночасно, не створюють їх двічі
+    with engine.connect() as connection:
+        begin_exclusive(connection)
+        Base.metadata.create_all(bind=connection)
+        connection.commit()
+    # Існуючі бази (зокрема db/ukr-analysis.db) оновлюються до останньої версії схеми на місці
+    run_migrations(engine)
@@ -0,0 +1,37 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Кількість потоків для блокуючої роботи (запити до бази, нечіткий пошук, виклики LLM) з асинхронного коду
+BLOCKING_THREADS = int(os.getenv("BLOCKING_THREADS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_THREADS, thread_name_prefix="blocking")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Виконує синхронну функцію бібліотеки в обмеженому пулі потоків, не блокуючи цикл подій.
+    Поки функція виконується, цикл подій обслуговує інші запити; якщо всі потоки зайняті,
+    нові виклики чекають у черзі пулу.
+    :param func: Синхронна функція (наприклад, get_unification_names).
+    :return: Результат func(*args, **kwargs).
+    """
+    loop = asyncio.get_running_loop()
+    # Контекст копіюється, як у asyncio.to_thread: так у потоці видно лічильник SQL-запитів поточного запиту
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(context.run, func, *args, **kwargs))
+
+
+# Кількість потоків, у яких FastAPI виконує синхронні (def) обробники маршрутів
+ROUTE_THREADS = int(os.getenv("ROUTE_THREADS", "40"))
+
+
+def limit_route_threads():
+    """
+    Обмежує пул потоків, у якому FastAPI виконує синхронні обробники маршрутів.
+    Викликається всередині циклу подій (при старті застосунку).
+    """
+    from anyio import to_thread
+    to_thread.current_default_thread_limiter().total_tokens = ROUTE_THREADS
@@ -0,0 +1,345 @@
+import ast
+import copy
+import math
+import operator
+from fractions import Fraction
+
+# Дозволені оператори у формулах конверсії
+_BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+_UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+# Змінна, яка позначає значення у формулі
+VARIABLE = "x"
+
+# Найбільший допустимий за модулем сталий показник степеня (10**12 для клітин/л ще проходить).
+# Обмеження не дає формулам на кшталт "x*9**9**9" обчислюватися точними дробами без кінця
+MAX_FORMULA_EXPONENT = 64
+
+_FLOAT_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+                    ast.Div: operator.truediv, ast.Pow: math.pow}
+
+
+class FormulaError(ValueError):
+    """
+    Формула конверсії некоректна або містить недозволені конструкції.
+    """
+
+
+class CompiledFormula:
+    """
+    Формула конверсії, розібрана один раз в обмежене дерево виразу (числа, x, + - * / ** і дужки)
+    та скомпільована у функцію. Для афінних формул (a*x+b) зберігаються також коефіцієнти (a, b)
+    у вигляді точних дробів, що дозволяє точно обертати і комбінувати формули.
+    Функція працює і з числами, і з масивами numpy.
+    """
+
+    def __init__(self, tree: ast.expr, source: str = None):
+        self.tree = tree
+        self.source = source if source is not None else ast.unparse(tree)
+        try:
+            self.coefficients = _affine_coefficients(tree)
+        except (ValueError, ZeroDivisionError, OverflowError):
+            self.coefficients = None  # Наприклад, нескінченні константи - формула лишається неафінною
+        self.function = _compile_function(tree)
+        self._inverse = None
+
+    def __call__(self, value):
+        return self.function(value)
+
+    def __repr__(self):
+        return f"CompiledFormula({self.source!r})"
+
+    @property
+    def is_affine(self) -> bool:
+        return self.coefficients is not None
+
+    @property
+    def inverse(self):
+        """
+        Обернена формула (з цільової одиниці у вихідну) або None, якщо формулу неможливо обернути.
+        Афінні формули обертаються через коефіцієнти, інші - послідовним оберненням операцій,
+        якщо x зустрічається у формулі один раз.
+        """
+        if self._inverse is None:
+            if self.coefficients is not None:
+                a, b = self.coefficients
+                if a != 0:
+                    self._inverse = affine_formula(1 / a, -b / a)
+            else:
+                tree = _invert_tree(self.tree)
+                if tree is not None:
+                    self._inverse = CompiledFormula(tree)
+        return self._inverse
+
+    def then(self, other: "CompiledFormula") -> "CompiledFormula":
+        """
+        Композиція формул: спочатку self, потім other (other(self(x))).
+        """
+        if self.coefficients is not None and other.coefficients is not None:
+            a1, b1 = self.coefficients
+            a2, b2 = other.coefficients
+            return affine_formula(a2 * a1, a2 * b1 + b2)
+        return CompiledFormula(_substitute(other.tree, self.tree))
+
+
+def compile_formula(formula: str) -> CompiledFormula:
+    """
+    Розбирає рядок формули (наприклад, "x * 10" або "(x - 32) / 1.8") і повертає CompiledFormula.
+    :param formula: Формула, у якій x - значення у вихідній одиниці.
+    :raises FormulaError: Якщо формула порожня, містить синтаксичну помилку, недозволені конструкції,
+                          ділення на нуль або не залежить від x (таку конверсію неможливо обернути).
+    """
+    try:
+        tree = ast.parse(formula.strip(), mode="eval").body
+    except SyntaxError as e:
+        raise FormulaError(f"Синтаксична помилка у формулі '{formula}': {e.msg}")
+    _validate(tree, formula)
+    _check_magnitudes(tree, formula)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div) and _is_zero_constant(node.right):
+            raise FormulaError(f"Ділення на нуль у формулі '{formula}': {ast.unparse(node)}.")
+
+    compiled = CompiledFormula(tree, formula)
+    if _count_variable(tree) == 0 or (compiled.coefficients is not None and compiled.coefficients[0] == 0) \
+            or (_count_variable(tree) == 1 and any(_discards_variable(node) for node in ast.walk(tree))):
+        raise FormulaError(f"Формула '{formula}' не залежить від {VARIABLE}: усі значення перетворюються на одне.")
+    if compiled.coefficients is not None and not all(_fits_float(value) for value in compiled.coefficients):
+        raise FormulaError(f"Коефіцієнти формули '{formula}' не вміщуються в число з рухомою комою.")
+    return compiled
+
+
+def affine_formula(a, b) -> CompiledFormula:
+    """
+    Будує формулу a*x+b з коефіцієнтів (Fraction або числа).
+    """
+    a, b = Fraction(a), Fraction(b)
+    tree = ast.Name(id=VARIABLE, ctx=ast.Load())
+    if a.numerator == -1:
+        tree = ast.UnaryOp(ast.USub(), tree)
+    elif a.numerator != 1:
+        tree = ast.BinOp(tree, ast.Mult(), _number(a.numerator))
+    if a.denominator != 1:
+        tree = ast.BinOp(tree, ast.Div(), _number(a.denominator))
+    if b != 0:
+        operator = ast.Add() if b > 0 else ast.Sub()
+        tree = ast.BinOp(tree, operator, _fraction_node(abs(b)))
+    return CompiledFormula(ast.fix_missing_locations(tree))
+
+
+def _validate(node: ast.expr, formula: str):
+    if isinstance(node, ast.BinOp) and isinstance(node.op, _BINARY_OPERATORS):
+        _validate(node.left, formula)
+        _validate(node.right, formula)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, _UNARY_OPERATORS):
+        _validate(node.operand, formula)
+    elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        pass
+    elif isinstance(node, ast.Name) and node.id == VARIABLE:
+        pass
+    else:
+        raise FormulaError(f"Недозволений вираз у формулі '{formula}': {ast.unparse(node)}. "
+                           f"Дозволені числа, змінна {VARIABLE}, дужки та оператори + - * / **.")
+
+
+def _float_value(node: ast.expr) -> float:
+    """
+    Обчислює вираз без x у числах з рухомою комою: переповнення дає OverflowError одразу,
+    а не після обчислення величезного цілого чи дробу.
+    """
+    if isinstance(node, ast.Constant):
+        return float(node.value)
+    if isinstance(node, ast.UnaryOp):
+        value = _float_value(node.operand)
+        return -value if isinstance(node.op, ast.USub) else value
+    return _FLOAT_OPERATORS[type(node.op)](_float_value(node.left), _float_value(node.right))
+
+
+def _fits_float(value) -> bool:
+    try:
+        return math.isfinite(float(value))
+    except OverflowError:
+        return False
+
+
+def _check_magnitudes(tree: ast.expr, formula: str):
+    """
+    Перевіряє, що кожен сталий підвираз формули - скінченне дійсне число, а сталі показники
+    степенів не перевищують MAX_FORMULA_EXPONENT за модулем.
+    """
+    for node in ast.walk(tree):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) and not _count_variable(node.right):
+            try:
+                exponent = _float_value(node.right)
+            except (ZeroDivisionError, OverflowError, ValueError):
+                exponent = math.inf
+            if not abs(exponent) <= MAX_FORMULA_EXPONENT:
+                raise FormulaError(f"Показник степеня у формулі '{formula}' має бути не більше "
+                                   f"{MAX_FORMULA_EXPONENT} за модулем: {ast.unparse(node.right)}.")
+        if not isinstance(node, ast.expr) or _count_variable(node):
+            continue
+        try:
+            value = _float_value(node)
+        except ZeroDivisionError:
+            continue  # Ділення на нуль повідомляється окремо
+        except (OverflowError, ValueError):
+            value = math.nan
+        if not math.isfinite(value):
+            raise FormulaError(f"Сталий вираз у формулі '{formula}' не є скінченним дійсним числом: "
+                               f"{ast.unparse(node)}.")
+
+
+def _number(value) -> ast.Constant:
+    return ast.Constant(value=value)
+
+
+def _fraction_node(value: Fraction) -> ast.expr:
+    if value.denominator == 1:
+        return _number(value.numerator)
+    return ast.BinOp(_number(value.numerator), ast.Div(), _number(value.denominator))
+
+
+def _constant_value(node: ast.Constant) -> Fraction:
+    # Через рядок, щоб 0.1 з формули стало рівно 1/10, а не двійковим наближенням
+    return Fraction(repr(node.value))
+
+
+def _affine_coefficients(node: ast.expr):
+    """
+    Повертає коефіцієнти (a, b) формули a*x+b або None, якщо формула не афінна.
+    """
+    if isinstance(node, ast.Constant):
+        return Fraction(0), _constant_value(node)
+    if isinstance(node, ast.Name):
+        return Fraction(1), Fraction(0)
+    if isinstance(node, ast.UnaryOp):
+        operand = _affine_coefficients(node.operand)
+        if operand is None:
+            return None
+        a, b = operand
+        return (-a, -b) if isinstance(node.op, ast.USub) else (a, b)
+
+    left = _affine_coefficients(node.left)
+    right = _affine_coefficients(node.right)
+    if left is None or right is None:
+        return None
+    (a1, b1), (a2, b2) = left, right
+    if isinstance(node.op, ast.Add):
+        return a1 + a2, b1 + b2
+    if isinstance(node.op, ast.Sub):
+        return a1 - a2, b1 - b2
+    if isinstance(node.op, ast.Mult):
+        if a1 == 0:
+            return a2 * b1, b2 * b1
+        if a2 == 0:
+            return a1 * b2, b1 * b2
+        return None
+    if isinstance(node.op, ast.Div):
+        if a2 == 0 and b2 != 0:
+            return a1 / b2, b1 / b2
+        return None
+    if isinstance(node.op, ast.Pow) and a1 == 0 and a2 == 0 and b2.denominator == 1 and b1 != 0:
+        return Fraction(0), b1 ** int(b2)
+    return None
+
+
+def _compile_function(tree: ast.expr):
+    expression = ast.Expression(body=ast.Lambda(
+        args=ast.arguments(posonlyargs=[], args=[ast.arg(arg=VARIABLE)], kwonlyargs=[], kw_defaults=[], defaults=[]),
+        body=copy.deepcopy(tree),
+    ))
+    code = compile(ast.fix_missing_locations(expression), "<formula>", "eval")
+    return eval(code, {"__builtins__": {}})
+
+
+def _count_variable(node: ast.expr) -> int:
+    return sum(isinstance(child, ast.Name) for child in ast.walk(node))
+
+
+def _discards_variable(node: ast.expr) -> bool:
+    """
+    Перевіряє, що операція перетворює частину з x на константу: f(x) * 0, 0 / f(x), f(x) ** 0.
+    """
+    if not isinstance(node, ast.BinOp):
+        return False
+    if isinstance(node.op, ast.Mult):
+        return _is_zero_constant(node.left) or _is_zero_constant(node.right)
+    if isinstance(node.op, ast.Div):
+        return _is_zero_constant(node.left) and _count_variable(node.right) > 0
+    if isinstance(node.op, ast.Pow):
+        return _is_zero_constant(node.right)
+    return False
+
+
+def _is_zero_constant(node: ast.expr) -> bool:
+    """
+    Перевіряє, що вираз без x дорівнює нулю (або сам містить ділення на нуль).
+    """
+    if _count_variable(node):
+        return False
+    try:
+        return _compile_function(node)(0) == 0
+    except ZeroDivisionError:
+        return True
+    except (OverflowError, ValueError, TypeError):
+        return False
+
+
+def _substitute(tree: ast.expr, replacement: ast.expr) -> ast.expr:
+    """
+    Підставляє replacement замість x у копії дерева tree.
+    """
+    class Substitute(ast.NodeTransformer):
+        def visit_Name(self, node):
+            return copy.deepcopy(replacement)
+
+    return ast.fix_missing_locations(Substitute().visit(copy.deepcopy(tree)))
+
+
+def _invert_tree(tree: ast.expr):
+    """
+    Обертає формулу, в якій x зустрічається один раз, послідовно обертаючи операції від зовнішньої
+    до внутрішньої. Повертає дерево оберненої формули або None.
+    """
+    if _count_variable(tree) != 1:
+        return None
+
+    result = ast.Name(id=VARIABLE, ctx=ast.Load())
+    node = tree
+    while not isinstance(node, ast.Name):
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, ast.USub):
+                result = ast.UnaryOp(ast.USub(), result)
+            node = node.operand
+            continue
+
+        left, right, op = node.left, node.right, node.op
+        constant = left if _count_variable(right) else right
+        if isinstance(op, (ast.Mult, ast.Div, ast.Pow)) and _is_zero_constant(constant):
+            return None  # Множення на нуль (або нульовий степінь) не обертається, а ділення на нуль некоректне
+        if _count_variable(left):
+            # f(x) op c
+            if isinstance(op, ast.Add):
+                result = ast.BinOp(result, ast.Sub(), right)
+            elif isinstance(op, ast.Sub):
+                result = ast.BinOp(result, ast.Add(), right)
+            elif isinstance(op, ast.Mult):
+                result = ast.BinOp(result, ast.Div(), right)
+            elif isinstance(op, ast.Div):
+                result = ast.BinOp(result, ast.Mult(), right)
+            else:  # ast.Pow
+                result = ast.BinOp(result, ast.Pow(), ast.BinOp(_number(1), ast.Div(), right))
+            node = left
+        else:
+            # c op f(x)
+            if isinstance(op, ast.Add):
+                result = ast.BinOp(result, ast.Sub(), left)
+            elif isinstance(op, ast.Sub):
+                result = ast.BinOp(left, ast.Sub(), result)
+            elif isinstance(op, ast.Mult):
+                result = ast.BinOp(result, ast.Div(), left)
+            elif isinstance(op, ast.Div):
+                result = ast.BinOp(left, ast.Div(), result)
+            else:  # c ** f(x) потребує логарифма, який у формулах не дозволений
+                return None
+            node = right
+    return ast.fix_missing_locations(copy.deepcopy(result))
@@ -0,0 +1,301 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from medicalgrouplibrary.database import SessionLocal, ReadSessionLocal, Job
+from medicalgrouplibrary.data_creator import generate_synonyms
+from medicalgrouplibrary.data_transfer import import_synonym_records, read_synonym_records
+
+# Скільки задач кожного типу виконується одночасно. Задачі мають власні пули потоків,
+# тому не забирають потоки в обробників маршрутів і run_blocking
+JOB_WORKERS = {
+    "generate": int(os.getenv("JOB_GENERATE_WORKERS", "2")),
+    "import": int(os.getenv("JOB_IMPORT_WORKERS", "1")),
+}
+# Каталог для файлів, завантажених для імпорту у фоні (видаляються після завершення задачі)
+JOB_UPLOAD_DIR = os.getenv("JOB_UPLOAD_DIR", "db/job_uploads")
+# Як часто (с) записувати прогрес задачі в базу
+PROGRESS_INTERVAL = 0.5
+# Як часто (с) процес підтверджує, що його задачі ще виконуються, і шукає задачі зупинених процесів
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+# Через скільки секунд без сигналу задача іншого процесу вважається перерваною
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv("JOB_HEARTBEAT_TIMEOUT", "60"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+_HOSTNAME = socket.gethostname()
+# (PID, випадковий ідентифікатор запуску) поточного процесу: перезапущений процес може отримати
+# той самий PID (наприклад, PID 1 у контейнері), але не той самий ідентифікатор
+_boot = (None, None)
+# PID процесу, у якому запущено потік сигналів (після fork потік треба запустити заново)
+_heartbeat_pid = None
+_heartbeat_lock = threading.Lock()
+# Задачі, які цей процес поставив у чергу і ще не завершив; сигнал подається лише для них
+_active_jobs = set()
+_active_jobs_lock = threading.Lock()
+
+
+def _executor(kind: str) -> ThreadPoolExecutor:
+    with _executors_lock:
+        if kind not in _executors:
+            _executors[kind] = ThreadPoolExecutor(max_workers=max(1, JOB_WORKERS[kind]),
+                                                  thread_name_prefix=f"job-{kind}")
+        return _executors[kind]
+
+
+def _owner() -> str:
+    # Обчислюється для поточного PID: воркери uvicorn/gunicorn можуть бути створені fork після імпорту модуля
+    global _boot
+    pid = os.getpid()
+    if _boot[0] != pid:
+        _boot = (pid, uuid.uuid4().hex[:12])
+    return f"{_HOSTNAME}:{pid}:{_boot[1]}"
+
+
+def _owner_is_gone(owner: str) -> bool:
+    """
+    Перевіряє, що процес-власник точно зупинився: задача без власника (створена до його обліку),
+    попередній запуск із тим самим PID, що й у поточного процесу, або процес на цьому ж хості,
+    якого вже немає. Про процеси інших хостів свідчить лише сигнал.
+    """
+    if not owner:
+        return True
+    host, pid, boot = (owner.rsplit(":", 2) + [""])[:3]
+    if host != _HOSTNAME or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return owner != _owner()
+    if os.name == "nt":
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+        try:
+            with _active_jobs_lock:
+                active = list(_active_jobs)
+            if active:
+                session = SessionLocal()
+                try:
+                    session.query(Job).filter(Job.id.in_(active), Job.status.in_((JOB_QUEUED, JOB_RUNNING))).update(
+                        {"heartbeat_at": time.time()}, synchronize_session=False)
+                    session.commit()
+                finally:
+                    session.close()
+            fail_interrupted_jobs()
+        except Exception as e:
+            # Наступна спроба через JOB_HEARTBEAT_INTERVAL (наприклад, база тимчасово заблокована)
+            print(f"Помилка сигналу фонових задач: {e}")
+
+
+def _ensure_heartbeat():
+    global _heartbeat_pid
+    with _heartbeat_lock:
+        if _heartbeat_pid != os.getpid():
+            threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True).start()
+            _heartbeat_pid = os.getpid()
+
+
+def _update_job(job_id: int, **fields):
+    session = SessionLocal()
+    try:
+        session.query(Job).filter_by(id=job_id).update(fields)
+        session.commit()
+    finally:
+        session.close()
+
+
+def _job_to_dict(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "params": json.loads(job.params),
+        "progress": {"done": job.progress_done, "total": job.progress_total},
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "owner": job.owner,
+        "heartbeat_at": job.heartbeat_at,
+    }
+
+
+class _Progress:
+    """
+    Записує прогрес задачі в базу не частіше ніж раз на PROGRESS_INTERVAL секунд.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.done = 0
+        self.total = None
+        self._written_at = 0.0
+
+    def __call__(self, done: int, total: int = None):
+        self.done, self.total = done, total
+        now = time.monotonic()
+        if now - self._written_at >= PROGRESS_INTERVAL or (total is not None and done >= total):
+            self._written_at = now
+            _update_job(self.job_id, progress_done=done, progress_total=total)
+
+
+def _run_generate(params: dict, progress) -> dict:
+    # Блокуючі операції генерації виконуються в пулі циклу подій задачі, а не в спільному run_blocking
+    return generate_synonyms(params["standard_name"], params["request_count"], fresh=params.get("fresh", False),
+                             progress=progress, blocking=asyncio.to_thread)
+
+
+def _run_import(params: dict, progress) -> dict:
+    # Файл видаляє _run_job після завершення задачі
+    with open(params["path"], "r", encoding="utf-8-sig", newline="") as stream:
+        return import_synonym_records(read_synonym_records(stream, params["format"]), params.get("standard_name"),
+                                      progress=lambda rows, inserted: progress(rows))
+
+
+JOB_HANDLERS = {
+    "generate": _run_generate,
+    "import": _run_import,
+}
+
+
+def _run_job(job_id: int, kind: str, params: dict):
+    progress = _Progress(job_id)
+    try:
+        _update_job(job_id, status=JOB_RUNNING, started_at=time.time())
+        result = JOB_HANDLERS[kind](params, progress)
+        _update_job(job_id, status=JOB_SUCCEEDED, result=json.dumps(result, ensure_ascii=False),
+                    progress_done=progress.done, progress_total=progress.total, finished_at=time.time())
+    except Exception as e:
+        try:
+            _update_job(job_id, status=JOB_FAILED, error=str(e), progress_done=progress.done,
+                        progress_total=progress.total, finished_at=time.time())
+        except Exception as update_error:
+            # Задача перестає подавати сигнал, тож її позначить невдалою fail_interrupted_jobs
+            print(f"Помилка: не вдалося записати стан задачі {job_id}: {update_error}")
+    finally:
+        with _active_jobs_lock:
+            _active_jobs.discard(job_id)
+        if kind == "import":
+            discard_upload(params["path"])
+
+
+def submit_job(kind: str, params: dict) -> int:
+    """
+    Записує задачу в таблицю jobs і ставить її в чергу пулу потоків свого типу.
+    :param kind: Тип задачі (generate або import).
+    :param params: Параметри задачі (мають серіалізуватися в JSON).
+    :return: ID задачі.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Невідомий тип задачі: {kind}. Підтримуються: {', '.join(JOB_HANDLERS)}.")
+
+    _ensure_heartbeat()
+    now = time.time()
+    session = SessionLocal()
+    try:
+        job = Job(kind=kind, status=JOB_QUEUED, params=json.dumps(params, ensure_ascii=False), created_at=now,
+                  owner=_owner(), heartbeat_at=now)
+        session.add(job)
+        session.commit()
+        job_id = job.id
+    finally:
+        session.close()
+
+    with _active_jobs_lock:
+        _active_jobs.add(job_id)
+    _executor(kind).submit(_run_job, job_id, kind, params)
+    return job_id
+
+
+def save_upload(stream, suffix: str) -> str:
+    """
+    Зберігає завантажений файл для фонового імпорту і повертає шлях до нього.
+    """
+    os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(JOB_UPLOAD_DIR, f"{time.time_ns()}-{threading.get_ident()}.{suffix}")
+    with open(path, "wb") as target:
+        while chunk := stream.read(1024 * 1024):
+            target.write(chunk)
+    return path
+
+
+def discard_upload(path: str):
+    """
+    Видаляє завантажений для імпорту файл (після задачі або якщо задачу не вдалося поставити в чергу).
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_job(job_id: int):
+    """
+    Повертає стан задачі (статус, прогрес, результат або помилку) або None, якщо задачі немає.
+    """
+    session = ReadSessionLocal()
+    try:
+        job = session.query(Job).filter_by(id=job_id).first()
+        return _job_to_dict(job) if job else None
+    finally:
+        session.close()
+
+
+def list_jobs(limit: int = 50) -> list:
+    """
+    Повертає останні задачі, новіші першими.
+    """
+    session = ReadSessionLocal()
+    try:
+        return [_job_to_dict(job) for job in session.query(Job).order_by(Job.id.desc()).limit(limit)]
+    finally:
+        session.close()
+
+
+def fail_interrupted_jobs() -> int:
+    """
+    Позначає як невдалі задачі, що лишилися в черзі або виконувалися, коли їхній процес зупинився:
+    процес-власник на цьому хості вже не існує або від нього немає сигналу довше за JOB_HEARTBEAT_TIMEOUT.
+    Задачі живих процесів (інших воркерів сервера) не зачіпаються.
+    Викликається при старті застосунку і періодично з потоку сигналів.
+    :return: Кількість таких задач.
+    """
+    stale_before = time.time() - JOB_HEARTBEAT_TIMEOUT
+    with _active_jobs_lock:
+        own = set(_active_jobs)
+    session = SessionLocal()
+    try:
+        active = session.query(Job.id, Job.owner, Job.heartbeat_at).filter(
+            Job.status.in_((JOB_QUEUED, JOB_RUNNING))).all()
+        interrupted = [job_id for job_id, owner, heartbeat_at in active if job_id not in own and (
+            _owner_is_gone(owner) or heartbeat_at is None or heartbeat_at < stale_before)]
+        if not interrupted:
+            return 0
+        count = session.query(Job).filter(Job.id.in_(interrupted), Job.status.in_((JOB_QUEUED, JOB_RUNNING))).update(
+            {"status": JOB_FAILED, "error": "Задачу перервано: процес, що її виконував, зупинився.",
+             "finished_at": time.time()},
+            synchronize_session=False)
+        session.commit()
+        return count
+    finally:
+        session.close()
@@ -0,0 +1,154 @@
+import base64
+import json
+from typing import NamedTuple
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import aliased
+from medicalgrouplibrary.database import StandardName, AnalysisSynonym, Unit, UnitConversion
+from medicalgrouplibrary.normalization import name_sort_key
+
+# Розмір сторінки за замовчуванням і максимальний
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Верхня межа діапазону для пошуку за префіксом: більша за будь-який символ, що може йти після префікса
+_PREFIX_UPPER_BOUND = "\U0010ffff"
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: str  # None, якщо це остання сторінка
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Кодує позицію останнього рядка сторінки в непрозорий курсор для наступного запиту.
+    """
+    return base64.urlsafe_b64encode(json.dumps(values, ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+
+def _is_row_id(value) -> bool:
+    # bool - підклас int, а значення поза 64-бітним діапазоном SQLite не може порівняти
+    return isinstance(value, int) and not isinstance(value, bool) and -2 ** 63 <= value < 2 ** 63
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Розбирає курсор із size значень: ключі сортування (рядки), за якими йде id останнього рядка (ціле число).
+    Курсор іншої форми - CursorError, а не помилка в запиті.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise CursorError("Некоректний курсор.")
+    if not isinstance(values, list) or len(values) != size or not _is_row_id(values[-1]) \
+            or not all(isinstance(value, str) for value in values[:-1]):
+        raise CursorError("Некоректний курсор.")
+    return values
+
+
+def _page(rows: list, limit: int, to_item, cursor_values) -> Page:
+    """
+    Формує сторінку з limit + 1 вибраних рядків: зайвий рядок лише показує, що є наступна сторінка.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(cursor_values(rows[-1])) if has_more else None
+    return Page([to_item(row) for row in rows], next_cursor)
+
+
+def _check_limit(limit: int) -> int:
+    if not (1 <= limit <= MAX_PAGE_SIZE):
+        raise ValueError(f"Розмір сторінки повинен бути від 1 до {MAX_PAGE_SIZE}.")
+    return limit
+
+
+def _after_id(query, column, cursor: str):
+    if cursor:
+        last_id, = decode_cursor(cursor, 1)
+        query = query.filter(column > last_id)
+    return query
+
+
+def list_standard_names(session, prefix: str = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    Повертає сторінку стандартних імен, упорядкованих за ключем сортування (без урахування регістру).
+    Пошук за префіксом і перехід на наступну сторінку виконуються діапазоном за індексом (sort_key, id),
+    тому вартість сторінки не залежить від розміру словника.
+    :param prefix: Початок назви (без урахування регістру).
+    :param cursor: Курсор із next_cursor попередньої сторінки.
+    :param limit: Розмір сторінки (від 1 до MAX_PAGE_SIZE).
+    """
+    limit = _check_limit(limit)
+    query = session.query(StandardName.id, StandardName.name, StandardName.sort_key)
+    if prefix:
+        key = name_sort_key(prefix)
+        query = query.filter(StandardName.sort_key >= key, StandardName.sort_key < key + _PREFIX_UPPER_BOUND)
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, 2)
+        query = query.filter(or_(StandardName.sort_key > last_key,
+                                 and_(StandardName.sort_key == last_key, StandardName.id > last_id)))
+    rows = query.order_by(StandardName.sort_key, StandardName.id).limit(limit + 1).all()
+    return _page(rows, limit,
+                 lambda row: {"id": row.id, "name": row.name},
+                 lambda row: [row.sort_key, row.id])
+
+
+def list_synonyms(session, standard_name_id: int = None, cursor: str = None,
+                  limit: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    Повертає сторінку синонімів (за зростанням id), за потреби - лише одного стандартного імені.
+    """
+    limit = _check_limit(limit)
+    query = session.query(AnalysisSynonym.id, AnalysisSynonym.synonym, AnalysisSynonym.standard_name_id,
+                          StandardName.name.label("standard_name")).join(AnalysisSynonym.standard_name)
+    if standard_name_id is not None:
+        query = query.filter(AnalysisSynonym.standard_name_id == standard_name_id)
+    rows = _after_id(query, AnalysisSynonym.id, cursor).order_by(AnalysisSynonym.id).limit(limit + 1).all()
+    return _page(rows, limit, lambda row: dict(row._mapping), lambda row: [row.id])
+
+
+def list_units(session, standard_name_id: int = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    Повертає сторінку юнітів (за зростанням id), за потреби - лише одного стандартного імені.
+    """
+    limit = _check_limit(limit)
+    query = session.query(Unit.id, Unit.unit, Unit.standard_name_id, Unit.is_standard)
+    if standard_name_id is not None:
+        query = query.filter(Unit.standard_name_id == standard_name_id)
+    rows = _after_id(query, Unit.id, cursor).order_by(Unit.id).limit(limit + 1).all()
+    return _page(rows, limit, lambda row: {**row._mapping, "is_standard": bool(row.is_standard)}, lambda row: [row.id])
+
+
+def list_conversions(session, standard_name_id: int = None, cursor: str = None,
+                     limit: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    Повертає сторінку конверсій (за зростанням id) з назвами юнітів, за потреби - лише одного стандартного імені.
+    """
+    limit = _check_limit(limit)
+    from_unit, to_unit = aliased(Unit), aliased(Unit)
+    query = session.query(UnitConversion.id, UnitConversion.standard_name_id, UnitConversion.formula,
+                          UnitConversion.from_unit_id, from_unit.unit.label("from_unit"),
+                          UnitConversion.to_unit_id, to_unit.unit.label("to_unit")) \
+        .join(from_unit, UnitConversion.from_unit_id == from_unit.id) \
+        .join(to_unit, UnitConversion.to_unit_id == to_unit.id)
+    if standard_name_id is not None:
+        query = query.filter(UnitConversion.standard_name_id == standard_name_id)
+    rows = _after_id(query, UnitConversion.id, cursor).order_by(UnitConversion.id).limit(limit + 1).all()
+    return _page(rows, limit, lambda row: dict(row._mapping), lambda row: [row.id])
+
+
+def standard_names_page(session, filter_letter: str = None, cursor: str = None) -> Page:
+    """
+    Сторінка стандартних імен для HTML-сторінок зі списком і фільтром за першою літерою.
+    Некоректний курсор - помилка 400.
+    """
+    from fastapi import HTTPException
+
+    try:
+        return list_standard_names(session, prefix=filter_letter, cursor=cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,121 @@
+import threading
+from bisect import bisect_left
+
+# Межі кошиків гістограм тривалості (с): від 0.5 мс до 10 с
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Межі кошиків гістограм кількості (запитів до бази, кандидатів нечіткого пошуку)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000)
+
+# Усі метрики процесу в порядку створення
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Лічильник, що лише зростає, з необов'язковими мітками. Значення міток передаються позиційно
+    в тому ж порядку, що й labelnames.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+                  for labels, value in values]
+        return lines
+
+
+class Histogram:
+    """
+    Гістограма з фіксованими кошиками. observe лише знаходить кошик бінарним пошуком
+    і збільшує два числа, а накопичені суми рахуються під час віддачі метрик.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = LATENCY_BUCKETS, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # мітки -> [кількості по кошиках (+Inf останнім), сума, кількість]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *labelvalues) -> int:
+        with self._lock:
+            state = self._values.get(labelvalues)
+            return state[2] if state else 0
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted((labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (bucket_counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+def render_metrics() -> str:
+    """
+    Повертає всі метрики процесу в текстовому форматі Prometheus (версія 0.0.4).
+    """
+    lines = []
+    for metric in _registry:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+# Метрики HTTP і бази даних (інші модулі оголошують власні метрики поруч зі своїм кодом)
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Тривалість обробки HTTP-запиту.",
+                                 labelnames=("method", "route", "status"))
+HTTP_REQUEST_DB_QUERIES = Histogram("http_request_db_queries", "Кількість SQL-запитів на один HTTP-запит.",
+                                    buckets=COUNT_BUCKETS, labelnames=("route",))
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "Тривалість виконання SQL-запиту.")
@@ -0,0 +1,114 @@
+from sqlalchemy import text, inspect
+from medicalgrouplibrary.normalization import name_sort_key
+
+# Таблиця, у якій зберігається поточна версія схеми бази
+VERSION_TABLE = "schema_version"
+
+# Кількість рядків, які оновлюються за один запит при заповненні нових колонок
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _add_standard_name_sort_key(connection):
+    """
+    Додає до standard_names колонку sort_key і заповнює її для наявних рядків.
+    """
+    if "sort_key" not in {column["name"] for column in inspect(connection).get_columns("standard_names")}:
+        connection.execute(text("ALTER TABLE standard_names ADD COLUMN sort_key VARCHAR"))
+
+    rows = connection.execute(text("SELECT id, name FROM standard_names WHERE sort_key IS NULL")).fetchall()
+    for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        connection.execute(text("UPDATE standard_names SET sort_key = :sort_key WHERE id = :id"),
+                           [{"id": standard_name_id, "sort_key": name_sort_key(name)}
+                            for standard_name_id, name in rows[start:start + BACKFILL_BATCH_SIZE]])
+
+
+def _add_job_owner(connection):
+    """
+    Додає до jobs колонки owner і heartbeat_at (процес-власник задачі та його останній сигнал).
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("jobs")}
+    if "owner" not in columns:
+        connection.execute(text("ALTER TABLE jobs ADD COLUMN owner VARCHAR"))
+    if "heartbeat_at" not in columns:
+        connection.execute(text("ALTER TABLE jobs ADD COLUMN heartbeat_at FLOAT"))
+
+
+# Версіоновані міграції: (версія, опис, інструкції). Інструкція - SQL-рядок або функція (з'єднання) -> None.
+# Нові міграції додаються лише в кінець; інструкції мають бути ідемпотентними, бо база могла бути
+# створена вже з новою схемою через create_all
+MIGRATIONS = [
+    (1, "Індекси для гарячих запитів пошуку синонімів, юнітів і конверсій", [
+        # Пошук за синонімом без стандартного імені (імпорт, get_unification_name); покриває standard_name_id
+        "CREATE INDEX IF NOT EXISTS ix_analysis_synonyms_synonym "
+        "ON analysis_synonyms (synonym, standard_name_id)",
+        # Стандартний юніт аналізу
+        "CREATE INDEX IF NOT EXISTS ix_units_standard_name_id_is_standard "
+        "ON units (standard_name_id, is_standard)",
+        # Пошук юніта за назвою (get_conversions_for_unit)
+        "CREATE INDEX IF NOT EXISTS ix_units_unit ON units (unit)",
+        # Таблиця конверсій аналізу
+        "CREATE INDEX IF NOT EXISTS ix_unit_conversions_standard_name_id "
+        "ON unit_conversions (standard_name_id)",
+    ]),
+    (2, "Ключ сортування стандартних імен для пошуку за префіксом і посторінкового списку", [
+        _add_standard_name_sort_key,
+        "CREATE INDEX IF NOT EXISTS ix_standard_names_sort_key ON standard_names (sort_key, id)",
+    ]),
+    (3, "Власник фонової задачі і час його останнього сигналу", [
+        _add_job_owner,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(connection) -> int:
+    """
+    Повертає версію схеми бази (0 для бази без жодної застосованої міграції).
+    """
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (version INTEGER NOT NULL)"))
+    version = connection.execute(text(f"SELECT MAX(version) FROM {VERSION_TABLE}")).scalar()
+    return version or 0
+
+
+def begin_exclusive(connection):
+    """
+    Починає транзакцію, яка одразу бере блокування запису (BEGIN IMMEDIATE у SQLite), щоб кілька
+    процесів (воркерів сервера), що стартують одночасно, змінювали схему по черзі.
+    Завершується через connection.commit(); без нього транзакція відкочується при закритті з'єднання.
+    """
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def run_migrations(engine) -> list:
+    """
+    Оновлює існуючу базу на місці до останньої версії схеми.
+    Кожна міграція виконується в окремій транзакції з блокуванням запису разом із записом її версії;
+    версія схеми перечитується в тій самій транзакції, тож міграцію, яку вже застосував інший процес,
+    буде пропущено.
+    :param engine: Рушій SQLAlchemy з правом запису.
+    :return: Список версій застосованих міграцій.
+    """
+    applied = []
+    with engine.connect() as connection:
+        current = get_schema_version(connection)
+        connection.commit()
+
+    for version, _description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.connect() as connection:
+            begin_exclusive(connection)
+            if get_schema_version(connection) >= version:
+                continue
+            for statement in statements:
+                if callable(statement):
+                    statement(connection)
+                else:
+                    connection.execute(text(statement))
+            connection.execute(text(f"INSERT INTO {VERSION_TABLE} (version) VALUES (:version)"),
+                               {"version": version})
+            connection.commit()
+        applied.append(version)
+    return applied
@@ -0,0 +1,68 @@
+import numpy as np
+from medicalgrouplibrary.normalization import normalize_name
+
+
+def ngrams(text: str, n: int = 3) -> set:
+    """
+    Повертає множину символьних n-грам нормалізованого рядка (з пробілами на початку і в кінці,
+    щоб враховувати межі слова).
+    :param text: Рядок для розбиття.
+    :param n: Довжина n-грами.
+    """
+    text = f" {normalize_name(text)} "
+    return {text[i:i + n] for i in range(max(1, len(text) - n + 1))}
+
+
+class NgramIndex:
+    """
+    Інвертований індекс символьних n-грам: n-грама -> позиції рядків, у яких вона зустрічається.
+    Рядки тільки додаються в кінець, тому позиції стабільні, а індекс можна доповнювати без перебудови.
+    """
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self.size = 0
+        self._postings = {}  # n-грама -> список позицій
+        self._arrays = {}  # n-грама -> (довжина списку позицій, масив numpy), кеш для підрахунку
+
+    def add(self, text: str):
+        """
+        Додає рядок в кінець індексу.
+        """
+        position = self.size
+        for gram in ngrams(text, self.n):
+            self._postings.setdefault(gram, []).append(position)
+        self.size += 1
+
+    def counts(self, query_grams: set, size: int):
+        """
+        Рахує, скільки n-грам запиту має кожен із перших size рядків індексу.
+        :param query_grams: n-грами запиту (див. ngrams).
+        :param size: Кількість рядків, для яких потрібні лічильники.
+        :return: Масив numpy довжини size.
+        """
+        arrays = []
+        for gram in query_grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                continue
+            cached = self._arrays.get(gram)
+            if cached is None or cached[0] != len(postings):
+                cached = (len(postings), np.array(postings, dtype=np.int64))
+                self._arrays[gram] = cached
+            arrays.append(cached[1])
+        if not arrays:
+            return np.zeros(size, dtype=np.int64)
+        return np.bincount(np.concatenate(arrays), minlength=size)[:size]
+
+
+def top_positions(counts, limit: int, min_shared: int):
+    """
+    Відбирає до limit позицій з найбільшою кількістю спільних n-грам (не менше min_shared).
+    :return: Відсортований за зростанням масив позицій, щоб порядок кандидатів збігався з порядком варіантів.
+    """
+    positions = np.flatnonzero(counts >= min_shared)
+    if len(positions) > limit:
+        positions = positions[np.argpartition(-counts[positions], limit - 1)[:limit]]
+        positions.sort()
+    return positions
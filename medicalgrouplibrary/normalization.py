@@ -0,0 +1,107 @@
+import re
+import unicodedata
+
+# Кириличні літери, які після casefold виглядають як латинські (або є рядковими формами таких великих
+# літер: Н, В, Т, К, М). Зводяться до латинських, щоб "HGB", набране з кириличною "Н", збігалося з латинським.
+HOMOGLYPHS = str.maketrans({
+    "а": "a", "в": "b", "е": "e", "і": "i", "ј": "j", "к": "k", "м": "m", "н": "h",
+    "о": "o", "р": "p", "с": "c", "ѕ": "s", "т": "t", "у": "y", "х": "x",
+})
+
+# Апострофи всередині слова ("обʼєм", "об'єм") прибираються, а не розділяють слово
+APOSTROPHES = str.maketrans("", "", "'`´ʼ’‘")
+
+# Будь-яка послідовність пробілів і розділових знаків замінюється одним пробілом
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize_name(text: str) -> str:
+    """
+    Повертає нормалізований ключ назви аналізу для точного порівняння варіантів написання:
+    NFKC, casefold, згортання кириличних/латинських двійників, згортання пробілів і розділових знаків.
+    Одна й та сама функція застосовується і при побудові індексу, і до вхідного запиту.
+    :param text: Назва аналізу або синонім.
+    :return: Нормалізований ключ (порожній рядок, якщо в назві немає літер чи цифр).
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = text.translate(APOSTROPHES).translate(HOMOGLYPHS)
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+def name_sort_key(text: str) -> str:
+    """
+    Повертає ключ сортування і пошуку за префіксом для стандартного імені: NFKC, casefold, без крайніх пробілів.
+    На відміну від normalize_name, літери не згортаються, тож префікс "Н" (кирилиця) не збігається з "H".
+    :param text: Стандартне ім'я або префікс.
+    :return: Ключ сортування.
+    """
+    return unicodedata.normalize("NFKC", text).casefold().strip()
+
+
+# Кириличні (і латинські транслітеровані) позначення одиниць -> латинські.
+# Застосовуються від довших до коротших, щоб "ммоль" не розпалося на "м" + "моль".
+UNIT_ALIASES = {
+    "мкмоль": "umol", "ммоль": "mmol", "нмоль": "nmol", "пмоль": "pmol", "моль": "mol",
+    "мкг": "ug", "мг": "mg", "нг": "ng", "пг": "pg", "кг": "kg", "г": "g",
+    "мкл": "ul", "мл": "ml", "дл": "dl", "фл": "fl", "л": "l",
+    "мод": "mu", "од": "u", "ед": "u", "мо": "iu", "ме": "iu",
+    "мкмо": "uiu", "мкме": "uiu", "ммо": "miu", "мме": "miu", "мкод": "uu", "мкед": "uu", "мед": "mu",
+    "хв": "min", "год": "h", "сек": "s",
+    "mkmol": "umol", "mcmol": "umol", "mkg": "ug", "mcg": "ug", "mkl": "ul", "mcl": "ul",
+    "units": "u", "unit": "u",
+}
+_UNIT_ALIAS_PATTERN = re.compile("|".join(sorted(map(re.escape, UNIT_ALIASES), key=len, reverse=True)))
+
+# Надрядкові цифри (10⁹) перетворюються на степінь до NFKC, який зробив би з них звичайні цифри ("109")
+_SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")
+_SUPERSCRIPT_POWER = re.compile("([⁰¹²³⁴⁵⁶⁷⁸⁹]+)")
+_POWER = re.compile(r"^[x×*х]?10(?:\*\*|\*|\^|e)(\d+)")
+
+
+def normalize_unit(text: str) -> str:
+    """
+    Повертає нормалізований ключ одиниці вимірювання для порівняння варіантів написання:
+    NFKC, casefold, без пробілів, кирилиця -> латиниця ("мг/дл" -> "mg/dl"), мікро (мк, mc, µ) -> u,
+    "/100мл" -> "/dl", "г%" -> "g/dl", "×10⁹/л" -> "10^9/l".
+    Одна й та сама функція застосовується і до одиниць у базі, і до вхідного рядка.
+    :param text: Одиниця вимірювання.
+    :return: Нормалізований ключ.
+    """
+    text = _SUPERSCRIPT_POWER.sub(lambda match: "^" + match.group(1).translate(_SUPERSCRIPTS), text)
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = re.sub(r"\s+", "", text).replace("μ", "u").replace("per", "/")
+    text = _UNIT_ALIAS_PATTERN.sub(lambda match: UNIT_ALIASES[match.group(0)], text)
+    text = _POWER.sub(r"10^\1", text)
+    text = text.replace("/100ml", "/dl")
+    return re.sub(r"(g)%", r"\1/dl", text)
+
+
+# Префікси SI у нормалізованих ключах одиниць (мк, µ, mc вже зведені до u)
+UNIT_PREFIXES = ("da", "d", "c", "m", "u", "n", "p", "f", "k")
+_UNIT_TOKENS = re.compile(r"[^\W\d_]+|\d+|[\W_]")
+
+
+def _unit_bases(token: str) -> set:
+    bases = {token}
+    for prefix in UNIT_PREFIXES:
+        if token.startswith(prefix) and len(token) > len(prefix):
+            bases.add(token[len(prefix):])
+    return bases
+
+
+def unit_scale_differs(first: str, second: str) -> bool:
+    """
+    Перевіряє, що два нормалізовані ключі одиниць можуть позначати різний масштаб:
+    відрізняються числа ("10^9/l" і "10^6/l") або слово відрізняється лише префіксом SI
+    ("mol/l" і "mmol/l", "iu/ml" і "miu/ml", "mg/l" і "mg/dl"). Такі одиниці не можна
+    зіставляти нечітко: значення відрізнялося б у 10-1000 разів.
+    :param first: Нормалізований ключ одиниці (див. normalize_unit).
+    :param second: Інший нормалізований ключ.
+    """
+    first_tokens, second_tokens = _UNIT_TOKENS.findall(first), _UNIT_TOKENS.findall(second)
+    if [token for token in first_tokens if token.isdigit()] != [token for token in second_tokens if token.isdigit()]:
+        return True
+    if len(first_tokens) != len(second_tokens):
+        return False
+    return any(first_token != second_token and _unit_bases(first_token) & _unit_bases(second_token)
+               for first_token, second_token in zip(first_tokens, second_tokens))
@@ -0,0 +1,75 @@
+from medicalgrouplibrary.unificator import get_unification_names, STATUS_FOUND
+from medicalgrouplibrary.units import get_conversion_tables
+
+# Статуси нормалізації запису
+STATUS_OK = "ok"
+STATUS_NAME_NOT_FOUND = "name_not_found"
+STATUS_UNIT_NOT_FOUND = "unit_not_found"
+STATUS_NO_STANDARD_UNIT = "no_standard_unit"
+STATUS_CONVERSION_NOT_FOUND = "conversion_not_found"
+STATUS_CONVERSION_ERROR = "conversion_error"
+
+
+def _normalization_result(record: dict, result: dict, standard_unit=None, value=None, status: str = STATUS_OK) -> dict:
+    return {
+        "name": record.get("name"),
+        "value": record.get("value"),
+        "unit": record.get("unit"),
+        "standard_name_id": result["standard_name_id"],
+        "standard_name": result["standard_name"],
+        "score": result["score"],
+        "standard_unit": standard_unit,
+        "standard_value": value,
+        "status": status,
+    }
+
+
+def normalize_records(records: list, threshold: float = 80.0) -> list:
+    """
+    Нормалізує рядки результатів аналізів: уніфікує назву, знаходить стандартну одиницю
+    і переводить значення в неї. Усі записи обробляються за одним знімком словника в пам'яті
+    (індекс синонімів і таблиці конверсій), без окремої сесії БД на кожен запис.
+    :param records: Список словників з ключами name, value (може бути None) і unit.
+    :param threshold: Поріг схожості (від 0 до 100) для уніфікації назв.
+    :return: Список словників (name, value, unit, standard_name_id, standard_name, score,
+             standard_unit, standard_value, status) у порядку вхідних записів.
+    """
+    results = get_unification_names([str(record.get("name") or "") for record in records], threshold)
+    tables = get_conversion_tables({result["standard_name_id"] for result in results
+                                    if result["status"] == STATUS_FOUND})
+
+    normalized = []
+    for record, result in zip(records, results):
+        if result["status"] != STATUS_FOUND:
+            normalized.append(_normalization_result(record, result, status=STATUS_NAME_NOT_FOUND))
+            continue
+
+        table = tables[result["standard_name_id"]]
+        if table.standard_unit_id is None:
+            normalized.append(_normalization_result(record, result, status=STATUS_NO_STANDARD_UNIT))
+            continue
+        standard_unit = table.units[table.standard_unit_id]
+
+        unit_id = table.resolve_unit(str(record.get("unit") or ""))
+        if unit_id is None:
+            normalized.append(_normalization_result(record, result, standard_unit, status=STATUS_UNIT_NOT_FOUND))
+            continue
+
+        conversion = table.get(unit_id, table.standard_unit_id)
+        if conversion is None:
+            normalized.append(_normalization_result(record, result, standard_unit,
+                                                    status=STATUS_CONVERSION_NOT_FOUND))
+            continue
+
+        value = record.get("value")
+        if value is not None:
+            try:
+                value = conversion.formula(value)
+            except Exception as e:
+                print(f"Помилка: {e}")
+                normalized.append(_normalization_result(record, result, standard_unit,
+                                                        status=STATUS_CONVERSION_ERROR))
+                continue
+        normalized.append(_normalization_result(record, result, standard_unit, value))
+
+    return normalized
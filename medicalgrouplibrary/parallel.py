@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from medicalgrouplibrary import unificator
+
+# Кількість рядків в одному завданні для процесу-обробника
+PARALLEL_CHUNK_SIZE = int(os.getenv("PARALLEL_CHUNK_SIZE", "5000"))
+
+# Індекс синонімів у процесі-обробнику (передається один раз при запуску процесу)
+_worker_index = None
+
+
+def _init_worker(index):
+    global _worker_index
+    _worker_index = index
+
+
+def _unify_chunk(synonyms: list, threshold: float, workers: int) -> list:
+    return unificator.unify_with_index(_worker_index, synonyms, threshold, workers)
+
+
+class ParallelUnifier:
+    """
+    Пул процесів для уніфікації дуже великих пакетів (нічна звірка історичних даних тощо).
+    Індекс синонімів передається кожному процесу один раз при запуску, а не з кожним завданням;
+    пакет ділиться на частини по chunk_size рядків, результати збираються в порядку вхідних рядків.
+    Пул можна використовувати для багатьох пакетів поспіль, тому його варто тримати відкритим
+    (with ParallelUnifier(...) as unifier: ...). Зміни словника після створення пулу процеси не бачать.
+    """
+
+    def __init__(self, processes: int = None, chunk_size: int = PARALLEL_CHUNK_SIZE, workers: int = 1):
+        """
+        :param processes: Кількість процесів (за замовчуванням - кількість ядер).
+        :param chunk_size: Кількість рядків в одному завданні.
+        :param workers: Кількість потоків rapidfuzz у кожному процесі.
+        """
+        self.generation = unificator.get_dictionary_generation()
+        index = unificator.get_synonym_index()
+        index.warm_up()  # n-грамні індекси будуються один раз тут, а не в кожному процесі
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(max_workers=processes or os.cpu_count(),
+                                             initializer=_init_worker, initargs=(index,))
+
+    def unify(self, synonyms: list, threshold: float = 80.0) -> list:
+        """
+        Повертає результати як get_unification_names для всього пакета.
+        :param synonyms: Список синонімів або можливих уніфікованих імен.
+        :param threshold: Поріг схожості (від 0 до 100), щоб прийняти синонім.
+        """
+        return unificator.unify_cached(synonyms, threshold, lambda queries: self._unify(queries, threshold),
+                                       self.generation)
+
+    def _unify(self, synonyms: list, threshold: float) -> list:
+        chunks = [synonyms[start:start + self.chunk_size] for start in range(0, len(synonyms), self.chunk_size)]
+        results = []
+        # map повертає результати в порядку частин, тому об'єднання детерміноване
+        for chunk_results in self._executor.map(_unify_chunk, chunks, repeat(threshold), repeat(self.workers)):
+            results.extend(chunk_results)
+        return results
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
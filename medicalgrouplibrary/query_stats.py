@@ -0,0 +1,63 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from medicalgrouplibrary.metrics import DB_QUERY_SECONDS
+
+# Лічильник поточного запиту (None - запити до бази не рахуються)
+_current = ContextVar("query_counter", default=None)
+
+
+class QueryCounter:
+    """
+    Кількість і сумарний час SQL-запитів, виконаних у межах count_queries().
+    Об'єкт спільний для всіх потоків, у які передається контекст (обробники def, run_blocking).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started_at")
+    if not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    DB_QUERY_SECONDS.observe(seconds)
+    counter = _current.get()
+    if counter is not None:
+        counter.count += 1
+        counter.seconds += seconds
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # Запит завершився помилкою: after_cursor_execute не буде, тому прибираємо його час початку
+    if context.connection is not None and context.connection.info.get("query_started_at"):
+        context.connection.info["query_started_at"].pop()
+
+
+@contextmanager
+def count_queries():
+    """
+    Рахує SQL-запити всіх рушіїв, виконані всередині блоку (у тому числі в потоках, що успадкували контекст).
+    Тривалість кожного запиту (і всередині блоку, і поза ним) також потрапляє в db_query_duration_seconds.
+
+        with count_queries() as counter:
+            ...
+        print(counter.count, counter.seconds)
+    """
+    counter = QueryCounter()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
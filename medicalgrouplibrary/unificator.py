@@ -1,5 +1,348 @@
+import os
+import threading
+import time
+from typing import NamedTuple
+import numpy as np
 from rapidfuzz import process, fuzz
-from medicalgrouplibrary.database import SessionLocal, AnalysisSynonym, StandardName
+from medicalgrouplibrary.cache import ResultCache
+from medicalgrouplibrary.database import SessionLocal, ReadSessionLocal, AnalysisSynonym, StandardName
+from medicalgrouplibrary.metrics import Counter, Histogram, COUNT_BUCKETS
+from medicalgrouplibrary.normalization import normalize_name
+from medicalgrouplibrary.ngram_index import NgramIndex, ngrams, top_positions
+from medicalgrouplibrary.versions import SharedVersion
+
+# Кількість потоків rapidfuzz для пакетного пошуку (-1 - усі ядра)
+UNIFICATION_WORKERS = int(os.getenv("UNIFICATION_WORKERS", "1"))
+# Максимальна кількість клітинок матриці cdist за один виклик (обмежує пам'ять для великих пакетів)
+CDIST_MAX_CELLS = 10_000_000
+
+# Відбір кандидатів за n-грамами перед нечітким пошуком (компроміс між повнотою і швидкістю):
+# використовується лише для словників з NGRAM_MIN_CHOICES і більше варіантів; до нечіткого пошуку
+# потрапляють NGRAM_SHORTLIST_SIZE варіантів, що мають щонайменше NGRAM_MIN_SHARED спільних триграм із запитом.
+NGRAM_MIN_CHOICES = int(os.getenv("NGRAM_MIN_CHOICES", "5000"))
+NGRAM_SHORTLIST_SIZE = int(os.getenv("NGRAM_SHORTLIST_SIZE", "300"))
+NGRAM_MIN_SHARED = int(os.getenv("NGRAM_MIN_SHARED", "1"))
+
+# Розмір LRU-кешу результатів уніфікації (0 - кеш вимкнено)
+UNIFICATION_CACHE_SIZE = int(os.getenv("UNIFICATION_CACHE_SIZE", "100000"))
+
+# Спосіб, яким знайдено уніфіковане ім'я
+MATCH_EXACT_SYNONYM = "exact_synonym"
+MATCH_EXACT_STANDARD_NAME = "exact_standard_name"
+MATCH_NORMALIZED = "normalized"
+MATCH_FUZZY = "fuzzy_ratio"
+MATCH_PARTIAL = "partial_ratio"
+MATCH_NOT_FOUND = "not_found"
+
+STATUS_FOUND = "found"
+STATUS_NOT_FOUND = "not_found"
+
+# Тип рядка зі словника, з яким збігся запит
+KIND_SYNONYM = "synonym"
+KIND_STANDARD_NAME = "standard_name"
+
+# У скільки разів більше варіантів запитується у process.extract, ніж потрібно кандидатів
+# (кілька синонімів одного уніфікованого імені дають одного кандидата)
+CANDIDATES_OVERSAMPLE = 20
+
+
+class UnificationCandidate(NamedTuple):
+    standard_name_id: int
+    standard_name: str
+    matched_string: str
+    matched_kind: str
+    score: float
+
+
+class SynonymIndex:
+    """
+    Індекс синонімів та уніфікованих імен у пам'яті процесу.
+    Завантажується з бази один раз, а далі оновлюється точково при змінах словника,
+    тому пошук уніфікованого імені не звертається до SQLite.
+    """
+
+    def __init__(self):
+        self.standard_names = {}  # id -> уніфіковане ім'я
+        self.standard_name_ids = {}  # уніфіковане ім'я -> id
+        self.synonyms = {}  # синонім -> id уніфікованого імені (перший доданий)
+        # Нормалізований ключ (normalize_name) -> (id уніфікованого імені, рядок зі словника)
+        self.normalized_synonyms = {}
+        self.normalized_standard_names = {}
+        self._choices = None
+        self._synonym_grams = None  # NgramIndex над синонімами в порядку додавання (будується ліниво)
+        self._standard_name_grams = None  # (список уніфікованих імен, NgramIndex над ним)
+
+    @classmethod
+    def load(cls, session):
+        """
+        Будує індекс з усіх записів таблиць StandardName та AnalysisSynonym.
+        :param session: Сесія бази даних.
+        :return: Заповнений індекс.
+        """
+        index = cls()
+        for standard_name_id, name in session.query(StandardName.id, StandardName.name).order_by(StandardName.id):
+            index.add_standard_name(standard_name_id, name)
+        for standard_name_id, synonym in session.query(AnalysisSynonym.standard_name_id, AnalysisSynonym.synonym)\
+                .order_by(AnalysisSynonym.id):
+            index.add_synonym(standard_name_id, synonym)
+        return index
+
+    @property
+    def choices(self):
+        """
+        Списки для нечіткого пошуку: (синоніми, уніфіковані імена, синоніми + уніфіковані імена).
+        Будуються ліниво і скидаються при кожній зміні індексу. Порядок стабільний (синоніми в порядку
+        додавання, уніфіковані імена за алфавітом), тому при однаковій схожості обирається той самий варіант.
+        """
+        choices = self._choices
+        if choices is None:
+            synonyms_list = list(self.synonyms)
+            standard_names_list = sorted(self.standard_names.values())
+            choices = (synonyms_list, standard_names_list, synonyms_list + standard_names_list)
+            self._choices = choices
+        return choices
+
+    def normalized_match(self, key: str):
+        """
+        Шукає нормалізований ключ серед синонімів, а потім серед уніфікованих імен.
+        :return: (id уніфікованого імені, рядок зі словника) або None.
+        """
+        return self.normalized_synonyms.get(key) or self.normalized_standard_names.get(key)
+
+    def add_standard_name(self, standard_name_id: int, name: str):
+        if standard_name_id not in self.standard_names:
+            self.standard_names[standard_name_id] = name
+            self.standard_name_ids[name] = standard_name_id
+            self._add_normalized(self.normalized_standard_names, name, standard_name_id)
+            self._choices = None
+
+    def add_synonym(self, standard_name_id: int, synonym: str):
+        if synonym not in self.synonyms:
+            self.synonyms[synonym] = standard_name_id
+            self._add_normalized(self.normalized_synonyms, synonym, standard_name_id)
+            if self._synonym_grams is not None:
+                self._synonym_grams.add(synonym)
+            self._choices = None
+
+    def rename_standard_name(self, standard_name_id: int, new_name: str):
+        old_name = self.standard_names.get(standard_name_id)
+        if old_name is not None:
+            self.standard_name_ids.pop(old_name, None)
+        self.standard_names[standard_name_id] = new_name
+        self.standard_name_ids[new_name] = standard_name_id
+        # Нормалізований ключ може бути спільним для кількох імен: старий і новий ключі будуються заново
+        # з імен, що лишилися, так само як у load (перше за id ім'я)
+        for key in {normalize_name(old_name) if old_name is not None else "", normalize_name(new_name)}:
+            if key:
+                self._rebuild_standard_name_key(key)
+        self._choices = None
+
+    def _rebuild_standard_name_key(self, key: str):
+        owners = [(standard_name_id, name) for standard_name_id, name in self.standard_names.items()
+                  if normalize_name(name) == key]
+        if owners:
+            self.normalized_standard_names[key] = min(owners)
+        else:
+            self.normalized_standard_names.pop(key, None)
+
+    def shortlist(self, query: str, standard_names_only: bool = False):
+        """
+        Відбирає кандидатів для нечіткого пошуку за спільними триграмами з запитом.
+        :param query: Рядок запиту.
+        :param standard_names_only: Шукати лише серед уніфікованих імен (інакше - синоніми + уніфіковані імена).
+        :return: Відсортований масив позицій у відповідному списку з choices або None, якщо потрібен
+                 повний перебір (малий словник або жодного кандидата).
+        """
+        synonyms_list, standard_names_list, combined_list = self.choices
+        if len(standard_names_list if standard_names_only else combined_list) < NGRAM_MIN_CHOICES:
+            return None
+
+        query_grams = ngrams(query)
+        counts = self._standard_names_ngrams(standard_names_list).counts(query_grams, len(standard_names_list))
+        if not standard_names_only:
+            synonym_counts = self._synonyms_ngrams().counts(query_grams, len(synonyms_list))
+            counts = np.concatenate((synonym_counts, counts))
+
+        positions = top_positions(counts, NGRAM_SHORTLIST_SIZE, NGRAM_MIN_SHARED)
+        return positions if len(positions) else None
+
+    def warm_up(self):
+        """
+        Заздалегідь будує ліниві структури (списки варіантів, n-грамні індекси), наприклад перед тим,
+        як передати індекс у процеси-обробники.
+        """
+        synonyms_list, standard_names_list, combined_list = self.choices
+        if len(combined_list) >= NGRAM_MIN_CHOICES:
+            self._synonyms_ngrams()
+            self._standard_names_ngrams(standard_names_list)
+
+    def _synonyms_ngrams(self) -> NgramIndex:
+        grams = self._synonym_grams
+        if grams is None:
+            # Будуємо під блокуванням, щоб не пропустити синоніми, додані під час побудови
+            with _index_lock:
+                if self._synonym_grams is None:
+                    grams = NgramIndex()
+                    for synonym in self.synonyms:
+                        grams.add(synonym)
+                    self._synonym_grams = grams
+                grams = self._synonym_grams
+        return grams
+
+    def _standard_names_ngrams(self, standard_names_list: list) -> NgramIndex:
+        cached = self._standard_name_grams
+        if cached is None or cached[0] is not standard_names_list:
+            grams = NgramIndex()
+            for name in standard_names_list:
+                grams.add(name)
+            cached = (standard_names_list, grams)
+            self._standard_name_grams = cached
+        return cached[1]
+
+    @staticmethod
+    def _add_normalized(keys: dict, text: str, standard_name_id: int):
+        key = normalize_name(text)
+        if key:
+            keys.setdefault(key, (standard_name_id, text))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+# Покоління словника: збільшується при кожній зміні синонімів чи уніфікованих імен
+_generation = 0
+
+# Версія словника синонімів у базі: через неї процес дізнається про зміни, зроблені іншими процесами
+_dictionary_version = SharedVersion("synonyms")
+
+# Кеш результатів (вхідний рядок, поріг) -> результат, включно з "не знайдено"
+_result_cache = ResultCache(UNIFICATION_CACHE_SIZE)
+
+# Лічильники запитів до уніфікатора за способом пошуку
+_stats = {
+    "requests": 0,
+    "exact": 0,
+    "fuzzy_skipped": 0,  # запити без точного збігу, яким нормалізований ключ зекономив нечіткий пошук
+    "fuzzy": 0,
+}
+_stats_lock = threading.Lock()
+
+# Метрики Prometheus (див. /metrics)
+UNIFICATION_RESULTS = Counter("unification_results_total",
+                              "Результати уніфікації за способом пошуку (not_found - не знайдено).",
+                              labelnames=("method",))
+FUZZY_SCORING_SECONDS = Histogram("unification_fuzzy_scoring_seconds",
+                                  "Тривалість одного виклику нечіткого оцінювання (extract або cdist).",
+                                  labelnames=("scorer",))
+FUZZY_CANDIDATES = Histogram("unification_fuzzy_candidates",
+                             "Кількість варіантів, які оцінює один виклик нечіткого оцінювання.",
+                             buckets=COUNT_BUCKETS, labelnames=("scorer",))
+
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _observe_scoring(scorer, candidates: int, started: float):
+    labels = (scorer.__name__,)
+    FUZZY_SCORING_SECONDS.observe(time.perf_counter() - started, *labels)
+    FUZZY_CANDIDATES.observe(candidates, *labels)
+
+
+def get_unification_stats() -> dict:
+    """
+    Повертає лічильники запитів уніфікатора: скільки запитів оброблено, скільки знайдено точним збігом,
+    скільки нормалізованим ключем (тобто без нечіткого пошуку) і скільки потребували нечіткого пошуку
+    (включно з відповідями з кешу), а також статистику кешу результатів.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["cache"] = _result_cache.stats()
+    return stats
+
+
+def _drop_index():
+    global _index, _generation
+    with _index_lock:
+        _index = None
+        _generation += 1
+
+
+def _sync_dictionary() -> int:
+    """
+    Відкидає індекс і кеш результатів, якщо словник змінив інший процес, і повертає поточне покоління.
+    """
+    if _dictionary_version.changed():
+        _drop_index()
+    return _generation
+
+
+def get_dictionary_generation() -> int:
+    """
+    Повертає покоління словника синонімів (змінюється після кожного запису, зокрема в інших процесах).
+    """
+    return _sync_dictionary()
+
+
+def get_synonym_index() -> SynonymIndex:
+    """
+    Повертає індекс синонімів процесу, завантажуючи його з бази при першому зверненні
+    або після інвалідації.
+    """
+    global _index
+    _sync_dictionary()
+    index = _index
+    if index is None:
+        with _index_lock:
+            if _index is None:
+                session = ReadSessionLocal()
+                try:
+                    _index = SynonymIndex.load(session)
+                finally:
+                    session.close()
+            index = _index
+    return index
+
+
+def invalidate_synonym_index():
+    """
+    Скидає індекс синонімів; наступний пошук перебудує його з бази.
+    Викликається після змін, які не можна застосувати точково (видалення, імпорт);
+    інші процеси перебудують свої індекси після наступної перевірки версії словника.
+    """
+    _drop_index()
+    _dictionary_version.bump()
+
+
+def register_synonym(standard_name_id: int, standard_name: str, synonym: str):
+    """
+    Додає до завантаженого індексу новий синонім (і його уніфіковане ім'я) без перечитування бази.
+    :param standard_name_id: ID уніфікованого імені.
+    :param standard_name: Уніфіковане ім'я.
+    :param synonym: Доданий синонім.
+    """
+    global _generation
+    with _index_lock:
+        if _index is not None:
+            _index.add_standard_name(standard_name_id, standard_name)
+            _index.add_synonym(standard_name_id, synonym)
+        _generation += 1
+    _dictionary_version.bump()
+
+
+def rename_indexed_standard_name(standard_name_id: int, new_name: str):
+    """
+    Оновлює уніфіковане ім'я в завантаженому індексі після перейменування.
+    :param standard_name_id: ID уніфікованого імені.
+    :param new_name: Нове уніфіковане ім'я.
+    """
+    global _generation
+    with _index_lock:
+        if _index is not None:
+            _index.rename_standard_name(standard_name_id, new_name)
+        _generation += 1
+    _dictionary_version.bump()
 
 
 def add_synonym(standard_name: str, synonym: str):
@@ -31,10 +374,121 @@ def add_synonym(standard_name: str, synonym: str):
     synonym_entry = AnalysisSynonym(standard_name_id=standard_name_entry.id, synonym=synonym)
     session.add(synonym_entry)
     session.commit()
+    register_synonym(standard_name_entry.id, standard_name_entry.name, synonym)
     print(f"Синонім '{synonym}' додано для '{standard_name}'.")
 
     session.close()
 
+def _unification_result(synonym: str, standard_name_id=None, standard_name=None, match=None, score=None,
+                        method=MATCH_NOT_FOUND):
+    """
+    Формує результат пошуку уніфікованого імені у вигляді словника.
+    """
+    return {
+        "input": synonym,
+        "standard_name_id": standard_name_id,
+        "standard_name": standard_name,
+        "match": match,
+        "score": score,
+        "method": method,
+        "status": STATUS_FOUND if standard_name is not None else STATUS_NOT_FOUND,
+    }
+
+
+def _exact_match(index: SynonymIndex, synonym: str):
+    """
+    Перевіряє точний збіг із синонімом або уніфікованим іменем.
+    :return: Результат пошуку або None, якщо точного збігу немає.
+    """
+    # Перевірка на точний збіг для синоніма
+    standard_name_id = index.synonyms.get(synonym)
+    if standard_name_id is not None:
+        return _found(index, synonym, standard_name_id, synonym, 100.0, MATCH_EXACT_SYNONYM)
+
+    # Перевірка на точний збіг для уніфікованого імені (якщо це можливе введення)
+    standard_name_id = index.standard_name_ids.get(synonym)
+    if standard_name_id is not None:
+        return _found(index, synonym, standard_name_id, synonym, 100.0, MATCH_EXACT_STANDARD_NAME)
+
+    # Перевірка на збіг нормалізованого ключа (регістр, пробіли, розділові знаки, кирилиця/латиниця)
+    normalized = index.normalized_match(normalize_name(synonym))
+    if normalized is not None:
+        standard_name_id, match = normalized
+        return _found(index, synonym, standard_name_id, match, 100.0, MATCH_NORMALIZED)
+
+    return None
+
+
+def _found(index: SynonymIndex, synonym: str, standard_name_id: int, match: str, score: float, method: str):
+    return _unification_result(synonym, standard_name_id, index.standard_names.get(standard_name_id), match, score,
+                               method)
+
+
+def _choice_standard_name_id(index: SynonymIndex, match: str, is_synonym: bool):
+    """
+    Повертає id уніфікованого імені для варіанту зі списку choices (синоніма або уніфікованого імені).
+    """
+    return index.synonyms.get(match) if is_synonym else index.standard_name_ids.get(match)
+
+
+def _ratio_match(index: SynonymIndex, synonym: str, match: str, score: float, is_synonym: bool, threshold: float):
+    """
+    Перетворює найкращий збіг fuzz.ratio серед синонімів і уніфікованих імен на результат,
+    якщо схожість досягає порогу.
+    """
+    if score < threshold:
+        return None
+    # Якщо знайдено схоже значення, повертаємо тільки уніфіковане ім'я
+    return _found(index, synonym, _choice_standard_name_id(index, match, is_synonym), match, score, MATCH_FUZZY)
+
+
+def _extract_one(query: str, choices: list, positions, scorer):
+    """
+    process.extractOne по всіх варіантах або лише по відібраних позиціях (див. SynonymIndex.shortlist).
+    :return: (варіант, оцінка, позиція варіанту в повному списку).
+    """
+    started = time.perf_counter()
+    if positions is None:
+        result = process.extractOne(query, choices, scorer=scorer)
+        _observe_scoring(scorer, len(choices), started)
+        return result
+    match, score, local_position = process.extractOne(query, [choices[p] for p in positions], scorer=scorer)
+    _observe_scoring(scorer, len(positions), started)
+    return match, score, int(positions[local_position])
+
+
+def _resolve_unification(index: SynonymIndex, synonym: str, threshold: float) -> dict:
+    """
+    Шукає уніфіковане ім'я для одного рядка: точний збіг, fuzz.ratio по синонімах і уніфікованих
+    іменах, fuzz.partial_ratio по уніфікованих іменах.
+    """
+    result = _exact_match(index, synonym)
+    if result is not None:
+        return result
+
+    # Списки синонімів і стандартних імен для пошуку вже підготовлені в індексі
+    all_synonyms_list, all_standard_names_list, combined_list = index.choices
+    best_score = None
+
+    # Шукаємо найбільш схожий синонім або стандартне ім'я
+    if combined_list:
+        match, best_score, position = _extract_one(synonym, combined_list, index.shortlist(synonym), fuzz.ratio)
+        result = _ratio_match(index, synonym, match, best_score, position < len(all_synonyms_list), threshold)
+        if result is not None:
+            return result
+
+    # Якщо синонім не знайдено, шукаємо найбільш схожі уніфіковані імена за частинами тексту
+    if all_standard_names_list:
+        partial_match, partial_score, _ = _extract_one(synonym, all_standard_names_list,
+                                                       index.shortlist(synonym, standard_names_only=True),
+                                                       fuzz.partial_ratio)
+        if partial_score >= threshold:
+            return _found(index, synonym, index.standard_name_ids.get(partial_match), partial_match, partial_score,
+                          MATCH_PARTIAL)
+
+    return _unification_result(synonym, score=best_score)
+
+
 def get_unification_name(synonym: str, threshold: float = 80.0) -> str:
     """
     Повертає уніфіковане ім'я для заданого синоніму або найбільш схоже значення,
@@ -43,52 +497,253 @@ def get_unification_name(synonym: str, threshold: float = 80.0) -> str:
     :param threshold: Поріг схожості (від 0 до 100), щоб прийняти синонім.
     :return: Уніфіковане ім'я або повідомлення про відсутність.
     """
-    session = SessionLocal()
     try:
-        # Перевірка на точний збіг для синоніма
-        synonym_entry = session.query(AnalysisSynonym).filter_by(synonym=synonym).first()
-        if synonym_entry:
-            return synonym_entry.standard_name.name  # Повертаємо стандартне ім'я
+        generation = _sync_dictionary()
+        result = _result_cache.get((synonym, threshold), generation)
+        if result is None:
+            result = _resolve_unification(get_synonym_index(), synonym, threshold)
+            _result_cache.put((synonym, threshold), result, generation)
+        _count_results([result])
+
+        if result["status"] == STATUS_FOUND:
+            return result["standard_name"]
 
-        # Перевірка на точний збіг для уніфікованого імені (якщо це можливе введення)
-        standard_entry = session.query(StandardName).filter_by(name=synonym).first()
-        if standard_entry:
-            return standard_entry.name  # Повертаємо саме стандартне ім'я
+        return f"Синонім '{synonym}' не знайдено в базі та немає подібних варіантів."
+    except Exception as e:
+        print(f"Помилка: {e}")
+        return "Сталася помилка при пошуку уніфікованого імені."
+
+
+def _extract_candidates(index: SynonymIndex, text: str, choices: list, positions, scorer, threshold: float,
+                        limit: int):
+    """
+    Один прохід process.extract з score_cutoff по всіх варіантах або лише по відібраних позиціях.
+    :return: Список (варіант, оцінка, позиція в повному списку), відсортований за спаданням оцінки.
+    """
+    started = time.perf_counter()
+    if positions is None:
+        matches = process.extract(text, choices, scorer=scorer, score_cutoff=threshold, limit=limit)
+        _observe_scoring(scorer, len(choices), started)
+        return matches
+    matches = process.extract(text, [choices[p] for p in positions], scorer=scorer, score_cutoff=threshold,
+                              limit=limit)
+    _observe_scoring(scorer, len(positions), started)
+    return [(match, score, int(positions[local_position])) for match, score, local_position in matches]
+
+
+def get_unification_candidates(text: str, k: int = 5, threshold: float = 80.0) -> list:
+    """
+    Повертає до k найкращих кандидатів уніфікованого імені з оцінками - і для автоматичного зіставлення
+    (перший кандидат збігається з результатом get_unification_name), і для ручної перевірки.
+    Кожне уніфіковане ім'я зустрічається у списку один раз, з найкращим рядком, що з ним збігся.
+    :param text: Синонім або можливе уніфіковане ім'я.
+    :param k: Максимальна кількість кандидатів.
+    :param threshold: Мінімальна схожість (від 0 до 100) для кандидата.
+    :return: Список UnificationCandidate, відсортований за спаданням оцінки.
+    """
+    index = get_synonym_index()
+    all_synonyms_list, all_standard_names_list, combined_list = index.choices
+    candidates = {}  # id уніфікованого імені -> кандидат
 
-        # Отримуємо всі синоніми та уніфіковані імена з бази
-        all_synonyms = session.query(AnalysisSynonym.synonym).all()
-        all_standard_names = session.query(StandardName.name).all()
+    def add_candidate(standard_name_id, match, kind, score):
+        if standard_name_id is not None and standard_name_id not in candidates and len(candidates) < k:
+            candidates[standard_name_id] = UnificationCandidate(
+                standard_name_id, index.standard_names.get(standard_name_id), match, kind, score)
 
-        all_synonyms_list = [item[0] for item in all_synonyms]
-        all_standard_names_list = [item[0] for item in all_standard_names]
+    _count("requests")
+    exact = _exact_match(index, text)
+    if exact is not None:
+        _count("fuzzy_skipped" if exact["method"] == MATCH_NORMALIZED else "exact")
+        kind = KIND_STANDARD_NAME if exact["method"] == MATCH_EXACT_STANDARD_NAME else KIND_SYNONYM
+        add_candidate(exact["standard_name_id"], exact["match"], kind, exact["score"])
+    else:
+        _count("fuzzy")
 
-        # Об'єднуємо списки синонімів і стандартних імен для пошуку
-        combined_list = all_synonyms_list + all_standard_names_list
+    limit = k * CANDIDATES_OVERSAMPLE
+    if combined_list and len(candidates) < k:
+        for match, score, position in _extract_candidates(index, text, combined_list, index.shortlist(text),
+                                                          fuzz.ratio, threshold, limit):
+            is_synonym = position < len(all_synonyms_list)
+            add_candidate(_choice_standard_name_id(index, match, is_synonym), match,
+                          KIND_SYNONYM if is_synonym else KIND_STANDARD_NAME, score)
 
-        # Шукаємо найбільш схожий синонім або стандартне ім'я
-        match, score, _ = process.extractOne(synonym, combined_list, scorer=fuzz.ratio)
+    # Як і в get_unification_name, пошук за частинами тексту - лише коли повних збігів немає
+    if all_standard_names_list and not candidates:
+        for match, score, _ in _extract_candidates(index, text, all_standard_names_list,
+                                                   index.shortlist(text, standard_names_only=True),
+                                                   fuzz.partial_ratio, threshold, limit):
+            add_candidate(index.standard_name_ids.get(match), match, KIND_STANDARD_NAME, score)
 
-        if score >= threshold:
-            # Якщо знайдено схоже значення, повертаємо тільки уніфіковане ім'я
-            if match in all_synonyms_list:
-                matched_entry = session.query(AnalysisSynonym).filter_by(synonym=match).first()
+    return list(candidates.values())
+
+
+def _cdist_best(queries: list, choices: list, scorer, workers: int):
+    """
+    Оцінює всі запити проти всіх варіантів одним викликом process.cdist (частинами, щоб обмежити
+    розмір матриці) і повертає для кожного запиту позицію та оцінку найкращого варіанту.
+    При однаковій оцінці обирається перший варіант, як і в process.extractOne.
+    """
+    positions, scores = [], []
+    rows_per_chunk = max(1, CDIST_MAX_CELLS // len(choices))
+    for start in range(0, len(queries), rows_per_chunk):
+        started = time.perf_counter()
+        # float64, як у extractOne: з float32 оцінки пакета відрізнялися б від оцінок окремого запиту
+        matrix = process.cdist(queries[start:start + rows_per_chunk], choices, scorer=scorer, dtype=np.float64,
+                               workers=workers)
+        _observe_scoring(scorer, len(choices), started)
+        best = matrix.argmax(axis=1)
+        positions.extend(best.tolist())
+        scores.extend(matrix[np.arange(len(best)), best].tolist())
+    return positions, scores
+
+
+def _best_matches(index: SynonymIndex, queries: list, choices: list, standard_names_only: bool, scorer,
+                  workers: int):
+    """
+    Знаходить найкращий варіант для кожного запиту. Запити, для яких n-грамний індекс відібрав кандидатів,
+    оцінюються лише по своїх кандидатах (як у get_unification_name, тому результат не залежить від складу
+    пакета); решта оцінюються по всіх варіантах одним викликом cdist.
+    :return: (позиції в choices, оцінки) у порядку запитів.
+    """
+    positions, scores = [None] * len(queries), [None] * len(queries)
+    full_scan = []
+    for i, query in enumerate(queries):
+        shortlist = index.shortlist(query, standard_names_only)
+        if shortlist is None:
+            full_scan.append(i)
+        else:
+            _, scores[i], positions[i] = _extract_one(query, choices, shortlist, scorer)
+
+    if full_scan:
+        best_positions, best_scores = _cdist_best([queries[i] for i in full_scan], choices, scorer, workers)
+        for i, position, score in zip(full_scan, best_positions, best_scores):
+            positions[i], scores[i] = position, score
+    return positions, scores
+
+
+def _count_results(results: list):
+    """
+    Додає результати пакетного пошуку до лічильників уніфікатора.
+    """
+    exact = sum(result["method"] in (MATCH_EXACT_SYNONYM, MATCH_EXACT_STANDARD_NAME) for result in results)
+    normalized = sum(result["method"] == MATCH_NORMALIZED for result in results)
+    with _stats_lock:
+        _stats["requests"] += len(results)
+        _stats["exact"] += exact
+        _stats["fuzzy_skipped"] += normalized
+        _stats["fuzzy"] += len(results) - exact - normalized
+    if len(results) == 1:
+        UNIFICATION_RESULTS.inc(results[0]["method"])
+    else:
+        methods = {}
+        for result in results:
+            methods[result["method"]] = methods.get(result["method"], 0) + 1
+        for method, amount in methods.items():
+            UNIFICATION_RESULTS.inc(method, amount=amount)
+
+
+def unify_with_index(index: SynonymIndex, synonyms: list, threshold: float, workers: int) -> list:
+    """
+    Пакетний пошук уніфікованих імен по заданому індексу (без звернення до бази та без лічильників).
+    Використовується get_unification_names і процесами-обробниками ParallelUnifier.
+    """
+    all_synonyms_list, all_standard_names_list, combined_list = index.choices
+
+    results = [None] * len(synonyms)
+    pending = {}  # рядок без точного збігу -> позиції у вхідному списку
+    for position, synonym in enumerate(synonyms):
+        result = _exact_match(index, synonym)
+        if result is not None:
+            results[position] = result
+        else:
+            pending.setdefault(synonym, []).append(position)
+
+    queries = list(pending)
+    best_scores = {}
+    partial_queries = queries
+    if queries and combined_list:
+        positions, scores = _best_matches(index, queries, combined_list, False, fuzz.ratio, workers)
+        partial_queries = []
+        for query, position, score in zip(queries, positions, scores):
+            best_scores[query] = score
+            result = _ratio_match(index, query, combined_list[position], score, position < len(all_synonyms_list),
+                                  threshold)
+            if result is None:
+                partial_queries.append(query)
             else:
-                matched_entry = session.query(StandardName).filter_by(name=match).first()
+                for input_position in pending[query]:
+                    results[input_position] = dict(result)
 
-            return matched_entry.name if isinstance(matched_entry, StandardName) else matched_entry.standard_name.name
+    if partial_queries and all_standard_names_list:
+        positions, scores = _best_matches(index, partial_queries, all_standard_names_list, True,
+                                          fuzz.partial_ratio, workers)
+        for query, position, score in zip(partial_queries, positions, scores):
+            if score >= threshold:
+                partial_match = all_standard_names_list[position]
+                for input_position in pending[query]:
+                    results[input_position] = _found(index, query, index.standard_name_ids.get(partial_match),
+                                                     partial_match, score, MATCH_PARTIAL)
 
-        # Якщо синонім не знайдено, шукаємо найбільш схожі уніфіковані імена за частинами тексту
-        partial_match, partial_score, _ = process.extractOne(synonym, all_standard_names_list, scorer=fuzz.partial_ratio)
+    for query, input_positions in pending.items():
+        for input_position in input_positions:
+            if results[input_position] is None:
+                results[input_position] = _unification_result(query, score=best_scores.get(query))
 
-        if partial_score >= threshold:
-            # Якщо знайдено схоже уніфіковане ім'я, повертаємо його
-            partial_entry = session.query(StandardName).filter_by(name=partial_match).first()
-            return partial_entry.name
+    return results
 
-        return f"Синонім '{synonym}' не знайдено в базі та немає подібних варіантів."
-    except Exception as e:
-        print(f"Помилка: {e}")
-        return "Сталася помилка при пошуку уніфікованого імені."
-    finally:
-        session.close()
 
+def unify_cached(synonyms: list, threshold: float, unify, generation: int = None) -> list:
+    """
+    Пакетний пошук через кеш результатів: unify викликається лише для унікальних рядків, яких немає в кеші.
+    :param synonyms: Список синонімів або можливих уніфікованих імен.
+    :param threshold: Поріг схожості (від 0 до 100), щоб прийняти синонім.
+    :param unify: Функція (список рядків) -> список результатів, див. unify_with_index.
+    :param generation: Покоління словника, для якого unify дає результати (за замовчуванням - поточне).
+    :return: Список результатів у порядку вхідних рядків.
+    """
+    if generation is None:
+        generation = _sync_dictionary()
+    results = [None] * len(synonyms)
+    misses = {}  # рядок, якого немає в кеші -> позиції у вхідному списку
+    for position, synonym in enumerate(synonyms):
+        cached = _result_cache.get((synonym, threshold), generation)
+        if cached is not None:
+            results[position] = dict(cached)
+        else:
+            misses.setdefault(synonym, []).append(position)
+
+    if misses:
+        for synonym, result in zip(misses, unify(list(misses))):
+            _result_cache.put((synonym, threshold), result, generation)
+            for position in misses[synonym]:
+                results[position] = dict(result)
+
+    _count_results(results)
+    return results
+
+
+def get_unification_names(synonyms: list, threshold: float = 80.0, workers: int = None, processes: int = 1) -> list:
+    """
+    Повертає уніфіковані імена для списку синонімів (наприклад, для цілої панелі аналізів).
+    Семантика така сама, як у get_unification_name, але нечіткий пошук виконується для всього
+    списку разом через process.cdist.
+    :param synonyms: Список синонімів або можливих уніфікованих імен.
+    :param threshold: Поріг схожості (від 0 до 100), щоб прийняти синонім.
+    :param workers: Кількість потоків rapidfuzz для cdist (-1 - усі ядра). За замовчуванням UNIFICATION_WORKERS.
+    :param processes: Кількість процесів для дуже великих пакетів (див. ParallelUnifier); 1 - без пулу процесів.
+    :return: Список словників (input, standard_name_id, standard_name, match, score, method, status)
+             у порядку вхідних рядків.
+    """
+    if workers is None:
+        workers = UNIFICATION_WORKERS
+
+    if processes > 1:
+        from medicalgrouplibrary.parallel import ParallelUnifier
+
+        with ParallelUnifier(processes, workers=workers) as unifier:
+            return unifier.unify(synonyms, threshold)
+
+    generation = _sync_dictionary()
+    index = get_synonym_index()
+    return unify_cached(synonyms, threshold, lambda queries: unify_with_index(index, queries, threshold, workers),
+                        generation)
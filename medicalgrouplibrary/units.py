@@ -1,5 +1,271 @@
-from medicalgrouplibrary.database import SessionLocal, Unit, UnitConversion, StandardName
+import logging
+import os
+import threading
+from collections import deque
+from typing import NamedTuple
+import numpy as np
+from rapidfuzz import process, fuzz
+from medicalgrouplibrary.database import SessionLocal, ReadSessionLocal, Unit, UnitConversion, StandardName
+from medicalgrouplibrary.formulas import compile_formula, CompiledFormula, FormulaError, VARIABLE
+from medicalgrouplibrary.metrics import Counter
+from medicalgrouplibrary.normalization import normalize_unit, unit_scale_differs
+from medicalgrouplibrary.versions import SharedVersion
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+# Мінімальна схожість (від 0 до 100) нормалізованої одиниці для нечіткого зіставлення.
+# Високий поріг, бо короткі одиниці легко сплутати ("mg/l" і "mg/dl" мають схожість 89).
+UNIT_FUZZY_THRESHOLD = float(os.getenv("UNIT_FUZZY_THRESHOLD", "90"))
+# Скільки результатів нечіткого зіставлення одиниць зберігати для кожного стандартного імені
+UNIT_FUZZY_CACHE_SIZE = int(os.getenv("UNIT_FUZZY_CACHE_SIZE", "1000"))
+
+# Результати конверсій за функцією і результатом (для /metrics); для пакетних функцій рахуються значення
+CONVERSION_RESULTS = Counter("unit_conversions_total", "Результати конверсій одиниць.",
+                             labelnames=("function", "outcome"))
+CONVERSION_OK = "ok"
+CONVERSION_UNIT_NOT_FOUND = "unit_not_found"
+CONVERSION_NO_PATH = "no_path"
+CONVERSION_FORMULA_ERROR = "formula_error"
+CONVERSION_ERROR = "error"
+
+logger = logging.getLogger(__name__)
+
+# Скомпільовані формули конверсій за UnitConversion.id
+_compiled_formulas = {}
+
+
+def get_compiled_formula(conversion: UnitConversion):
+    """
+    Повертає скомпільовану формулу конверсії, компілюючи її лише при першому зверненні.
+    :param conversion: Запис UnitConversion.
+    :return: CompiledFormula.
+    :raises FormulaError: Якщо збережена формула некоректна.
+    """
+    compiled = _compiled_formulas.get(conversion.id)
+    # Порівнюємо текст, бо після видалення SQLite може повторно використати той самий id
+    if compiled is None or compiled.source != conversion.formula:
+        compiled = compile_formula(conversion.formula)
+        _compiled_formulas[conversion.id] = compiled
+    return compiled
+
+
+class Conversion(NamedTuple):
+    """
+    Готова конверсія між двома одиницями: одна скомпільована формула і шлях,
+    з якого вона складена (список (from_unit_id, to_unit_id, формула)).
+    """
+    formula: CompiledFormula
+    path: list
+
+
+class ConversionTable:
+    """
+    Таблиця конверсій одного стандартного імені: для кожної пари досяжних одиниць
+    зберігається одна скомпонована формула. Будується один раз з прямих конверсій
+    та їх обернених формул, тому конверсія зводиться до пошуку в словнику й одного обчислення.
+    """
+
+    def __init__(self, standard_name_id: int):
+        self.standard_name_id = standard_name_id
+        self.units = {}  # id -> назва одиниці
+        self.unit_ids = {}  # назва одиниці -> id
+        self.standard_unit_id = None
+        self.unit_aliases = {}  # нормалізована одиниця (див. normalize_unit) -> id
+        self.conversions = {}  # (from_unit_id, to_unit_id) -> Conversion
+        self._fuzzy_units = {}  # вхідний рядок -> id або None, результати нечіткого зіставлення
+
+    @classmethod
+    def load(cls, session, standard_name_id: int):
+        """
+        Завантажує одиниці та конверсії стандартного імені і будує транзитивне замикання.
+        """
+        return cls.load_many(session, [standard_name_id])[standard_name_id]
+
+    @classmethod
+    def load_many(cls, session, standard_name_ids) -> dict:
+        """
+        Завантажує таблиці кількох стандартних імен двома запитами.
+        :return: Словник {standard_name_id: ConversionTable}.
+        """
+        tables = {standard_name_id: cls(standard_name_id) for standard_name_id in standard_name_ids}
+        units = session.query(Unit).filter(Unit.standard_name_id.in_(tables)).order_by(Unit.id)
+        for unit in units:
+            table = tables[unit.standard_name_id]
+            table.units[unit.id] = unit.unit
+            table.unit_ids.setdefault(unit.unit, unit.id)
+            table.unit_aliases.setdefault(normalize_unit(unit.unit), unit.id)
+            if unit.is_standard and table.standard_unit_id is None:
+                table.standard_unit_id = unit.id
+
+        conversions = {standard_name_id: [] for standard_name_id in tables}
+        for conversion in session.query(UnitConversion).filter(UnitConversion.standard_name_id.in_(tables)) \
+                .order_by(UnitConversion.id):
+            conversions[conversion.standard_name_id].append(conversion)
+        for standard_name_id, table in tables.items():
+            table._build(conversions[standard_name_id])
+        return tables
+
+    def _build(self, conversions):
+        # Граф: спочатку прямі ребра (як у збережених конверсіях), потім обернені,
+        # якщо для цієї пари немає власної прямої конверсії
+        graph = {unit_id: [] for unit_id in self.units}
+        direct = set()
+        for conversion in conversions:
+            if conversion.from_unit_id not in graph or conversion.to_unit_id not in graph:
+                continue
+            try:
+                compiled = get_compiled_formula(conversion)
+            except FormulaError as e:
+                # Збережена формула, яку не приймає безпечний розбір (наприклад, з round чи abs):
+                # конверсія недоступна, доки формулу не виправлять
+                logger.error("Конверсію %s (%s -> %s) виключено з графа конверсій стандартного імені %s: %s",
+                             conversion.id, self.units[conversion.from_unit_id], self.units[conversion.to_unit_id],
+                             self.standard_name_id, e)
+                continue
+            graph[conversion.from_unit_id].append((conversion.to_unit_id, compiled))
+            direct.add((conversion.from_unit_id, conversion.to_unit_id))
+
+        for from_unit_id in list(graph):
+            for to_unit_id, compiled in list(graph[from_unit_id]):
+                inverse = compiled.inverse
+                if inverse is not None and (to_unit_id, from_unit_id) not in direct:
+                    graph[to_unit_id].append((from_unit_id, inverse))
+                    direct.add((to_unit_id, from_unit_id))
+
+        # BFS з кожної одиниці, компонуючи формули вздовж найкоротшого шляху
+        identity = compile_formula(VARIABLE)
+        for start in graph:
+            self.conversions[(start, start)] = Conversion(identity, [])
+            queue = deque([start])
+            while queue:
+                current = queue.popleft()
+                reached = self.conversions[(start, current)]
+                for neighbor, compiled in graph[current]:
+                    if (start, neighbor) in self.conversions:
+                        continue
+                    self.conversions[(start, neighbor)] = Conversion(
+                        reached.formula.then(compiled),
+                        reached.path + [(current, neighbor, compiled.source)],
+                    )
+                    queue.append(neighbor)
+
+    def get(self, from_unit_id: int, to_unit_id: int):
+        """
+        Повертає Conversion між одиницями або None, якщо шляху між ними немає.
+        """
+        return self.conversions.get((from_unit_id, to_unit_id))
+
+    def unit_id(self, unit):
+        """
+        Повертає id одиниці цього стандартного імені за id або рядком одиниці (див. resolve_unit).
+        """
+        if isinstance(unit, str):
+            return self.resolve_unit(unit)
+        return unit if unit in self.units else None
+
+    def resolve_unit(self, unit: str):
+        """
+        Знаходить id одиниці за довільним написанням: спочатку точний збіг, потім нормалізований
+        ключ (обидва - пошук у словнику), і лише потім нечітке зіставлення нормалізованих ключів,
+        яке не приймає одиниць іншого масштабу (див. unit_scale_differs).
+        :return: id одиниці або None, якщо одиницю не знайдено або збіг неоднозначний.
+        """
+        unit_id = self.unit_ids.get(unit)
+        if unit_id is not None:
+            return unit_id
+        key = normalize_unit(unit)
+        unit_id = self.unit_aliases.get(key)
+        if unit_id is not None or not key:
+            return unit_id
+
+        if key in self._fuzzy_units:
+            return self._fuzzy_units[key]
+        # Одиниця, що відрізняється лише префіксом чи степенем ("mol/l" і "mmol/l"), - інша одиниця, а не опечатка
+        matches = [match for match in process.extract(key, list(self.unit_aliases), scorer=fuzz.ratio,
+                                                      score_cutoff=UNIT_FUZZY_THRESHOLD, limit=None)
+                   if not unit_scale_differs(key, match[0])][:2]
+        if matches and (len(matches) == 1 or matches[0][1] > matches[1][1]):
+            unit_id = self.unit_aliases[matches[0][0]]
+        if len(self._fuzzy_units) >= UNIT_FUZZY_CACHE_SIZE:
+            self._fuzzy_units.clear()
+        self._fuzzy_units[key] = unit_id
+        return unit_id
+
+
+# Кеш таблиць конверсій за standard_name_id
+_conversion_tables = {}
+_conversion_tables_lock = threading.Lock()
+
+# Версія одиниць і конверсій у базі: через неї процес дізнається про зміни, зроблені іншими процесами
+_units_version = SharedVersion("units")
+
+
+def _sync_conversion_tables():
+    # Викликається під _conversion_tables_lock
+    if _units_version.changed():
+        _conversion_tables.clear()
+
+
+def get_conversion_table(standard_name_id: int) -> ConversionTable:
+    """
+    Повертає таблицю конверсій стандартного імені, будуючи її при першому зверненні.
+    :param standard_name_id: ID стандартного імені.
+    """
+    with _conversion_tables_lock:
+        _sync_conversion_tables()
+        table = _conversion_tables.get(standard_name_id)
+        if table is None:
+            session = ReadSessionLocal()
+            try:
+                table = ConversionTable.load(session, standard_name_id)
+            finally:
+                session.close()
+            _conversion_tables[standard_name_id] = table
+        return table
+
+
+def get_conversion_tables(standard_name_ids) -> dict:
+    """
+    Повертає таблиці конверсій для кількох стандартних імен; відсутні в кеші таблиці
+    завантажуються разом однією сесією.
+    :param standard_name_ids: Ітерабельний набір ID стандартних імен.
+    :return: Словник {standard_name_id: ConversionTable}.
+    """
+    with _conversion_tables_lock:
+        _sync_conversion_tables()
+        missing = {standard_name_id for standard_name_id in standard_name_ids
+                   if standard_name_id not in _conversion_tables}
+        if missing:
+            session = ReadSessionLocal()
+            try:
+                _conversion_tables.update(ConversionTable.load_many(session, missing))
+            finally:
+                session.close()
+        return {standard_name_id: _conversion_tables[standard_name_id] for standard_name_id in standard_name_ids}
+
+
+def resolve_unit(unit: str, standard_name_id: int):
+    """
+    Повертає id одиниці стандартного імені за довільним написанням ("mg/dL ", "мг/дл", "мг/100мл").
+    :param unit: Одиниця вимірювання у вигляді рядка.
+    :param standard_name_id: ID стандартного імені.
+    :return: ID одиниці або None.
+    """
+    return get_conversion_table(standard_name_id).resolve_unit(unit)
+
+
+def invalidate_conversion_table(standard_name_id: int = None):
+    """
+    Відкидає збережену таблицю конверсій після зміни одиниць або конверсій.
+    Інші процеси відкинуть усі свої таблиці після наступної перевірки версії одиниць.
+    :param standard_name_id: ID стандартного імені (None - відкинути всі таблиці).
+    """
+    with _conversion_tables_lock:
+        if standard_name_id is None:
+            _conversion_tables.clear()
+        else:
+            _conversion_tables.pop(standard_name_id, None)
+    _units_version.bump()
 
 
 def add_unit(standard_name_id: int, unit: str, is_standard: bool = False):
@@ -30,6 +296,7 @@ def add_unit(standard_name_id: int, unit: str, is_standard: bool = False):
         new_unit = Unit(standard_name_id=standard_name_entry.id, unit=unit, is_standard=is_standard)
         session.add(new_unit)
         session.commit()
+        invalidate_conversion_table(standard_name_id)
         print(f"Юніт '{unit}' додано для стандартного імені з ID '{standard_name_id}'.")
 
     except IntegrityError:
@@ -47,7 +314,7 @@ def get_units_for_standard_name(standard_name_id: int):
     :param standard_name_id: ID стандартного імені.
     :return: Список юнітів або повідомлення про помилку.
     """
-    session = SessionLocal()
+    session = ReadSessionLocal()
 
     try:
         # Шукаємо StandardName за його ID
@@ -77,7 +344,7 @@ def get_standard_unit_for_standard_name(standard_name_id: int):
     :param standard_name_id: ID стандартного імені.
     :return: Стандартний юніт або повідомлення про помилку.
     """
-    session = SessionLocal()
+    session = ReadSessionLocal()
 
     try:
         # Шукаємо StandardName за його ID
@@ -109,6 +376,13 @@ def add_unit_conversation(from_unit_id: int, to_unit_id: int, formula: str, stan
     :param formula: Формула для конверсії.
     :param standard_name_id: ID стандартного імені, до якого прив'язана конверсія.
     """
+    # Формула розбирається один раз тут; некоректні формули не зберігаються
+    try:
+        compiled = compile_formula(formula)
+    except FormulaError as e:
+        print(f"Помилка: {e}")
+        return
+
     session = SessionLocal()
 
     try:
@@ -137,6 +411,8 @@ def add_unit_conversation(from_unit_id: int, to_unit_id: int, formula: str, stan
         )
         session.add(new_conversion)
         session.commit()
+        _compiled_formulas[new_conversion.id] = compiled
+        invalidate_conversion_table(standard_name_id)
         print(f"Конверсія між '{from_unit.unit}' і '{to_unit.unit}' для стандартного імені додана з формулою: {formula}.")
 
     except Exception as e:
@@ -151,7 +427,7 @@ def get_conversions_for_unit(unit: str):
     :param unit: Одиниця вимірювання.
     :return: Список конверсій у вигляді словників.
     """
-    session = SessionLocal()
+    session = ReadSessionLocal()
 
     try:
         unit_entry = session.query(Unit).filter_by(unit=unit).first()
@@ -159,7 +435,12 @@ def get_conversions_for_unit(unit: str):
         if not unit_entry:
             return f"Одиниця '{unit}' не знайдена."
 
-        conversions = session.query(UnitConversion).filter_by(from_unit_id=unit_entry.id).all()
+        # Пов'язані юніти й стандартне ім'я завантажуються тим самим запитом, а не окремим запитом на кожен рядок
+        conversions = session.query(UnitConversion).options(
+            joinedload(UnitConversion.from_unit),
+            joinedload(UnitConversion.to_unit),
+            joinedload(UnitConversion.standard_name),
+        ).filter_by(from_unit_id=unit_entry.id).all()
 
         # Перетворюємо об'єкти в зручні для читання словники
         conversion_list = [
@@ -189,83 +470,53 @@ def convert_to_standard_unit(value: float, from_unit_id: int, standard_name_id:
     :param standard_name_id: ID стандартного имени, к которому привязана конверсия.
     :return: Словарь с конвертированным значением, названиями единиц и дополнительной информацией.
     """
-    session = SessionLocal()
-
+    outcome = CONVERSION_ERROR
     try:
-        # Находим стандартную единицу для заданного стандартного имени
-        standard_unit = session.query(Unit).filter_by(standard_name_id=standard_name_id, is_standard=True).first()
+        table = get_conversion_table(standard_name_id)
 
-        if not standard_unit:
+        # Находим стандартную единицу для заданного стандартного имени
+        outcome = CONVERSION_UNIT_NOT_FOUND
+        if table.standard_unit_id is None:
             return {
                 "error": f"Стандартная единица для стандартного имени с ID {standard_name_id} не найдена."
             }
+        standard_unit = table.units[table.standard_unit_id]
 
         # Находим исходную единицу
-        from_unit = session.query(Unit).filter_by(id=from_unit_id).first()
-
-        if not from_unit:
+        if from_unit_id not in table.units:
             return {
                 "error": f"Единица с ID {from_unit_id} не найдена."
             }
+        from_unit = table.units[from_unit_id]
 
-        # Если исходная единица уже является стандартной, возвращаем значение без изменений
-        if from_unit_id == standard_unit.id:
+        # Готовая конверсия (прямая, обратная или через промежуточные единицы)
+        outcome = CONVERSION_NO_PATH
+        conversion = table.get(from_unit_id, table.standard_unit_id)
+        if conversion is None:
             return {
-                "value": value,
-                "from_unit": from_unit.unit,
-                "to_unit": standard_unit.unit,
-                "standard_name_id": standard_name_id,
+                "error": f"Конверсия между единицей '{from_unit}' и стандартной единицей '{standard_unit}' не найдена."
             }
 
-        # Пытаемся найти прямую конверсию
-        conversion = session.query(UnitConversion).filter_by(
-            from_unit_id=from_unit_id, to_unit_id=standard_unit.id, standard_name_id=standard_name_id).first()
+        outcome = CONVERSION_FORMULA_ERROR
+        try:
+            converted_value = conversion.formula(value)
+        except Exception as e:
+            return {"error": f"Ошибка выполнения формулы: {e}"}
 
-        if conversion:
-            # Используем прямую формулу
-            formula = conversion.formula.replace('x', 'value')
-            context = {'value': value}
-            try:
-                converted_value = eval(formula, {}, context)
-                return {
-                    "value": converted_value,
-                    "from_unit": from_unit.unit,
-                    "to_unit": standard_unit.unit,
-                    "standard_name_id": standard_name_id,
-                }
-            except Exception as e:
-                return {"error": f"Ошибка выполнения формулы: {e}"}
-
-        # Если прямая конверсия не найдена, ищем обратную
-        reverse_conversion = session.query(UnitConversion).filter_by(
-            from_unit_id=standard_unit.id, to_unit_id=from_unit_id, standard_name_id=standard_name_id).first()
-
-        if reverse_conversion:
-            # Инвертируем формулу для обратной конверсии
-            formula = reverse_conversion.formula.replace('x', 'value')
-            inverted_formula = f"value / ({formula})"  # Инвертируем формулу
-            context = {'value': value}
-            try:
-                converted_value = eval(inverted_formula, {}, context)
-                return {
-                    "value": converted_value,
-                    "from_unit": from_unit.unit,
-                    "to_unit": standard_unit.unit,
-                    "standard_name_id": standard_name_id,
-                }
-            except Exception as e:
-                return {"error": f"Ошибка выполнения обратной формулы: {e}"}
-
-        # Если ни прямая, ни обратная конверсия не найдены
+        outcome = CONVERSION_OK
         return {
-            "error": f"Конверсия между единицей '{from_unit.unit}' и стандартной единицей '{standard_unit.unit}' не найдена."
+            "value": converted_value,
+            "from_unit": from_unit,
+            "to_unit": standard_unit,
+            "standard_name_id": standard_name_id,
         }
 
     except Exception as e:
+        outcome = CONVERSION_ERROR
         print(f"Ошибка: {e}")
         return {"error": "Произошла ошибка во время выполнения конверсии."}
     finally:
-        session.close()
+        CONVERSION_RESULTS.inc("convert_to_standard_unit", outcome)
 
 
 def calculate_conversion(value: float, from_unit: str, to_unit: str, standard_name_id: int):
@@ -277,69 +528,124 @@ def calculate_conversion(value: float, from_unit: str, to_unit: str, standard_na
     :param standard_name_id: ID стандартного імені.
     :return: Конвертоване значення або повідомлення про помилку.
     """
-    session = SessionLocal()
-
+    outcome = CONVERSION_ERROR
     try:
-        # Отримуємо всі одиниці вимірювання для стандартного імені
-        units = session.query(Unit).filter_by(standard_name_id=standard_name_id).all()
-        if not units:
+        table = get_conversion_table(standard_name_id)
+        outcome = CONVERSION_UNIT_NOT_FOUND
+        if not table.units:
             return {"error": "Одиниці вимірювання для заданого стандартного імені не знайдені."}
 
-        # Створюємо граф конверсій
-        conversions = session.query(UnitConversion).filter_by(standard_name_id=standard_name_id).all()
-        graph = {}
-        for conversion in conversions:
-            if conversion.from_unit_id not in graph:
-                graph[conversion.from_unit_id] = []
-            graph[conversion.from_unit_id].append((conversion.to_unit_id, conversion.formula))
-
         # Знаходимо ID одиниць from_unit і to_unit
-        from_unit_entry = session.query(Unit).filter_by(unit=from_unit, standard_name_id=standard_name_id).first()
-        to_unit_entry = session.query(Unit).filter_by(unit=to_unit, standard_name_id=standard_name_id).first()
+        from_unit_id = table.resolve_unit(from_unit)
+        to_unit_id = table.resolve_unit(to_unit)
 
-        if not from_unit_entry or not to_unit_entry:
+        if from_unit_id is None or to_unit_id is None:
             return {"error": f"Одна або обидві одиниці ('{from_unit}', '{to_unit}') не знайдені."}
 
-        from_unit_id = from_unit_entry.id
-        to_unit_id = to_unit_entry.id
+        outcome = CONVERSION_NO_PATH
+        conversion = table.get(from_unit_id, to_unit_id)
+        if conversion is None:
+            return {"error": f"Шлях між одиницями '{from_unit}' і '{to_unit}' не знайдено."}
+
+        outcome = CONVERSION_FORMULA_ERROR
+        try:
+            converted_value = conversion.formula(value)
+        except Exception as e:
+            return {"error": f"Помилка в обчисленні формули '{conversion.formula.source}': {e}"}
+
+        outcome = CONVERSION_OK
+        return {
+            "value": converted_value,
+            "path": conversion.path,
+            "from_unit": from_unit,
+            "to_unit": to_unit,
+        }
+
+    except Exception as e:
+        outcome = CONVERSION_ERROR
+        print(f"Помилка: {e}")
+        return {"error": "Сталася помилка при виконанні конверсії."}
+    finally:
+        CONVERSION_RESULTS.inc("calculate_conversion", outcome)
 
-        # BFS для пошуку шляху між одиницями
-        from collections import deque
 
-        queue = deque([(from_unit_id, value, [])])  # (current_unit_id, current_value, path)
-        visited = set()
+class BulkConversionResult(NamedTuple):
+    """
+    Результат пакетної конверсії: масив значень (NaN для рядків, які не вдалося конвертувати)
+    і маска помилок того ж розміру.
+    """
+    values: np.ndarray
+    errors: np.ndarray
 
-        while queue:
-            current_unit_id, current_value, path = queue.popleft()
 
-            if current_unit_id == to_unit_id:
-                return {
-                    "value": current_value,
-                    "path": path,
-                    "from_unit": from_unit,
-                    "to_unit": to_unit,
-                }
+def _apply_formula(formula: CompiledFormula, values: np.ndarray) -> np.ndarray:
+    # Афінні формули застосовуються як одне множення і додавання над усім масивом
+    if formula.is_affine:
+        a, b = formula.coefficients
+        result = values if a == 1 else values * float(a)
+        return result if b == 0 else result + float(b)
+    return np.asarray(formula(values), dtype=np.float64)
 
-            if current_unit_id in visited:
-                continue
 
-            visited.add(current_unit_id)
+def _bulk_result(converted: np.ndarray, function: str) -> BulkConversionResult:
+    errors = ~np.isfinite(converted)
+    converted[errors] = np.nan
+    failed = int(errors.sum())
+    CONVERSION_RESULTS.inc(function, CONVERSION_OK, amount=errors.size - failed)
+    CONVERSION_RESULTS.inc(function, CONVERSION_ERROR, amount=failed)
+    return BulkConversionResult(converted, errors)
 
-            for neighbor_unit_id, formula in graph.get(current_unit_id, []):
-                # Обчислюємо нове значення
-                context = {'value': current_value}
-                try:
-                    new_value = eval(formula.replace('x', 'value'), {}, context)
-                except Exception as e:
-                    return {"error": f"Помилка в обчисленні формули '{formula}': {e}"}
 
-                # Додаємо сусіда в чергу
-                queue.append((neighbor_unit_id, new_value, path + [(current_unit_id, neighbor_unit_id, formula)]))
+def convert_many(values, from_unit, to_unit, standard_name_id: int) -> BulkConversionResult:
+    """
+    Конвертує масив значень з однієї одиниці в іншу векторизовано (без сесії БД на кожне значення).
+    :param values: Масив (або послідовність) значень.
+    :param from_unit: Одиниця, з якої відбувається конверсія (id або назва).
+    :param to_unit: Одиниця, в яку потрібно конвертувати (id або назва; None - стандартна одиниця).
+    :param standard_name_id: ID стандартного імені.
+    :return: BulkConversionResult; рядки з NaN на вході або без можливої конверсії мають NaN і помилку в масці.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    table = get_conversion_table(standard_name_id)
+    from_unit_id = table.unit_id(from_unit)
+    to_unit_id = table.standard_unit_id if to_unit is None else table.unit_id(to_unit)
 
-        return {"error": f"Шлях між одиницями '{from_unit}' і '{to_unit}' не знайдено."}
+    conversion = table.get(from_unit_id, to_unit_id)
+    if conversion is None:
+        CONVERSION_RESULTS.inc("convert_many", CONVERSION_NO_PATH, amount=values.size)
+        return BulkConversionResult(np.full(values.shape, np.nan), np.ones(values.shape, dtype=bool))
 
-    except Exception as e:
-        print(f"Помилка: {e}")
-        return {"error": "Сталася помилка при виконанні конверсії."}
-    finally:
-        session.close()
+    with np.errstate(all="ignore"):
+        converted = np.array(_apply_formula(conversion.formula, values), dtype=np.float64, copy=True)
+    return _bulk_result(converted, "convert_many")
+
+
+def convert_many_mixed(values, from_unit_ids, standard_name_id: int, to_unit=None) -> BulkConversionResult:
+    """
+    Конвертує масив значень, кожне з яких має власну одиницю, в одну цільову одиницю.
+    Значення групуються за одиницею, і кожна група конвертується однією векторизованою операцією.
+    :param values: Масив значень.
+    :param from_unit_ids: Масив id одиниць того ж розміру, що й values.
+    :param standard_name_id: ID стандартного імені.
+    :param to_unit: Цільова одиниця (id або назва; None - стандартна одиниця).
+    :return: BulkConversionResult.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    from_unit_ids = np.asarray(from_unit_ids)
+    if from_unit_ids.shape != values.shape:
+        raise ValueError("Масиви значень і одиниць повинні мати однаковий розмір.")
+
+    table = get_conversion_table(standard_name_id)
+    to_unit_id = table.standard_unit_id if to_unit is None else table.unit_id(to_unit)
+
+    converted = np.full(values.shape, np.nan)
+    unique_ids, groups = np.unique(from_unit_ids, return_inverse=True)
+    groups = groups.reshape(values.shape)
+    with np.errstate(all="ignore"):
+        for group, unit_id in enumerate(unique_ids.tolist()):
+            conversion = table.get(unit_id, to_unit_id)
+            if conversion is None:
+                continue
+            rows = groups == group
+            converted[rows] = _apply_formula(conversion.formula, values[rows])
+    return _bulk_result(converted, "convert_many_mixed")
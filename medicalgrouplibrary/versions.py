@@ -0,0 +1,71 @@
+import os
+import threading
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from medicalgrouplibrary.database import engine, read_engine, DictionaryVersion
+
+# Як часто (с) процес перевіряє, чи не змінив словник інший процес (0 - перед кожним зверненням до кешу)
+DICTIONARY_CHECK_INTERVAL = float(os.getenv("DICTIONARY_CHECK_INTERVAL", "1.0"))
+
+
+class SharedVersion:
+    """
+    Версія словника в таблиці dictionary_versions, спільна для всіх процесів (воркерів сервера, CLI, задач).
+    Процес, що записав зміни, викликає bump(); інші процеси дізнаються про зміни з changed()
+    і відкидають свої кеші. Сама перевірка - один запит за первинним ключем не частіше ніж раз
+    на check_interval секунд.
+    """
+
+    def __init__(self, name: str, check_interval: float = DICTIONARY_CHECK_INTERVAL):
+        """
+        :param name: Назва словника (ключ рядка в dictionary_versions).
+        :param check_interval: Мінімальний інтервал між перевірками версії в базі, с.
+        """
+        self.name = name
+        self.check_interval = check_interval
+        self._seen = None  # Версія, з якою узгоджені кеші процесу (None - ще не читалася)
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _read(self, connection) -> int:
+        try:
+            version = connection.execute(text("SELECT version FROM dictionary_versions WHERE name = :name"),
+                                         {"name": self.name}).scalar()
+        except OperationalError as e:
+            # База ще без таблиці (init_db не запускався): жоден процес не записував версій
+            if "no such table" not in str(e):
+                raise
+            return 0
+        return version or 0
+
+    def changed(self) -> bool:
+        """
+        Повертає True, якщо після попередньої перевірки словник змінив інший процес
+        (або цей процес не зміг застосувати зміни точково, див. bump).
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.check_interval:
+                return False
+            with read_engine.connect() as connection:
+                version = self._read(connection)
+            # Лише після успішного читання: невдала перевірка повториться при наступному зверненні
+            self._checked_at = now
+            changed = self._seen is not None and version != self._seen
+            self._seen = version
+            return changed
+
+    def bump(self):
+        """
+        Збільшує версію словника в базі. Викликається після запису, коли кеші цього процесу вже оновлені:
+        якщо між двома перевірками словник не змінював ніхто інший, власний запис не змушує перебудовувати кеші.
+        """
+        with engine.begin() as connection:
+            DictionaryVersion.__table__.create(connection, checkfirst=True)
+            connection.execute(text("INSERT INTO dictionary_versions (name, version) VALUES (:name, 1) "
+                                    "ON CONFLICT (name) DO UPDATE SET version = version + 1"), {"name": self.name})
+            version = self._read(connection)
+        with self._lock:
+            if self._seen == version - 1:
+                self._seen = version
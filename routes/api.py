@@ -0,0 +1,150 @@
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from medicalgrouplibrary.unificator import get_unification_names, get_unification_stats, get_unification_candidates
+from medicalgrouplibrary.normalizer import normalize_records
+from medicalgrouplibrary.executor import run_blocking
+from medicalgrouplibrary.database import ReadSessionLocal
+from medicalgrouplibrary.listing import list_standard_names, list_synonyms, list_units, list_conversions, \
+    DEFAULT_PAGE_SIZE
+
+# Ініціалізація роутера для JSON API
+router = APIRouter()
+
+# Максимальна кількість назв в одному пакетному запиті
+MAX_BATCH_SIZE = 10000
+# Максимальна кількість кандидатів у відповіді
+MAX_CANDIDATES = 100
+
+
+class BatchUnificationRequest(BaseModel):
+    names: List[str]
+    threshold: float = 80.0
+
+
+class NormalizationRecord(BaseModel):
+    name: str
+    value: Optional[float] = None
+    unit: Optional[str] = None
+
+
+class NormalizationRequest(BaseModel):
+    records: List[NormalizationRecord]
+    threshold: float = 80.0
+
+
+@router.post("/api/unify/batch")
+async def unify_batch(payload: BatchUnificationRequest):
+    """
+    Повертає уніфіковані імена для списку назв аналізів (наприклад, цілої панелі) одним запитом.
+    """
+    if not (0 <= payload.threshold <= 100):
+        raise HTTPException(status_code=400, detail="Поріг повинен бути між 0 і 100.")
+    if len(payload.names) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Максимальний розмір пакета - {MAX_BATCH_SIZE} назв.")
+
+    try:
+        # Кількість потоків rapidfuzz задає сервер (UNIFICATION_WORKERS), а не клієнт
+        results = await run_blocking(get_unification_names, payload.names, payload.threshold)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"results": results}
+
+
+@router.get("/api/unify/candidates")
+async def unify_candidates(text: str, k: int = 5, threshold: float = 80.0):
+    """
+    Повертає до k кандидатів уніфікованого імені з оцінками для автоматичного зіставлення та ручної перевірки.
+    """
+    if not (0 <= threshold <= 100):
+        raise HTTPException(status_code=400, detail="Поріг повинен бути між 0 і 100.")
+    if not (1 <= k <= MAX_CANDIDATES):
+        raise HTTPException(status_code=400, detail=f"Кількість кандидатів повинна бути від 1 до {MAX_CANDIDATES}.")
+
+    try:
+        candidates = await run_blocking(get_unification_candidates, text, k, threshold)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"input": text, "candidates": [candidate._asdict() for candidate in candidates]}
+
+
+@router.get("/api/unify/stats")
+async def unify_stats():
+    """
+    Повертає лічильники уніфікатора (зокрема, скільки запитів обійшлися без нечіткого пошуку).
+    """
+    return get_unification_stats()
+
+
+@router.post("/api/normalize")
+async def normalize(payload: NormalizationRequest):
+    """
+    Нормалізує пакет рядків результатів (назва, значення, одиниця) одним запитом:
+    повертає стандартне ім'я, стандартну одиницю і значення в ній для кожного рядка.
+    """
+    if not (0 <= payload.threshold <= 100):
+        raise HTTPException(status_code=400, detail="Поріг повинен бути між 0 і 100.")
+    if len(payload.records) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Максимальний розмір пакета - {MAX_BATCH_SIZE} записів.")
+
+    try:
+        results = await run_blocking(normalize_records, [record.model_dump() for record in payload.records],
+                                     payload.threshold)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"results": results}
+
+
+def _read_page(list_page, **kwargs) -> dict:
+    session = ReadSessionLocal()
+    try:
+        page = list_page(session, **kwargs)
+    finally:
+        session.close()
+    return {"items": page.items, "next_cursor": page.next_cursor}
+
+
+async def _list(list_page, **kwargs) -> dict:
+    """
+    Повертає сторінку списку; некоректні limit або cursor - помилка 400.
+    """
+    try:
+        return await run_blocking(_read_page, list_page, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/api/standard_names")
+async def standard_names_page(prefix: str = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    Повертає сторінку стандартних імен в алфавітному порядку (без урахування регістру), за потреби - за префіксом.
+    Наступна сторінка - той самий запит з cursor=next_cursor.
+    """
+    return await _list(list_standard_names, prefix=prefix, cursor=cursor, limit=limit)
+
+
+@router.get("/api/synonyms")
+async def synonyms_page(standard_name_id: int = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    Повертає сторінку синонімів, за потреби - лише для одного стандартного імені.
+    """
+    return await _list(list_synonyms, standard_name_id=standard_name_id, cursor=cursor, limit=limit)
+
+
+@router.get("/api/units")
+async def units_page(standard_name_id: int = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    Повертає сторінку юнітів, за потреби - лише для одного стандартного імені.
+    """
+    return await _list(list_units, standard_name_id=standard_name_id, cursor=cursor, limit=limit)
+
+
+@router.get("/api/conversions")
+async def conversions_page(standard_name_id: int = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    Повертає сторінку конверсій з назвами юнітів, за потреби - лише для одного стандартного імені.
+    """
+    return await _list(list_conversions, standard_name_id=standard_name_id, cursor=cursor, limit=limit)
@@ -1,37 +1,32 @@
-from fastapi import APIRouter, Request, Depends, HTTPException, Form
+from fastapi import APIRouter, Request, HTTPException, Form
 from fastapi.responses import HTMLResponse
-from medicalgrouplibrary.database import SessionLocal, AnalysisSynonym
-from tqdm import tqdm
+from medicalgrouplibrary.database import ReadSessionLocal, StandardName
 from pydantic import BaseModel
-from medicalgrouplibrary.data_creator import create_synonyms_for_standard_name
-from medicalgrouplibrary.database import StandardName
-from sqlalchemy.orm import Session
+from medicalgrouplibrary.data_creator import generate_synonyms_async, get_llm_cache_stats
+from medicalgrouplibrary.executor import run_blocking
 from fastapi.templating import Jinja2Templates
 
 # Ініціалізація роутера
 router = APIRouter()
 
 
-# Функція для отримання сесії бази даних
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # Шаблони Jinja2
 templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/generator", response_class=HTMLResponse)
-async def import_export_page(request: Request, db: Session = Depends(get_db)):
-    # Отримуємо всі уніфіковані назви
-    unified_names = db.query(StandardName).all()
-    unified_names_list = [name.name for name in unified_names]
-    return templates.TemplateResponse("generator.html", {"request": request, "unified_names": unified_names_list, "message": None})
+def import_export_page(request: Request):
+    # Уніфіковані назви підказуються під час введення через /api/standard_names, тому повний список не потрібен
+    return templates.TemplateResponse("generator.html", {"request": request, "message": None})
+
+
 
+def _standard_name_exists(name: str) -> bool:
+    session = ReadSessionLocal()
+    try:
+        return session.query(StandardName.id).filter_by(name=name).first() is not None
+    finally:
+        session.close()
 
 
 class SynonymRequest(BaseModel):
@@ -43,35 +38,32 @@ class SynonymRequest(BaseModel):
 async def generate_synonyms(request: Request,
                             standard_name: str = Form(...),
                             request_count: int = Form(...),
-                            db: Session = Depends(get_db)):
+                            fresh: bool = Form(False)):
+    # Перевіряємо кількість запитів
+    if request_count <= 0:
+        raise HTTPException(status_code=400, detail="Кількість запитів має бути більше нуля.")
+    # Поле форми - вільний текст із підказками, тож описка не повинна створювати нове стандартне ім'я
+    if not await run_blocking(_standard_name_exists, standard_name):
+        raise HTTPException(status_code=400, detail=f"Стандартне ім'я '{standard_name}' не знайдено.")
+
     try:
-        # Перевіряємо кількість запитів
-        if request_count <= 0:
-            raise HTTPException(status_code=400, detail="Кількість запитів має бути більше нуля.")
-
-        # Перевіряємо чи існує стандартне ім'я в таблиці StandardName
-        existing_standard_name = db.query(StandardName).filter_by(name=standard_name).first()
-        if not existing_standard_name:
-            # Якщо не знайдено, створюємо нове уніфіковане ім'я
-            pass  # Створення нового уніфікованого імені
-
-        result = []
-        # Генерація синонімів за допомогою LLM
-        for _ in tqdm(range(request_count)):
-            created_synonyms = create_synonyms_for_standard_name(standard_name)
-            result.append(created_synonyms)
-        message = f"Синоніми для '{standard_name}' успішно згенеровані. Було додано: {', '.join([', '.join(item) for item in result])}"
-
-        # message = f"Синоніми для '{standard_name}' успішно згенеровані. Було додано:\n{str(result)}"
-        return templates.TemplateResponse("generator.html",
-                                          {"request": request,
-                                           "message": message,
-                                           "unified_names": [item.name for item in db.query(StandardName).distinct(AnalysisSynonym.standard_name).all()]})
+        # Запити до LLM виконуються паралельно (не більше LLM_CONCURRENCY одночасно), не блокуючи цикл подій
+        result = await generate_synonyms_async(standard_name, request_count, fresh=fresh)
+        message = f"Синоніми для '{standard_name}' успішно згенеровані. Було додано: {', '.join(result['added'])}"
+        if result["failed"]:
+            message += f" (невдалих запитів: {result['failed']} з {result['requests']}: {result['errors'][0]})"
 
     except Exception as e:
         message = f"Помилка при генерації синонімів: {e}"
-        return templates.TemplateResponse("generator.html",
-                                          {"request": request,
-                                           "message": message,
-                                           "unified_names": [item.name for item in db.query(StandardName).distinct(
-                                               AnalysisSynonym.standard_name).all()]})
+
+    return templates.TemplateResponse("generator.html",
+                                      {"request": request,
+                                       "message": message})
+
+
+@router.get("/generator/cache_stats")
+async def generator_cache_stats():
+    """
+    Повертає лічильники кешу відповідей LLM (частка влучань, заощаджені токени).
+    """
+    return get_llm_cache_stats()
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Form, UploadFile, File, HTTPException
+from fastapi.responses import JSONResponse
+from medicalgrouplibrary.data_transfer import detect_synonyms_format
+from medicalgrouplibrary.executor import run_blocking
+from medicalgrouplibrary.jobs import submit_job, get_job, list_jobs, save_upload, discard_upload
+
+# Ініціалізація роутера для фонових задач
+router = APIRouter()
+
+# Максимальна кількість задач у списку
+MAX_JOBS_LIMIT = 500
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(kind: str = Form(...),
+                     standard_name: str = Form(None),
+                     request_count: int = Form(1),
+                     fresh: bool = Form(False),
+                     file: UploadFile = File(None)):
+    """
+    Ставить у чергу фонову задачу: генерацію синонімів (kind=generate, standard_name, request_count, fresh)
+    або імпорт файлу синонімів (kind=import, file, standard_name - необов'язково).
+    Стан задачі - GET /jobs/{id}.
+    """
+    if kind == "generate":
+        if not standard_name:
+            raise HTTPException(status_code=400, detail="Для генерації потрібне стандартне ім'я.")
+        if request_count <= 0:
+            raise HTTPException(status_code=400, detail="Кількість запитів має бути більше нуля.")
+        params = {"standard_name": standard_name, "request_count": request_count, "fresh": fresh}
+    elif kind == "import":
+        if file is None:
+            raise HTTPException(status_code=400, detail="Для імпорту потрібен файл.")
+        file_format = detect_synonyms_format(file.filename)
+        path = await run_blocking(save_upload, file.file, file_format)
+        params = {"path": path, "format": file_format, "file_name": file.filename, "standard_name": standard_name or None}
+    else:
+        raise HTTPException(status_code=400, detail=f"Невідомий тип задачі: {kind}.")
+
+    try:
+        job_id = await run_blocking(submit_job, kind, params)
+    except Exception:
+        if kind == "import":
+            await run_blocking(discard_upload, params["path"])
+        raise
+    return JSONResponse({"id": job_id, "status": "queued", "url": f"/jobs/{job_id}"}, status_code=202)
+
+
+@router.get("/jobs")
+async def read_jobs(limit: int = 50):
+    """
+    Повертає останні фонові задачі, новіші першими.
+    """
+    if not (1 <= limit <= MAX_JOBS_LIMIT):
+        raise HTTPException(status_code=400, detail=f"Ліміт повинен бути від 1 до {MAX_JOBS_LIMIT}.")
+    return {"jobs": await run_blocking(list_jobs, limit)}
+
+
+@router.get("/jobs/{job_id}")
+async def read_job(job_id: int):
+    """
+    Повертає статус, прогрес і результат (або помилку) фонової задачі.
+    """
+    job = await run_blocking(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задачу не знайдено.")
+    return job
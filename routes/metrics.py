@@ -0,0 +1,67 @@
+import time
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from medicalgrouplibrary.metrics import render_metrics, HTTP_REQUEST_SECONDS, HTTP_REQUEST_DB_QUERIES
+from medicalgrouplibrary.query_stats import count_queries
+
+# Ініціалізація роутера для метрик
+router = APIRouter()
+
+# Тип вмісту текстового формату Prometheus
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+QUERY_TIME_HEADER = "X-Query-Time"
+
+# Мітка маршруту для запитів, які не відповідають жодному маршруту (щоб не плодити мітки з довільних URL)
+UNMATCHED_ROUTE = "unmatched"
+
+
+@router.get("/metrics")
+def metrics():
+    """
+    Метрики застосунку в текстовому форматі Prometheus.
+    """
+    return PlainTextResponse(render_metrics(), media_type=METRICS_MEDIA_TYPE)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-проміжний шар: записує тривалість кожного HTTP-запиту і кількість його SQL-запитів
+    за шаблоном маршруту (/units/{standard_name_id}, а не /units/5).
+    Якщо query_headers увімкнено, додає до відповіді заголовки X-Query-Count і X-Query-Time.
+    Для потокових відповідей (/export) заголовки містять лише запити до початку передачі тіла.
+    """
+
+    def __init__(self, app, query_headers: bool = False):
+        self.app = app
+        self.query_headers = query_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        with count_queries() as counter:
+            async def send_wrapper(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if self.query_headers:
+                        message.setdefault("headers", [])
+                        message["headers"] = list(message["headers"]) + [
+                            (QUERY_COUNT_HEADER.lower().encode(), str(counter.count).encode()),
+                            (QUERY_TIME_HEADER.lower().encode(), f"{counter.seconds * 1000:.1f}ms".encode()),
+                        ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                route = getattr(route, "path", UNMATCHED_ROUTE)
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route, str(status))
+                HTTP_REQUEST_DB_QUERIES.observe(counter.count, route)
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Request, Form, HTTPException, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from medicalgrouplibrary.database import SessionLocal, StandardName, AnalysisSynonym
-from medicalgrouplibrary.unificator import add_synonym
+from sqlalchemy.orm import Session, selectinload
+from medicalgrouplibrary.database import SessionLocal, ReadSessionLocal, StandardName, AnalysisSynonym
+from medicalgrouplibrary.listing import standard_names_page
+from medicalgrouplibrary.unificator import add_synonym, register_synonym, invalidate_synonym_index, \
+    rename_indexed_standard_name
 
 # Ініціалізація роутера
 router = APIRouter()
@@ -19,38 +21,43 @@ def get_db():
     finally:
         db.close()
 
-@router.get("/", response_class=HTMLResponse)
-async def read_unification_names(request: Request, db: Session = Depends(get_db)):
-    # Отримання унікальних стандартних імен
-    standard_names = db.query(StandardName).all()
-    return templates.TemplateResponse("index.html", {"request": request, "standard_names": standard_names})
 
+# Сесія тільки для читання для сторінок, які нічого не змінюють
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
 
-@router.get("/unification_names/", response_class=HTMLResponse)
-async def read_unification_names(request: Request, filter_letter: str = None, db: Session = Depends(get_db)):
-    # Отримання унікальних стандартних імен
-    standard_names_query = db.query(StandardName)
+@router.get("/", response_class=HTMLResponse)
+async def read_index(request: Request):
+    return templates.TemplateResponse("index.html", {"request": request})
 
-    if filter_letter:
-        # Фільтрація за першою літерою назви
-        standard_names_query = standard_names_query.filter(StandardName.name.ilike(f"{filter_letter}%"))
 
-    standard_names = standard_names_query.all()
+@router.get("/unification_names/", response_class=HTMLResponse)
+def read_unification_names(request: Request, filter_letter: str = None, cursor: str = None,
+                           db: Session = Depends(get_read_db)):
+    # Сторінка стандартних імен, за потреби - з фільтрацією за першою літерою назви
+    page = standard_names_page(db, filter_letter, cursor)
 
     return templates.TemplateResponse("unification_names.html", {
         "request": request,
-        "standard_names": standard_names,
+        "standard_names": page.items,
+        "next_cursor": page.next_cursor,
         "filter_letter": filter_letter,
     })
 
 
 
 @router.get("/synonyms/{standard_name_id}", response_class=HTMLResponse)
-async def read_synonyms_by_name(request: Request, standard_name_id: int, db: Session = Depends(get_db)):
+def read_synonyms_by_name(request: Request, standard_name_id: int, db: Session = Depends(get_read_db)):
     # Находим стандартное имя по ID
-    standard_name = db.query(StandardName).filter(StandardName.id == standard_name_id).first()
+    # Синоніми завантажуються одним додатковим запитом; synonym.standard_name у шаблоні вже в сесії
+    standard_name = db.query(StandardName).options(selectinload(StandardName.synonyms)) \
+        .filter(StandardName.id == standard_name_id).first()
     if standard_name:
-        synonyms = db.query(AnalysisSynonym).join(StandardName).filter(StandardName.id == standard_name_id).all()
+        synonyms = sorted(standard_name.synonyms, key=lambda synonym: synonym.id)
         return templates.TemplateResponse("synonyms.html", {
             "request": request,
             "standard_name": standard_name,
@@ -60,8 +67,8 @@ async def read_synonyms_by_name(request: Request, standard_name_id: int, db: Ses
 
 
 @router.post("/add", response_class=HTMLResponse)
-async def add_synonym_route(request: Request, standard_name: str = Form(...), synonym: str = Form(...),
-                             db: Session = Depends(get_db)):
+def add_synonym_route(request: Request, standard_name: str = Form(...), synonym: str = Form(...),
+                       db: Session = Depends(get_db)):
     """
     Додає новий синонім, використовуючи функцію add_synonym.
     """
@@ -73,7 +80,7 @@ async def add_synonym_route(request: Request, standard_name: str = Form(...), sy
 
 
 @router.post("/add_synonym/{standard_name_id}", response_class=HTMLResponse)
-async def add_synonym_route(standard_name_id: int, synonym: str = Form(...), db: Session = Depends(get_db)):
+def add_synonym_route(standard_name_id: int, synonym: str = Form(...), db: Session = Depends(get_db)):
     """
     Додає новий синонім для вказаного стандартного імені.
     """
@@ -86,6 +93,7 @@ async def add_synonym_route(standard_name_id: int, synonym: str = Form(...), db:
     new_synonym = AnalysisSynonym(synonym=synonym, standard_name_id=standard_entry.id)
     db.add(new_synonym)
     db.commit()
+    register_synonym(standard_entry.id, standard_entry.name, synonym)
 
     # Перенаправляємо на сторінку з синонімами для цього стандартного імені
     return RedirectResponse(f"/synonyms/{standard_name_id}", status_code=302)
@@ -93,7 +101,7 @@ async def add_synonym_route(standard_name_id: int, synonym: str = Form(...), db:
 
 
 @router.post("/delete/{synonym_id}", response_class=HTMLResponse)
-async def delete_synonym(synonym_id: int, db: Session = Depends(get_db)):
+def delete_synonym(synonym_id: int, db: Session = Depends(get_db)):
     # Видалення синоніма
     entry = db.query(AnalysisSynonym).filter_by(id=synonym_id).first()
     if not entry:
@@ -103,13 +111,14 @@ async def delete_synonym(synonym_id: int, db: Session = Depends(get_db)):
 
     db.delete(entry)
     db.commit()
+    invalidate_synonym_index()  # Синонім міг дублюватися для іншого імені, тому перебудовуємо індекс
 
     return RedirectResponse(f"/unification_names", status_code=302)
 
 
 @router.post("/rename_standard_name/{standard_name_id}")
-async def rename_standard_name(standard_name_id: int, new_standard_name: str = Form(...),
-                               db: Session = Depends(get_db)):
+def rename_standard_name(standard_name_id: int, new_standard_name: str = Form(...),
+                         db: Session = Depends(get_db)):
     # Находим стандартное имя по ID
     standard_name = db.query(StandardName).filter(StandardName.id == standard_name_id).first()
 
@@ -118,6 +127,7 @@ async def rename_standard_name(standard_name_id: int, new_standard_name: str = F
         standard_name.name = new_standard_name
         db.commit()
         db.refresh(standard_name)
+        rename_indexed_standard_name(standard_name.id, standard_name.name)
 
     # Перенаправляем обратно на страницу с синонимами
     return {"message": "Ім'я успішно змінено!"}
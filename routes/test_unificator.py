@@ -27,7 +27,7 @@ async def home(request: Request):
 
 
 @router.post("/test_unificator/", response_class=HTMLResponse)
-async def process_unification_name(
+def process_unification_name(
         request: Request,
         synonym: str = Form(...),
         threshold: float = Form(...),
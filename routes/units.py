@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Request, Form, HTTPException, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.sql.operators import filter_op
 from medicalgrouplibrary.units import *
-from medicalgrouplibrary.database import SessionLocal, Unit, UnitConversion, StandardName
-from medicalgrouplibrary.units import add_unit, add_unit_conversation
+from medicalgrouplibrary.database import SessionLocal, ReadSessionLocal, Unit, UnitConversion, StandardName
+from medicalgrouplibrary.units import add_unit, add_unit_conversation, invalidate_conversion_table
+from medicalgrouplibrary.listing import standard_names_page
 from fastapi.templating import Jinja2Templates
 
 
@@ -22,26 +23,31 @@ def get_db():
         db.close()
 
 
-@router.get("/units", response_class=HTMLResponse)
-async def get_all_standard_names(request: Request, filter_letter: str = None, db: Session = Depends(get_db)):
-    # Отримання стандартних імен з можливістю фільтрації
-    standard_names_query = db.query(StandardName)
+# Сесія тільки для читання для сторінок, які нічого не змінюють
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
 
-    if filter_letter:
-        # Фільтрація за першою літерою назви
-        standard_names_query = standard_names_query.filter(StandardName.name.ilike(f"{filter_letter}%"))
 
-    standard_names = standard_names_query.all()
+@router.get("/units", response_class=HTMLResponse)
+def get_all_standard_names(request: Request, filter_letter: str = None, cursor: str = None,
+                           db: Session = Depends(get_read_db)):
+    # Сторінка стандартних імен, за потреби - з фільтрацією за першою літерою назви
+    page = standard_names_page(db, filter_letter, cursor)
 
     return templates.TemplateResponse("units.html", {
         "request": request,
-        "standard_names": standard_names,
+        "standard_names": page.items,
+        "next_cursor": page.next_cursor,
         "filter_letter": filter_letter,
     })
 
 
 @router.get("/units/{standard_name_id}", response_class=HTMLResponse)
-async def get_units(request: Request, standard_name_id: int, db: Session = Depends(get_db)):
+def get_units(request: Request, standard_name_id: int, db: Session = Depends(get_read_db)):
     standard_name = db.query(StandardName).filter_by(id=standard_name_id).first()
 
     if not standard_name:
@@ -58,7 +64,7 @@ async def get_units(request: Request, standard_name_id: int, db: Session = Depen
 
 
 @router.get("/add_unit/{standard_name_id}", response_class=HTMLResponse)
-async def show_add_unit_form(request: Request, standard_name_id: int, db: Session = Depends(get_db)):
+def show_add_unit_form(request: Request, standard_name_id: int, db: Session = Depends(get_read_db)):
     # Отримуємо стандартне ім'я
     standard_name = db.query(StandardName).filter_by(id=standard_name_id).first()
 
@@ -75,7 +81,7 @@ async def show_add_unit_form(request: Request, standard_name_id: int, db: Sessio
 
 
 @router.post("/add_unit", response_class=HTMLResponse)
-async def add_unit_route(request: Request, standard_name_id: int = Form(...), unit: str = Form(...),is_standard: bool = Form(False)):
+def add_unit_route(request: Request, standard_name_id: int = Form(...), unit: str = Form(...),is_standard: bool = Form(False)):
 
     # Перевірка, чи є значення для unit
     if not unit:
@@ -89,31 +95,30 @@ async def add_unit_route(request: Request, standard_name_id: int = Form(...), un
 
 
 @router.get("/conversions", response_class=HTMLResponse)
-async def get_standard_names(request: Request, filter_letter: str = None, db: Session = Depends(get_db)):
-    # Отримуємо стандартні імена з можливістю фільтрації
-    standard_names_query = db.query(StandardName)
-
-    if filter_letter:
-        # Фільтрація за першою літерою назви
-        standard_names_query = standard_names_query.filter(StandardName.name.ilike(f"{filter_letter}%"))
-
-    standard_names = standard_names_query.all()
+def get_standard_names(request: Request, filter_letter: str = None, cursor: str = None,
+                       db: Session = Depends(get_read_db)):
+    # Сторінка стандартних імен, за потреби - з фільтрацією за першою літерою назви
+    page = standard_names_page(db, filter_letter, cursor)
 
     return templates.TemplateResponse("conversions.html", {
         "request": request,
-        "standard_names": standard_names,
+        "standard_names": page.items,
+        "next_cursor": page.next_cursor,
         "filter_letter": filter_letter,
     })
 
 
 @router.get("/conversions/{standard_name_id}", response_class=HTMLResponse)
-async def get_conversions_for_standard_name(request: Request, standard_name_id: int, db: Session = Depends(get_db)):
+def get_conversions_for_standard_name(request: Request, standard_name_id: int, db: Session = Depends(get_read_db)):
     standard_name = db.query(StandardName).filter_by(id=standard_name_id).first()
     if not standard_name:
         raise HTTPException(status_code=404, detail="Стандартне ім'я не знайдено.")
 
-    # Отримуємо всі конверсії для цього стандартного імені
-    conversions = db.query(UnitConversion).filter_by(standard_name_id=standard_name_id).all()
+    # Отримуємо всі конверсії для цього стандартного імені разом із юнітами, які показує шаблон
+    conversions = db.query(UnitConversion).options(
+        joinedload(UnitConversion.from_unit),
+        joinedload(UnitConversion.to_unit),
+    ).filter_by(standard_name_id=standard_name_id).all()
 
     return templates.TemplateResponse("conversions_list.html", {
         "request": request,
@@ -124,7 +129,7 @@ async def get_conversions_for_standard_name(request: Request, standard_name_id:
 
 # Роут для додавання конверсії між юнітами
 @router.get("/add_conversion/{standard_name_id}", response_class=HTMLResponse)
-async def show_add_conversion_form(request: Request, standard_name_id: int, db: Session = Depends(get_db)):
+def show_add_conversion_form(request: Request, standard_name_id: int, db: Session = Depends(get_read_db)):
     standard_name = db.query(StandardName).filter_by(id=standard_name_id).first()
     if not standard_name:
         raise HTTPException(status_code=404, detail="Стандартне ім'я не знайдено.")
@@ -134,8 +139,8 @@ async def show_add_conversion_form(request: Request, standard_name_id: int, db:
 
 
 @router.post("/add_conversion", response_class=HTMLResponse)
-async def add_conversion_route(request: Request, from_unit_id: int = Form(...), to_unit_id: int = Form(...),
-                               formula: str = Form(...), standard_name_id: int = Form(...), db: Session = Depends(get_db)):
+def add_conversion_route(request: Request, from_unit_id: int = Form(...), to_unit_id: int = Form(...),
+                         formula: str = Form(...), standard_name_id: int = Form(...), db: Session = Depends(get_db)):
     # Додаємо конверсію
     add_unit_conversation(from_unit_id, to_unit_id, formula, standard_name_id)
     return RedirectResponse(f"/conversions/{standard_name_id}", status_code=302)
@@ -144,14 +149,14 @@ async def add_conversion_route(request: Request, from_unit_id: int = Form(...),
 
 # Роут для перегляду всіх конверсій для стандартного імені
 @router.get("/conversions/{standard_name_id}", response_class=HTMLResponse)
-async def get_conversions_for_standard_name(request: Request, standard_name_id: int, db: Session = Depends(get_db)):
+def get_conversions_for_standard_name(request: Request, standard_name_id: int, db: Session = Depends(get_read_db)):
     conversions = db.query(UnitConversion).filter_by(standard_name_id=standard_name_id).all()
     return templates.TemplateResponse("conversions.html", {"request": request, "standard_name_id": standard_name_id, "conversions": conversions})
 
 
 
 @router.get("/test_conversion/{standard_name_id}", response_class=HTMLResponse)
-async def show_test_conversion_form(request: Request, standard_name_id: int, db: Session = Depends(get_db)):
+def show_test_conversion_form(request: Request, standard_name_id: int, db: Session = Depends(get_read_db)):
     # Отримуємо стандартне ім'я та всі його юніти
     standard_name = db.query(StandardName).filter_by(id=standard_name_id).first()
     if not standard_name:
@@ -166,8 +171,8 @@ async def show_test_conversion_form(request: Request, standard_name_id: int, db:
 
 
 @router.post("/test_conversion", response_class=HTMLResponse)
-async def test_conversion_route(request: Request, value: float = Form(...), from_unit_id: int = Form(...),
-                                standard_name_id: int = Form(...), db: Session = Depends(get_db)):
+def test_conversion_route(request: Request, value: float = Form(...), from_unit_id: int = Form(...),
+                          standard_name_id: int = Form(...), db: Session = Depends(get_db)):
     # Виконуємо конверсію
     result = convert_to_standard_unit(value=value, from_unit_id=from_unit_id, standard_name_id=standard_name_id)
 
@@ -189,46 +194,44 @@ async def test_conversion_route(request: Request, value: float = Form(...), from
 
 
 @router.post("/delete_unit/{unit_id}", response_class=HTMLResponse)
-async def delete_unit_route(request: Request, unit_id: int, db: Session = Depends(get_db)):
+def delete_unit_route(request: Request, unit_id: int, db: Session = Depends(get_db)):
     unit = db.query(Unit).filter_by(id=unit_id).first()
     if not unit:
         raise HTTPException(status_code=404, detail="Юніт не знайдено.")
 
     db.delete(unit)
     db.commit()
+    invalidate_conversion_table(unit.standard_name_id)
 
     return RedirectResponse(f"/units/{unit.standard_name_id}", status_code=302)
 
 
 @router.post("/delete_conversion/{conversion_id}", response_class=HTMLResponse)
-async def delete_conversion_route(request: Request, conversion_id: int, db: Session = Depends(get_db)):
+def delete_conversion_route(request: Request, conversion_id: int, db: Session = Depends(get_db)):
     conversion = db.query(UnitConversion).filter_by(id=conversion_id).first()
     if not conversion:
         raise HTTPException(status_code=404, detail="Конверсію не знайдено.")
 
     db.delete(conversion)
     db.commit()
+    invalidate_conversion_table(conversion.standard_name_id)
 
     return RedirectResponse(f"/conversions/{conversion.standard_name_id}", status_code=302)
 
 
 @router.get("/calculator", response_class=HTMLResponse)
-async def show_calculator_page(request: Request, filter_letter: str = None, db: Session = Depends(get_db)):
-    # Отримуємо всі стандартні імена
-    standard_names_query = db.query(StandardName)
-
-    if filter_letter:
-        # Фільтрація за першою літерою назви
-        standard_names_query = standard_names_query.filter(StandardName.name.ilike(f"{filter_letter}%"))
-
-    standard_names = standard_names_query.all()
-    return templates.TemplateResponse("calculator.html", {"request": request, "standard_names": standard_names,
+def show_calculator_page(request: Request, filter_letter: str = None, cursor: str = None,
+                         db: Session = Depends(get_read_db)):
+    # Сторінка стандартних імен, за потреби - з фільтрацією за першою літерою назви
+    page = standard_names_page(db, filter_letter, cursor)
+    return templates.TemplateResponse("calculator.html", {"request": request, "standard_names": page.items,
+                                                          "next_cursor": page.next_cursor,
                                                           "filter_letter": filter_letter})
 
 
 # Роут для відображення форми конверсії для вибраного стандартного імені
 @router.get("/calculator_result/{standard_name_id}", response_class=HTMLResponse)
-async def show_conversion_form(request: Request, standard_name_id: int, db: Session = Depends(get_db)):
+def show_conversion_form(request: Request, standard_name_id: int, db: Session = Depends(get_read_db)):
 
     # Получаем стандартное имя по id
     standard_name = db.query(StandardName).filter_by(id=standard_name_id).first()
@@ -248,8 +251,8 @@ async def show_conversion_form(request: Request, standard_name_id: int, db: Sess
 
 # Роут для выполнения конверсии после отправки формы
 @router.post("/calculator_result_submit", response_class=HTMLResponse)
-async def calculate_conversion(request: Request, value: float = Form(...), from_unit_id: int = Form(...),
-                               to_unit_id: int = Form(...), standard_name_id: int = Form(...), db: Session = Depends(get_db)):
+def calculate_conversion(request: Request, value: float = Form(...), from_unit_id: int = Form(...),
+                         to_unit_id: int = Form(...), standard_name_id: int = Form(...), db: Session = Depends(get_db)):
     # Виконуємо конверсію
     result = convert_to_standard_unit(value=value, from_unit_id=from_unit_id, standard_name_id=standard_name_id)
 
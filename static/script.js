@@ -0,0 +1,22 @@
+// Підказки стандартних імен для полів з атрибутом data-standard-names:
+// під час введення підвантажується перша сторінка /api/standard_names із введеним префіксом
+const SUGGESTIONS_LIMIT = 20;
+const SUGGESTIONS_DELAY_MS = 200;
+
+document.querySelectorAll("input[data-standard-names]").forEach((input) => {
+    const options = document.getElementById(input.getAttribute("list"));
+    let timer = null;
+
+    input.addEventListener("input", () => {
+        clearTimeout(timer);
+        timer = setTimeout(async () => {
+            const params = new URLSearchParams({prefix: input.value, limit: SUGGESTIONS_LIMIT});
+            const response = await fetch(`/api/standard_names?${params}`);
+            if (!response.ok) {
+                return;
+            }
+            const page = await response.json();
+            options.replaceChildren(...page.items.map((item) => new Option(item.name)));
+        }, SUGGESTIONS_DELAY_MS);
+    });
+});